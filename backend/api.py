@@ -79,6 +79,29 @@ class InvoiceRequest(BaseModel):
         return v
 
 
+class BulkInvoiceRequest(BaseModel):
+    invoices: List[InvoiceRequest]
+
+    @field_validator("invoices")
+    @classmethod
+    def not_empty(cls, v):
+        if not v:
+            raise ValueError("At least one invoice is required")
+        return v
+
+
+class BulkStatusRequest(BaseModel):
+    invoice_ids: List[int]
+    invoice_status: str
+
+    @field_validator("invoice_ids")
+    @classmethod
+    def not_empty(cls, v):
+        if not v:
+            raise ValueError("At least one invoice id is required")
+        return v
+
+
 # Response models for API endpoints
 class CustomerMinimalResponse(BaseModel):
     customer_id: int
@@ -128,3 +151,29 @@ class InvoiceMinimalResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BulkInvoiceCreated(BaseModel):
+    index: int
+    id: int
+    invoice_total: float
+
+
+class BulkInvoiceError(BaseModel):
+    index: int
+    detail: str
+
+
+class BulkInvoiceResponse(BaseModel):
+    created: int
+    failed: int
+    invoices: List[BulkInvoiceCreated] = []
+    errors: List[BulkInvoiceError] = []
+
+
+class BulkStatusResponse(BaseModel):
+    invoice_status: str
+    updated: List[int] = []
+    unchanged: List[int] = []
+    not_found: List[int] = []
+    journal_entries_posted: int = 0
@@ -1,4 +1,5 @@
 import os
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from sqlmodel import SQLModel, create_engine, Session
 
 DATABASE_URL = os.getenv("DATABASE_URL", "")
@@ -12,11 +13,60 @@ else:
     # Local development: SQLite fallback
     engine = create_engine("sqlite:///database.db", echo=False)
 
+# Async engine for the async report/health routes, created on first use so
+# scripts that only need the sync engine don't require asyncpg / aiosqlite
+_async_engine = None
+
+
+def _async_database_url():
+    """DATABASE_URL with an async driver; asyncpg takes `ssl` instead of `sslmode`."""
+    if not DATABASE_URL:
+        return "sqlite+aiosqlite:///database.db", {}
+    if DATABASE_URL.startswith("sqlite"):
+        return DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1), {}
+    if DATABASE_URL.startswith(("postgresql", "postgres:")):
+        parts = urlsplit(DATABASE_URL)
+        query = dict(parse_qsl(parts.query))
+        sslmode = query.pop("sslmode", "require")
+        url = urlunsplit(("postgresql+asyncpg",) + tuple(parts[1:3]) + (urlencode(query), parts.fragment))
+        return url, {"ssl": sslmode}
+    return DATABASE_URL, {}
+
+
+def new_async_engine(**kwargs):
+    """A separate async engine, e.g. for work on its own event loop (asyncpg connections are loop-bound)."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    url, async_connect_args = _async_database_url()
+    return create_async_engine(url, connect_args=async_connect_args, echo=False, **kwargs)
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = new_async_engine()
+    return _async_engine
+
+
+async def dispose_async_engine():
+    """Close pooled async connections (aiosqlite keeps a worker thread per connection)."""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine, checkfirst=True)
+    # create_all skips indexes declared after their table was created
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
 
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
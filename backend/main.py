@@ -8,7 +8,7 @@ os.environ.setdefault("SSL_CERT_FILE", certifi.where())
 os.environ.setdefault("REQUESTS_CA_BUNDLE", certifi.where())
 from fastapi import FastAPI
 from mangum import Mangum
-from database import create_db_and_tables
+from database import create_db_and_tables, dispose_async_engine
 from fastapi.middleware.cors import CORSMiddleware
 from routes.invoice_routes import router as invoice_router
 from routes.customer_routes import router as customer_router
@@ -26,6 +26,9 @@ from routes.category_rules_routes import router as category_rules_router
 from middleware.validation import InputValidationMiddleware, SecurityHeadersMiddleware
 from middleware.rate_limiting import RateLimitMiddleware, IPWhitelistMiddleware
 from middleware.error_handling import GlobalErrorHandlerMiddleware, RequestLoggingMiddleware
+from middleware.caching import ReportCacheMiddleware
+from services.report_cache import report_cache
+from services.report_jobs import run_report_job
 
 
 
@@ -40,12 +43,22 @@ app = FastAPI(
 @app.on_event("startup")
 def on_startup():
     """Create database tables on application startup for data persistence."""
+    from database import engine
+    from services.search_index import ensure_search_indexes
+
     create_db_and_tables()
+    ensure_search_indexes(engine)
     _seed_chart_of_accounts()
     _seed_company()
     _seed_category_rules()
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Close pooled async database connections."""
+    await dispose_async_engine()
+
+
 def _seed_company():
     """Seed SmartInvoiceInc as the default company if none exists."""
     from sqlmodel import Session, select
@@ -148,6 +161,15 @@ ALLOWED_HEADERS = [
 ]
 
 # Add middleware stack (order matters - first added = last executed)
+# 0. Report cache (innermost - serves repeated /reports and /forecasting GETs
+#    from memory; everything below still wraps cache hits)
+app.add_middleware(
+    ReportCacheMiddleware,
+    cache=report_cache,
+    exclude_paths={"/reports/cache/stats", "/reports/aging/stream", "/reports/overdue/stream"},
+    exclude_prefixes=("/reports/jobs",)
+)
+
 # 1. Global Error Handler (outermost - catches all exceptions)
 app.add_middleware(GlobalErrorHandlerMiddleware, debug_mode=DEBUG_MODE)
 
@@ -197,4 +219,12 @@ app.include_router(category_rules_router)
 
 # Lambda handler for serverless deployment
 # lifespan="off" avoids ASGI lifespan issues on Lambda
-handler = Mangum(app, lifespan="off")
+_asgi_handler = Mangum(app, lifespan="off")
+
+
+def handler(event, context):
+    # Asynchronous self-invocations from services.report_jobs (REPORT_JOB_MODE=lambda)
+    if isinstance(event, dict) and "report_job_id" in event:
+        run_report_job(event["report_job_id"])
+        return {"report_job_id": event["report_job_id"]}
+    return _asgi_handler(event, context)
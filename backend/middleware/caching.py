@@ -0,0 +1,90 @@
+"""
+Report Response Caching Middleware for Invoice Management System
+
+Serves repeated GETs of report endpoints from services.report_cache
+instead of recomputing them. Only complete JSON 200 responses are cached;
+streamed NDJSON reports and errors pass through untouched.
+
+Registered first in main.py so it is the innermost middleware: CORS,
+security headers, rate limiting and request logging wrap cache hits
+exactly like computed responses. The route's own response headers are
+kept on MISS and replayed on HIT.
+"""
+
+from urllib.parse import urlencode
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from services.report_cache import ReportCache
+
+# Recomputed by Response for the replayed body
+_DROPPED_HEADERS = {"content-length", "content-type"}
+
+
+class ReportCacheMiddleware(BaseHTTPMiddleware):
+    """
+    Read-through cache for report GET endpoints.
+
+    Features:
+    - Key = path + sorted query parameters
+    - Bypass with `?refresh=true` or a `Cache-Control: no-cache` request header
+      (the fresh result is still stored for later requests)
+    - X-Cache response header: HIT / MISS / BYPASS
+    """
+
+    def __init__(self, app, cache: ReportCache, path_prefixes=("/reports", "/forecasting"), exclude_paths=(),
+                 exclude_prefixes=()):
+        super().__init__(app)
+        self.cache = cache
+        self.path_prefixes = tuple(path_prefixes)
+        self.exclude_paths = set(exclude_paths)
+        self.exclude_prefixes = tuple(exclude_prefixes)
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        if (
+            not self.cache.enabled
+            or request.method != "GET"
+            or not path.startswith(self.path_prefixes)
+            or path in self.exclude_paths
+            or path.startswith(self.exclude_prefixes)
+        ):
+            return await call_next(request)
+
+        bypass = (
+            request.query_params.get("refresh", "").lower() in ("1", "true")
+            or "no-cache" in request.headers.get("Cache-Control", "").lower()
+        )
+        params = sorted((k, v) for k, v in request.query_params.multi_items() if k != "refresh")
+        key = f"{path}?{urlencode(params)}" if params else path
+
+        if bypass:
+            self.cache.record_bypass()
+        else:
+            entry = self.cache.get(key)
+            if entry is not None:
+                return Response(
+                    content=entry.body,
+                    media_type=entry.media_type,
+                    headers={**entry.headers, "X-Cache": "HIT"},
+                )
+
+        # Read the version before computing so a write that lands mid-request leaves the entry stale
+        version = self.cache.version
+        response = await call_next(request)
+
+        media_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or not media_type.startswith("application/json"):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        self.cache.put(key, body, media_type, version, miss=not bypass, headers=headers)
+        return Response(
+            content=body,
+            status_code=200,
+            media_type=media_type,
+            headers={**headers, "X-Cache": "BYPASS" if bypass else "MISS"},
+        )
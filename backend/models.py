@@ -83,6 +83,11 @@ class JournalEntry(SQLModel, table=True):
     reference_id: Optional[int] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    __table_args__ = (
+        Index('idx_journal_entry_date', 'entry_date', 'id'),  # General ledger order / keyset pages
+        Index('idx_journal_entry_reference', 'reference_type', 'reference_id'),  # Posting idempotency check
+    )
+
     lines: List["JournalLine"] = Relationship(
         back_populates="entry",
         sa_relationship_kwargs={"cascade": "all, delete-orphan"}
@@ -103,6 +108,41 @@ class JournalLine(SQLModel, table=True):
     account: Optional[ChartOfAccount] = Relationship(back_populates="lines")
 
 
+class BankTransactionFingerprint(SQLModel, table=True):
+    """Posted bank statement transaction, keyed by its fingerprint so re-imports are skipped."""
+    __tablename__ = "bank_transaction_fingerprint"
+
+    fingerprint: str = Field(primary_key=True)           # sha256 hex, see confirm_bank_statement
+    journal_entry_id: int = Field(foreign_key="journal_entry.id", index=True)
+    bank_account_id: Optional[int] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ClassificationMemo(SQLModel, table=True):
+    """Confirmed bank transaction classification, reused for repeat merchants before any model call."""
+    __tablename__ = "classification_memo"
+
+    merchant_key: str = Field(primary_key=True)          # normalized description, see services.classification_memo
+    amount_sign: int = Field(primary_key=True)           # 1 = money in, -1 = money out
+    cash_gl_code: str = Field(primary_key=True)
+    debit_account: str
+    credit_account: str
+    journal_description: str = ""
+    type: str                                            # credit | debit
+    confirmed_count: int = 0                             # consecutive confirmations of these accounts
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class TransactionEmbedding(SQLModel, table=True):
+    """Sentence embedding of a memo merchant key, see services.transaction_knn."""
+    __tablename__ = "transaction_embedding"
+
+    merchant_key: str = Field(primary_key=True)
+    model: str = Field(primary_key=True)                 # embedding model name
+    vector: bytes                                        # float32, unit-normalized
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 # ── Accounts Payable Models ────────────────────────────────────────────────────
 
 class APVendor(SQLModel, table=True):
@@ -201,6 +241,7 @@ class Invoice(SQLModel, table=True):
     # Define composite indexes for common query patterns
     __table_args__ = (
         Index('idx_customer_date', 'customer_id', 'date_issued'),  # Customer invoice history
+        Index('idx_invoice_date_id', 'date_issued', 'id'),  # Keyset pages of the invoices report
         Index('idx_status_date', 'invoice_status', 'date_issued'),  # Status-based filtering with dates
         Index('idx_due_date_status', 'invoice_due_date', 'invoice_status'),  # Overdue invoice queries
     )
@@ -223,6 +264,109 @@ class Invoice(SQLModel, table=True):
 
 
 
+class DeletedInvoice(SQLModel, table=True):
+    """Tombstone written by delete_invoice so a 404 can say "deleted" with one PK lookup."""
+    __tablename__ = "deleted_invoice"
+
+    invoice_id: int = Field(primary_key=True)  # no FK — the invoice row is gone
+    deleted_at: datetime = Field(default_factory=datetime.utcnow, index=True)  # Index for tombstone purges
+
+
+class AggregateBackfill(SQLModel, table=True):
+    """Marks an incrementally maintained table as fully built from history, see services.backfill."""
+    __tablename__ = "aggregate_backfill"
+
+    name: str = Field(primary_key=True)                  # e.g. "revenue_rollup"
+    completed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class RevenueRollup(SQLModel, table=True):
+    """Invoice count/total per issue month and status, maintained by services.revenue_rollup."""
+    __tablename__ = "revenue_rollup"
+
+    year: int = Field(primary_key=True)
+    month: int = Field(primary_key=True)
+    invoice_status: str = Field(primary_key=True)
+    invoice_count: int = Field(default=0)
+    total_amount: float = Field(default=0.0)
+
+
+class CustomerPaymentStats(SQLModel, table=True):
+    """Per-customer payment counters, maintained by services.customer_payment_stats."""
+    __tablename__ = "customer_payment_stats"
+
+    customer_id: int = Field(primary_key=True)
+    total_count: int = Field(default=0)           # non-cancelled invoices
+    paid_count: int = Field(default=0)
+    overdue_count: int = Field(default=0)         # invoices in 'overdue' status
+    payment_count: int = Field(default=0)         # paid invoices with a recorded date_paid
+    late_count: int = Field(default=0)            # ...of which paid after the due date
+    days_late_sum: int = Field(default=0)
+    days_late_sq_sum: int = Field(default=0)
+    last_payment_date: Optional[datetime] = Field(default=None)
+
+
+class AccountBalance(SQLModel, table=True):
+    """Debit/credit totals per GL account, maintained by services.account_balances."""
+    __tablename__ = "account_balance"
+
+    account_id: int = Field(primary_key=True)   # no FK — mirrors journal_line.account_id
+    debit_total: float = Field(default=0.0)
+    credit_total: float = Field(default=0.0)
+    line_count: int = Field(default=0)
+
+
+class AccountPeriodTotal(SQLModel, table=True):
+    """Monthly debit/credit totals per GL account (ledger balance checkpoints), see services.account_balances."""
+    __tablename__ = "account_period_total"
+
+    account_id: int = Field(primary_key=True)
+    year: int = Field(primary_key=True)
+    month: int = Field(primary_key=True)
+    debit_total: float = Field(default=0.0)
+    credit_total: float = Field(default=0.0)
+    line_count: int = Field(default=0)
+
+
+class AccountingPeriod(SQLModel, table=True):
+    """A closed month; journal postings dated on or before the latest period_end are locked."""
+    __tablename__ = "accounting_period"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    period_start: date
+    period_end: date = Field(unique=True, index=True)
+    fiscal_year: int                                     # labelled by the calendar year the fiscal year ends in
+    closed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class AccountBalanceSnapshot(SQLModel, table=True):
+    """Cumulative debit/credit totals per account through a closed period's end, see services.periods."""
+    __tablename__ = "account_balance_snapshot"
+
+    period_end: date = Field(primary_key=True)
+    account_id: int = Field(primary_key=True)
+    debit_total: float = Field(default=0.0)
+    credit_total: float = Field(default=0.0)
+
+
+class ReportJob(SQLModel, table=True):
+    """Background report export, run by services.report_jobs and polled via /reports/jobs/{id}."""
+    __tablename__ = "report_job"
+
+    id: str = Field(primary_key=True, max_length=32)   # uuid4 hex
+    report_type: str                                   # invoices | aging | overdue
+    params: str = Field(default="{}")                  # JSON-encoded report parameters
+    status: str = Field(default="queued", index=True)  # queued | running | completed | failed
+    progress: int = Field(default=0)                   # 0–100
+    row_count: int = Field(default=0)
+    result_key: Optional[str] = Field(default=None)    # storage key of the JSON result
+    result_bytes: Optional[int] = Field(default=None)
+    error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = Field(default=None)
+    completed_at: Optional[datetime] = Field(default=None)
+
+
 class LineItem(SQLModel, table=True):
     __tablename__ = "lineitem"
     
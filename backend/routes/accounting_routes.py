@@ -1,4 +1,5 @@
 import csv
+import hashlib
 import io
 import json
 import re
@@ -8,14 +9,37 @@ from typing import List, Optional
 import anthropic
 import pdfplumber
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select, func
 
-from database import get_session
-from models import BankAccount, CategoryRule, ChartOfAccount, JournalEntry, JournalLine
+from database import get_session, engine
+from models import AccountingPeriod, BankAccount, BankTransactionFingerprint, CategoryRule, ChartOfAccount, JournalEntry, JournalLine
+from services.account_balances import account_totals, record_journal_lines
+from services.category_rules import get_rule_engine
+from services.classification_memo import hit_rate, lookup_memos, merchant_key, record_classifications
+from services.coa_cache import account_ids as coa_account_ids, invalidate_account_codes
+from services.financial_statements import (
+    balance_sheet, build_periods, cash_flow_statement, default_range, income_statement,
+)
+from services.ledger import decode_ledger_cursor, get_ledger_page, iter_ledger_rows
+from services.periods import (
+    PeriodClosedError, balances_as_of, check_period_open, close_periods, closed_through,
+    fiscal_year_bounds, fiscal_year_start_month, movement_between, open_entry_date,
+)
+from services.report_cache import report_cache
+from services.transaction_knn import classify_knn, invalidate_knn_indexes
 
 router = APIRouter(prefix="/accounting", tags=["accounting"])
 
+LEDGER_PAGE_SIZE = 500
+LEDGER_PAGE_MAX = 5000
+LEDGER_CSV_FIELDS = [
+    "entry_date", "journal_entry_id", "description", "reference_type", "reference_id", "debit", "credit", "balance",
+]
+
 
 # ── Pydantic schemas ───────────────────────────────────────────────────────────
 
@@ -53,6 +77,10 @@ class BankStatementConfirm(BaseModel):
 CONFIDENCE_THRESHOLD = 0.95
 
 
+class PeriodCloseRequest(BaseModel):
+    through: date           # closes every open month up to and including this date's month
+
+
 class JournalEntryCreate(BaseModel):
     entry_date: date
     description: str
@@ -75,6 +103,7 @@ def post_journal_entry(
     Create a balanced journal entry. Silently skips if accounts not found
     (avoids breaking existing workflows if COA not seeded yet).
     Idempotent: skips if an entry with the same reference_type + reference_id already exists.
+    Entries dated in a closed period are posted on the first open day.
     """
     existing = session.exec(
         select(JournalEntry).where(
@@ -85,6 +114,7 @@ def post_journal_entry(
     if existing:
         return  # already posted, skip duplicate
 
+    entry_date = open_entry_date(entry_date, closed_through(session))
     entry = JournalEntry(
         entry_date=entry_date,
         description=description,
@@ -94,19 +124,113 @@ def post_journal_entry(
     session.add(entry)
     session.flush()
 
+    account_ids = coa_account_ids(session, (line["account_code"] for line in lines))
+    posted = []
     for line in lines:
-        account = session.exec(
-            select(ChartOfAccount).where(ChartOfAccount.code == line["account_code"])
-        ).first()
-        if not account:
+        if line["account_code"] not in account_ids:
             continue
-        session.add(JournalLine(
+        journal_line = JournalLine(
             journal_entry_id=entry.id,
-            account_id=account.id,
+            account_id=account_ids[line["account_code"]],
             debit=line.get("debit", 0.0),
             credit=line.get("credit", 0.0),
             description=line.get("description"),
-        ))
+        )
+        session.add(journal_line)
+        posted.append((journal_line.account_id, entry_date, journal_line.debit, journal_line.credit))
+    record_journal_lines(session, posted)
+
+
+def post_journal_entries_bulk(session: Session, entries: List[dict]) -> int:
+    """
+    Batched counterpart of post_journal_entry for many entries at once.
+
+    Each entry is a dict with the post_journal_entry keyword arguments
+    (entry_date, description, reference_type, reference_id, lines).
+    Every entry must balance (raises ValueError before anything is written);
+    entries dated in a closed period are posted on the first open day.
+    Already-posted references are filtered with one set-based query, account
+    codes are resolved through the COA cache, and entries / lines are written
+    with executemany inserts. Does not commit. Returns the number of entries posted.
+    """
+    if not entries:
+        return 0
+
+    for e in entries:
+        total_debit = sum(line.get("debit", 0.0) for line in e["lines"])
+        total_credit = sum(line.get("credit", 0.0) for line in e["lines"])
+        if round(total_debit, 2) != round(total_credit, 2):
+            raise ValueError(
+                f"Journal entry {e['reference_type']} #{e['reference_id']} is unbalanced: "
+                f"debits={total_debit}, credits={total_credit}"
+            )
+
+    refs_by_type = {}
+    for e in entries:
+        refs_by_type.setdefault(e["reference_type"], set()).add(e["reference_id"])
+    existing = set(session.exec(
+        select(JournalEntry.reference_type, JournalEntry.reference_id).where(
+            or_(*[
+                and_(JournalEntry.reference_type == ref_type, JournalEntry.reference_id.in_(ref_ids))
+                for ref_type, ref_ids in refs_by_type.items()
+            ])
+        )
+    ).all())
+
+    pending, seen = [], set()
+    for e in entries:
+        key = (e["reference_type"], e["reference_id"])
+        if key in existing or key in seen:
+            continue  # already posted, skip duplicate
+        seen.add(key)
+        pending.append(e)
+    if not pending:
+        return 0
+
+    through = closed_through(session)
+    pending = [{**e, "entry_date": open_entry_date(e["entry_date"], through)} for e in pending]
+    _insert_journal_entries(session, pending)
+    return len(pending)
+
+
+def _insert_journal_entries(session: Session, entries: List[dict]) -> List[int]:
+    """Write entries and their lines with executemany inserts (no dedupe). Returns entry ids in order."""
+    account_ids = coa_account_ids(session, (line["account_code"] for e in entries for line in e["lines"]))
+
+    entry_ids = session.execute(
+        insert(JournalEntry).returning(JournalEntry.id, sort_by_parameter_order=True),
+        [
+            {
+                "entry_date": e["entry_date"],
+                "description": e["description"],
+                "reference_type": e["reference_type"],
+                "reference_id": e["reference_id"],
+                "created_at": datetime.utcnow(),
+            }
+            for e in entries
+        ],
+    ).scalars().all()
+
+    entry_dates = {entry_id: e["entry_date"] for entry_id, e in zip(entry_ids, entries)}
+    line_rows = [
+        {
+            "journal_entry_id": entry_id,
+            "account_id": account_ids[line["account_code"]],
+            "debit": line.get("debit", 0.0),
+            "credit": line.get("credit", 0.0),
+            "description": line.get("description"),
+        }
+        for entry_id, e in zip(entry_ids, entries)
+        for line in e["lines"]
+        if line["account_code"] in account_ids   # same silent skip as post_journal_entry
+    ]
+    if line_rows:
+        session.execute(insert(JournalLine), line_rows)
+        record_journal_lines(session, [
+            (row["account_id"], entry_dates[row["journal_entry_id"]], row["debit"], row["credit"])
+            for row in line_rows
+        ])
+    return entry_ids
 
 
 # ── Chart of Accounts ──────────────────────────────────────────────────────────
@@ -116,17 +240,11 @@ def list_accounts(session: Session = Depends(get_session)):
     accounts = session.exec(
         select(ChartOfAccount).order_by(ChartOfAccount.code)
     ).all()
+    totals = account_totals(session)
 
     result = []
     for acct in accounts:
-        total_debit  = session.exec(
-            select(func.coalesce(func.sum(JournalLine.debit), 0.0))
-            .where(JournalLine.account_id == acct.id)
-        ).first() or 0.0
-        total_credit = session.exec(
-            select(func.coalesce(func.sum(JournalLine.credit), 0.0))
-            .where(JournalLine.account_id == acct.id)
-        ).first() or 0.0
+        total_debit, total_credit = totals.get(acct.id, (0.0, 0.0))
 
         if acct.normal_balance == "debit":
             balance = total_debit - total_credit
@@ -156,6 +274,8 @@ def create_account(body: AccountCreate, session: Session = Depends(get_session))
     account = ChartOfAccount(**body.model_dump())
     session.add(account)
     session.commit()
+    invalidate_account_codes()
+    report_cache.bump_version()
     session.refresh(account)
     return {"id": account.id, "code": account.code, "name": account.name}
 
@@ -254,6 +374,10 @@ def create_journal_entry(body: JournalEntryCreate, session: Session = Depends(ge
             status_code=400,
             detail=f"Journal entry is unbalanced: debits={total_debit}, credits={total_credit}"
         )
+    try:
+        check_period_open(session, [body.entry_date])
+    except PeriodClosedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
     entry = JournalEntry(
         entry_date=body.entry_date,
@@ -275,70 +399,94 @@ def create_journal_entry(body: JournalEntryCreate, session: Session = Depends(ge
             credit=line.credit,
             description=line.description,
         ))
+    record_journal_lines(session, [(line.account_id, body.entry_date, line.debit, line.credit) for line in body.lines])
 
     session.commit()
+    report_cache.bump_version()
     return {"id": entry.id}
 
 
 # ── Account Ledger ─────────────────────────────────────────────────────────────
 
 @router.get("/ledger/{account_id}")
-def get_ledger(account_id: int, session: Session = Depends(get_session)):
+def get_ledger(
+    account_id: int,
+    from_date: Optional[date] = Query(None, alias="from", description="First entry date to include"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last entry date to include"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from next_cursor (continues after from)"),
+    limit: int = Query(LEDGER_PAGE_SIZE, ge=1, le=LEDGER_PAGE_MAX),
+    session: Session = Depends(get_session),
+):
+    """
+    One page of an account's ledger with running balances
+    opening_balance is the balance before the page, seeded from monthly checkpoints
+    """
     account = session.get(ChartOfAccount, account_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
+    try:
+        after = decode_ledger_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    lines = session.exec(
-        select(JournalLine, JournalEntry)
-        .join(JournalEntry, JournalLine.journal_entry_id == JournalEntry.id)
-        .where(JournalLine.account_id == account_id)
-        .order_by(JournalEntry.entry_date, JournalEntry.id)
-    ).all()
-
-    running = 0.0
-    rows = []
-    for line, entry in lines:
-        if account.normal_balance == "debit":
-            running += line.debit - line.credit
-        else:
-            running += line.credit - line.debit
-        rows.append({
-            "journal_entry_id": entry.id,
-            "entry_date": str(entry.entry_date),
-            "description": entry.description,
-            "reference_type": entry.reference_type,
-            "reference_id": entry.reference_id,
-            "debit": line.debit,
-            "credit": line.credit,
-            "balance": round(running, 2),
-        })
-
+    page = get_ledger_page(session, account, after, from_date, to_date, limit)
     return {
         "account": {"id": account.id, "code": account.code, "name": account.name, "account_type": account.account_type},
-        "lines": rows,
-        "closing_balance": round(running, 2),
+        **page,
     }
 
 
+@router.get("/ledger/{account_id}/csv")
+def export_ledger_csv(
+    account_id: int,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    session: Session = Depends(get_session),
+):
+    """Stream the account's full ledger (or a date range) as CSV"""
+    account = session.get(ChartOfAccount, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=LEDGER_CSV_FIELDS)
+        writer.writeheader()
+        # The request-scoped session is closed before the body streams
+        with Session(engine) as stream_session:
+            for i, row in enumerate(iter_ledger_rows(stream_session, account, from_date, to_date), 1):
+                writer.writerow(row)
+                if i % 1000 == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+        yield buffer.getvalue()
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="ledger-{account.code}.csv"'},
+    )
+
+
 # ── Trial Balance ──────────────────────────────────────────────────────────────
 
 @router.get("/trial-balance")
-def get_trial_balance(session: Session = Depends(get_session)):
+def get_trial_balance(
+    as_of: Optional[date] = Query(None, description="Balances as of this date (defaults to all postings)"),
+    session: Session = Depends(get_session),
+):
     accounts = session.exec(select(ChartOfAccount).where(ChartOfAccount.is_active == True).order_by(ChartOfAccount.code)).all()
 
+    # Dated balances: nearest closed-period snapshot plus the lines after it
+    totals = balances_as_of(session, as_of) if as_of else account_totals(session)
+
     rows = []
     total_debit = 0.0
     total_credit = 0.0
 
     for acct in accounts:
-        dr = session.exec(
-            select(func.coalesce(func.sum(JournalLine.debit), 0.0))
-            .where(JournalLine.account_id == acct.id)
-        ).first() or 0.0
-        cr = session.exec(
-            select(func.coalesce(func.sum(JournalLine.credit), 0.0))
-            .where(JournalLine.account_id == acct.id)
-        ).first() or 0.0
+        dr, cr = totals.get(acct.id, (0.0, 0.0))
 
         if dr == 0 and cr == 0:
             continue
@@ -362,6 +510,7 @@ def get_trial_balance(session: Session = Depends(get_session)):
         })
 
     return {
+        "as_of": str(as_of) if as_of else None,
         "accounts": rows,
         "total_debit": round(total_debit, 2),
         "total_credit": round(total_credit, 2),
@@ -372,30 +521,45 @@ def get_trial_balance(session: Session = Depends(get_session)):
 # ── P&L Summary ────────────────────────────────────────────────────────────────
 
 @router.get("/summary")
-def get_pl_summary(session: Session = Depends(get_session)):
-    def account_balance(code: str) -> float:
-        acct = session.exec(select(ChartOfAccount).where(ChartOfAccount.code == code)).first()
+def get_pl_summary(
+    start_date: Optional[date] = Query(None, description="First day of the P&L period"),
+    end_date: Optional[date] = Query(None, description="Last day of the P&L period; balances are as of this date"),
+    fiscal_year: Optional[int] = Query(None, description="Fiscal year (per Company.fiscal_year_start) instead of dates"),
+    session: Session = Depends(get_session),
+):
+    accounts = {
+        acct.code: acct
+        for acct in session.exec(
+            select(ChartOfAccount).where(ChartOfAccount.code.in_(["4000", "5000", "1000", "1100", "2000"]))
+        ).all()
+    }
+    if fiscal_year:
+        start_date, end_date = fiscal_year_bounds(fiscal_year, fiscal_year_start_month(session))
+    if start_date or end_date:
+        end_date = end_date or date.today()
+        flows = movement_between(session, start_date, end_date)
+        positions = balances_as_of(session, end_date)
+    else:
+        flows = positions = account_totals(session)
+
+    def account_balance(code: str, totals) -> float:
+        acct = accounts.get(code)
         if not acct:
             return 0.0
-        dr = session.exec(
-            select(func.coalesce(func.sum(JournalLine.debit), 0.0))
-            .where(JournalLine.account_id == acct.id)
-        ).first() or 0.0
-        cr = session.exec(
-            select(func.coalesce(func.sum(JournalLine.credit), 0.0))
-            .where(JournalLine.account_id == acct.id)
-        ).first() or 0.0
+        dr, cr = totals.get(acct.id, (0.0, 0.0))
         if acct.normal_balance == "debit":
             return round(dr - cr, 2)
         return round(cr - dr, 2)
 
-    revenue  = account_balance("4000")
-    cogs     = account_balance("5000")
-    cash     = account_balance("1000")
-    ar       = account_balance("1100")
-    ap       = account_balance("2000")
+    revenue  = account_balance("4000", flows)
+    cogs     = account_balance("5000", flows)
+    cash     = account_balance("1000", positions)
+    ar       = account_balance("1100", positions)
+    ap       = account_balance("2000", positions)
 
     return {
+        "start_date": str(start_date) if start_date else None,
+        "end_date": str(end_date) if end_date else None,
         "revenue": revenue,
         "expenses": cogs,
         "net_income": round(revenue - cogs, 2),
@@ -405,38 +569,115 @@ def get_pl_summary(session: Session = Depends(get_session)):
     }
 
 
+# ── Financial Statements ───────────────────────────────────────────────────────
+
+def _statement_periods(
+    session: Session,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    fiscal_year: Optional[int],
+    granularity: str,
+):
+    if fiscal_year:
+        start_date, end_date = fiscal_year_bounds(fiscal_year, fiscal_year_start_month(session))
+    default_start, default_end = default_range()
+    try:
+        return build_periods(start_date or default_start, end_date or default_end, granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/statements/income")
+def get_income_statement(
+    start_date: Optional[date] = Query(None, description="Start of the first period (defaults to 11 months ago)"),
+    end_date: Optional[date] = Query(None, description="End of the last period (defaults to today)"),
+    fiscal_year: Optional[int] = Query(None, description="Fiscal year (per Company.fiscal_year_start) instead of dates"),
+    granularity: str = Query("month", description="month | quarter | year"),
+    session: Session = Depends(get_session),
+):
+    """Comparative P&L: revenue and expense accounts per period, with net income"""
+    periods = _statement_periods(session, start_date, end_date, fiscal_year, granularity)
+    return income_statement(session, periods, granularity)
+
+
+@router.get("/statements/balance-sheet")
+def get_balance_sheet(
+    start_date: Optional[date] = Query(None, description="Start of the first period (defaults to 11 months ago)"),
+    end_date: Optional[date] = Query(None, description="End of the last period (defaults to today)"),
+    fiscal_year: Optional[int] = Query(None, description="Fiscal year (per Company.fiscal_year_start) instead of dates"),
+    granularity: str = Query("month", description="month | quarter | year"),
+    session: Session = Depends(get_session),
+):
+    """Assets, liabilities and equity as of each period end"""
+    periods = _statement_periods(session, start_date, end_date, fiscal_year, granularity)
+    return balance_sheet(session, periods, granularity)
+
+
+@router.get("/statements/cash-flow")
+def get_cash_flow_statement(
+    start_date: Optional[date] = Query(None, description="Start of the first period (defaults to 11 months ago)"),
+    end_date: Optional[date] = Query(None, description="End of the last period (defaults to today)"),
+    fiscal_year: Optional[int] = Query(None, description="Fiscal year (per Company.fiscal_year_start) instead of dates"),
+    granularity: str = Query("month", description="month | quarter | year"),
+    session: Session = Depends(get_session),
+):
+    """Indirect cash flow per period: net income, working-capital changes and financing"""
+    periods = _statement_periods(session, start_date, end_date, fiscal_year, granularity)
+    return cash_flow_statement(session, periods, granularity)
+
+
+# ── Period Close ───────────────────────────────────────────────────────────────
+
+def _period_out(period: AccountingPeriod) -> dict:
+    return {
+        "period_start": str(period.period_start),
+        "period_end": str(period.period_end),
+        "fiscal_year": period.fiscal_year,
+        "closed_at": period.closed_at.isoformat(),
+    }
+
+
+@router.get("/periods")
+def list_closed_periods(session: Session = Depends(get_session)):
+    periods = session.exec(select(AccountingPeriod).order_by(AccountingPeriod.period_end.desc())).all()
+    through = closed_through(session)
+    return {
+        "closed_through": str(through) if through else None,
+        "fiscal_year_start": fiscal_year_start_month(session),
+        "periods": [_period_out(p) for p in periods],
+    }
+
+
+@router.post("/periods/close", status_code=201)
+def close_accounting_periods(body: PeriodCloseRequest, session: Session = Depends(get_session)):
+    """
+    Close every open month through body.through, snapshotting account balances
+    Postings dated in closed months are locked from then on
+    """
+    try:
+        closed = close_periods(session, body.through)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="These periods were closed by another request")
+    report_cache.bump_version()
+    return {"closed": [_period_out(p) for p in closed], "closed_through": str(closed[-1].period_end)}
+
+
 # ── Bank Statement Upload ───────────────────────────────────────────────────────
 
-def apply_category_rules(raw_transactions: list, session: Session):
+def apply_category_rules(raw_transactions: list, session: Session, company_id: Optional[int] = None):
     """
     Split transactions into rule-matched and unmatched (needs Claude).
     Rule-matched get confidence=1.0; unmatched go to Claude.
+    Rules are matched by the cached compiled engine (services.category_rules).
     """
-    import re as _re
-    rules = session.exec(
-        select(CategoryRule)
-        .where(CategoryRule.is_active == True)
-        .order_by(CategoryRule.priority)
-    ).all()
+    rule_engine = get_rule_engine(session, company_id)
 
     matched, unmatched = [], []
     for txn in raw_transactions:
-        desc = (txn.get("description") or "").lower()
-        rule_hit = None
-        for rule in rules:
-            val = rule.match_value.lower()
-            if rule.match_type == "contains" and val in desc:
-                rule_hit = rule
-            elif rule.match_type == "starts_with" and desc.startswith(val):
-                rule_hit = rule
-            elif rule.match_type == "exact" and desc == val:
-                rule_hit = rule
-            elif rule.match_type == "regex":
-                if _re.search(val, desc, _re.IGNORECASE):
-                    rule_hit = rule
-            if rule_hit:
-                break
-
+        rule_hit = rule_engine.match(txn.get("description") or "")
         if rule_hit:
             matched.append({
                 **txn,
@@ -528,8 +769,12 @@ async def upload_bank_statement(
     if not raw_transactions:
         raise HTTPException(status_code=400, detail="No transactions found in the uploaded file")
 
-    # Apply category rules first — rule-matched skip Claude
-    rule_matched, needs_claude = apply_category_rules(raw_transactions, session)
+    gl_code = "1000"
+
+    # Apply category rules first, then confirmed classifications and their nearest neighbours — all skip Claude
+    rule_matched, unmatched = apply_category_rules(raw_transactions, session)
+    memo_matched, memo_missed = lookup_memos(session, unmatched, gl_code)
+    knn_matched, needs_claude = classify_knn(session, memo_missed, gl_code)
 
     claude_classified = []
     if needs_claude:
@@ -552,9 +797,8 @@ async def upload_bank_statement(
             t.setdefault("confidence", 0.80)
             t.setdefault("rule_matched", None)
 
-    classified = rule_matched + claude_classified
+    classified = rule_matched + memo_matched + knn_matched + claude_classified
 
-    gl_code = "1000"
     total_credits = sum(t.get("amount", 0) for t in classified if t.get("debit_account") == gl_code)
     total_debits = sum(t.get("amount", 0) for t in classified if t.get("credit_account") == gl_code)
     flagged = sum(1 for t in classified if t.get("confidence", 1.0) < CONFIDENCE_THRESHOLD)
@@ -566,6 +810,9 @@ async def upload_bank_statement(
         "total_debits": round(total_debits, 2),
         "flagged_count": flagged,
         "rule_matched_count": len(rule_matched),
+        "memo_matched_count": len(memo_matched),
+        "memo_hit_rate": hit_rate(len(memo_matched), len(unmatched)),
+        "knn_matched_count": len(knn_matched),
     }
 
 
@@ -574,6 +821,12 @@ def confirm_bank_statement(
     body: BankStatementConfirm,
     session: Session = Depends(get_session),
 ):
+    """
+    Post confirmed bank transactions as journal entries in one batch
+    Each transaction is fingerprinted (cash account, date, amount, type,
+    description, occurrence) so re-importing a statement skips posted lines,
+    and its accounts are remembered in the classification memo
+    """
     # Determine cash GL code — use the connected BankAccount if provided
     cash_gl_code = "1000"
     if body.bank_account_id:
@@ -581,7 +834,8 @@ def confirm_bank_statement(
         if bank_account:
             cash_gl_code = bank_account.gl_account_code
 
-    posted = 0
+    entries, fingerprints, memos = [], [], []
+    occurrences = {}
     skipped = 0
     for txn in body.transactions:
         # Skip low-confidence transactions — require manual review
@@ -602,22 +856,78 @@ def confirm_bank_statement(
         except ValueError:
             entry_date_parsed = date.today()
 
+        # Identical transactions on one statement (two equal card charges) are told apart by occurrence
+        identity = (
+            cash_gl_code, txn.date.strip(), f"{abs(txn.amount):.2f}", txn.type,
+            " ".join(txn.description.split()).lower(),
+        )
+        occurrence = occurrences.get(identity, 0)
+        occurrences[identity] = occurrence + 1
+        fingerprints.append(hashlib.sha256("|".join((*identity, str(occurrence))).encode()).hexdigest())
+
+        key = merchant_key(txn.description)
+        memo = None
+        if key:
+            if debit_account == cash_gl_code:
+                sign = 1
+            elif credit_account == cash_gl_code:
+                sign = -1
+            else:
+                sign = 1 if txn.amount >= 0 else -1
+            memo = ((key, sign, cash_gl_code), {
+                "debit_account": debit_account,
+                "credit_account": credit_account,
+                "journal_description": txn.journal_description,
+                "type": txn.type,
+            })
+        memos.append(memo)
+
         amount = abs(txn.amount)
-        post_journal_entry(
-            session=session,
-            entry_date=entry_date_parsed,
-            description=txn.description or txn.journal_description,
-            reference_type="bank_statement",
-            reference_id=body.bank_account_id or 0,
-            lines=[
+        entries.append({
+            "entry_date": entry_date_parsed,
+            "description": txn.description or txn.journal_description,
+            "reference_type": "bank_statement",
+            "reference_id": body.bank_account_id or 0,
+            "lines": [
                 {"account_code": debit_account, "debit": amount, "credit": 0.0},
                 {"account_code": credit_account, "debit": 0.0, "credit": amount},
             ],
-        )
-        posted += 1
+        })
 
-    session.commit()
+    try:
+        check_period_open(session, (e["entry_date"] for e in entries))
+    except PeriodClosedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    # Transactions already posted by an earlier import of the same statement
+    existing = set(session.exec(
+        select(BankTransactionFingerprint.fingerprint)
+        .where(BankTransactionFingerprint.fingerprint.in_(fingerprints))
+    ).all()) if fingerprints else set()
+    pending = [(e, f, m) for e, f, m in zip(entries, fingerprints, memos) if f not in existing]
+    duplicates = len(entries) - len(pending)
+    # Only newly posted transactions confirm a memo, and each key counts once per call (last one wins)
+    memo_rows = dict(m for _, _, m in pending if m)
+
+    try:
+        if pending:
+            entry_ids = _insert_journal_entries(session, [e for e, _, _ in pending])
+            session.execute(insert(BankTransactionFingerprint), [
+                {"fingerprint": f, "journal_entry_id": entry_id, "bank_account_id": body.bank_account_id,
+                 "created_at": datetime.utcnow()}
+                for entry_id, (_, f, _) in zip(entry_ids, pending)
+            ])
+        record_classifications(session, memo_rows)
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="This statement is already being confirmed; retry to post any remaining transactions")
+    report_cache.bump_version()
+    invalidate_knn_indexes()
+    posted = len(pending)
     msg = f"Successfully posted {posted} journal entries."
+    if duplicates:
+        msg += f" {duplicates} transaction(s) already posted by an earlier import."
     if skipped:
         msg += f" {skipped} transaction(s) skipped — confidence below 95%, manual review needed."
-    return {"posted": posted, "skipped_low_confidence": skipped, "message": msg}
+    return {"posted": posted, "skipped_duplicates": duplicates, "skipped_low_confidence": skipped, "message": msg}
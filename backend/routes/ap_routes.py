@@ -16,6 +16,7 @@ from sqlmodel import Session, select
 from database import get_session
 from models import APInvoice, APLineItem, APPayment, APVendor, Company
 from services.ap_extractor import extract_from_bytes
+from services.report_cache import report_cache
 from routes.accounting_routes import post_journal_entry
 
 # ── ML Extractor caller ────────────────────────────────────────────────────────
@@ -396,6 +397,7 @@ async def upload_ap_invoice(
     invoice.pdf_filename = _save_pdf(pdf_bytes, invoice.id)
 
     session.commit()
+    report_cache.bump_version()
     session.refresh(invoice)
 
     bill_to_check = _check_bill_to(extracted.get("bill_to_name"), session)
@@ -567,6 +569,7 @@ def update_ap_invoice(
             ))
 
     session.commit()
+    report_cache.bump_version()
     session.refresh(invoice)
     return {"id": invoice.id, "status": invoice.status}
 
@@ -592,6 +595,7 @@ def approve_ap_invoice(invoice_id: int, session: Session = Depends(get_session))
         ]
     )
     session.commit()
+    report_cache.bump_version()
     return {"id": invoice.id, "status": invoice.status}
 
 
@@ -611,6 +615,7 @@ def reject_ap_invoice(
     invoice.status = "rejected"
     invoice.notes  = body.notes
     session.commit()
+    report_cache.bump_version()
     return {"id": invoice.id, "status": invoice.status}
 
 
@@ -649,6 +654,7 @@ def record_payment(
         ]
     )
     session.commit()
+    report_cache.bump_version()
     return {"id": invoice.id, "status": invoice.status, "payment_id": payment.id}
 
 
@@ -670,6 +676,7 @@ def create_vendor(body: APVendorCreate, session: Session = Depends(get_session))
     vendor = APVendor(**body.model_dump())
     session.add(vendor)
     session.commit()
+    report_cache.bump_version()
     session.refresh(vendor)
     return {"id": vendor.id, "vendor_name": vendor.vendor_name}
 
@@ -686,5 +693,6 @@ def update_vendor(
     for k, v in body.model_dump(exclude_none=True).items():
         setattr(vendor, k, v)
     session.commit()
+    report_cache.bump_version()
     session.refresh(vendor)
     return {"id": vendor.id, "vendor_name": vendor.vendor_name}
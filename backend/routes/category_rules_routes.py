@@ -5,6 +5,7 @@ Rules are matched against transaction descriptions before Claude classification.
 Rule-matched transactions get confidence=1.0 (no AI needed).
 """
 
+import re
 from datetime import datetime
 from typing import Optional
 
@@ -14,6 +15,7 @@ from sqlmodel import Session, select
 
 from database import get_session
 from models import CategoryRule
+from services.category_rules import invalidate_rule_engines
 
 router = APIRouter(prefix="/accounting/category-rules", tags=["category-rules"])
 
@@ -39,6 +41,14 @@ class CategoryRuleUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+def _validate_pattern(match_type: str, match_value: str):
+    if match_type == "regex":
+        try:
+            re.compile(match_value)
+        except re.error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid regex '{match_value}': {e}")
+
+
 def _rule_out(rule: CategoryRule) -> dict:
     return {
         "id": rule.id,
@@ -66,9 +76,11 @@ def list_rules(session: Session = Depends(get_session)):
 
 @router.post("", status_code=201)
 def create_rule(body: CategoryRuleCreate, session: Session = Depends(get_session)):
+    _validate_pattern(body.match_type, body.match_value)
     rule = CategoryRule(**body.model_dump())
     session.add(rule)
     session.commit()
+    invalidate_rule_engines()
     session.refresh(rule)
     return _rule_out(rule)
 
@@ -80,8 +92,10 @@ def update_rule(rule_id: int, body: CategoryRuleUpdate, session: Session = Depen
         raise HTTPException(status_code=404, detail="Rule not found")
     for field, value in body.model_dump(exclude_unset=True).items():
         setattr(rule, field, value)
+    _validate_pattern(rule.match_type, rule.match_value)
     session.add(rule)
     session.commit()
+    invalidate_rule_engines()
     session.refresh(rule)
     return _rule_out(rule)
 
@@ -94,3 +108,4 @@ def delete_rule(rule_id: int, session: Session = Depends(get_session)):
     rule.is_active = False
     session.add(rule)
     session.commit()
+    invalidate_rule_engines()
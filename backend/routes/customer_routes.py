@@ -5,6 +5,8 @@ from typing import List
 import models
 from models import Customer
 from api import CustomerRequest, CustomerMinimalResponse
+from services.report_cache import report_cache
+from services.search_index import search_ids, substring_ids
 from fastapi import Query
 
 
@@ -25,6 +27,7 @@ def create_customer(customer: CustomerRequest, session: Session = Depends(get_se
     customer_db = Customer.model_validate(customer)
     session.add(customer_db)
     session.commit()
+    report_cache.bump_version()
     session.refresh(customer_db)
     return CustomerMinimalResponse(
         **customer_db.model_dump()
@@ -38,16 +41,39 @@ def get_customers(
     limit: int = 100,
     session: Session = Depends(get_session)
 ):
-    query = select(Customer)
     if customer_name:
-        query = query.where(Customer.customer_name.ilike(f"%{customer_name}%"))
-    customers = session.exec(query.offset(skip).limit(limit)).all()
+        # Name substring match (ILIKE '%name%' semantics) served by the trigram index instead of a scan
+        customers = _customers_by_ids(session, substring_ids(session, "customer", customer_name, limit, skip))
+    else:
+        customers = session.exec(select(Customer).offset(skip).limit(limit)).all()
     return [
         CustomerMinimalResponse(
             **customer.model_dump()
         ) for customer in customers
     ]
 
+# Search customers by name/email (prefix typeahead, best match first)
+@router.get("/customers/search", response_model=List[CustomerMinimalResponse])
+def search_customers(
+    q: str = Query(..., min_length=1, description="Search text; each word is prefix-matched"),
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_session)
+):
+    customers = _customers_by_ids(session, search_ids(session, "customer", q, limit))
+    return [
+        CustomerMinimalResponse(
+            **customer.model_dump()
+        ) for customer in customers
+    ]
+
+
+def _customers_by_ids(session: Session, ids: List[int]) -> List[Customer]:
+    """Load customers for ranked search ids, preserving rank order."""
+    if not ids:
+        return []
+    by_id = {c.customer_id: c for c in session.exec(select(Customer).where(Customer.customer_id.in_(ids))).all()}
+    return [by_id[i] for i in ids if i in by_id]
+
 # Get a customer by ID
 @router.get("/customer/{customer_id}", response_model=CustomerMinimalResponse)
 def get_customer(customer_id: int, session: Session = Depends(get_session)):
@@ -79,6 +105,7 @@ def update_customer(customer_id: int, customer: CustomerRequest, session: Sessio
     
     session.add(customer_db)
     session.commit()
+    report_cache.bump_version()
     session.refresh(customer_db)
     
     return CustomerMinimalResponse(
@@ -94,6 +121,7 @@ def delete_customer(customer_id: int, session: Session = Depends(get_session)):
     
     session.delete(customer)
     session.commit()
+    report_cache.bump_version()
 
     return CustomerMinimalResponse(
         **{"deleted": True, "id": customer_id, "message": "Customer deleted successfully"}
@@ -1,9 +1,12 @@
 from datetime import date, datetime, timedelta
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select, func
-from database import get_session
-from models import Invoice, APPayment
+from sqlmodel import Session, case, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_async_session, get_session
+from models import CustomerPaymentStats, Invoice, APPayment
+from services.aging import aging_totals
+from services.customer_payment_stats import ensure_customer_payment_stats, payment_summary
 import os
 import warnings
 warnings.filterwarnings("ignore")
@@ -71,32 +74,13 @@ def _sarima_forecast(values: List[float], steps: int = 3) -> List[float]:
 
 _risk_model_cache = {"model": None, "trained_at": None}
 
-def _get_customer_stats(invoices: List[Invoice]):
-    """Build per-customer payment stats from historical data."""
-    stats = {}
-    TERMS_DAYS = {"Due on Receipt": 0, "Net 15": 15, "Net 30": 30,
-                  "Net 45": 45, "Net 60": 60,
-                  "Due end of the month": 30, "Due end of next month": 60}
-    for inv in invoices:
-        if inv.invoice_status != "paid" or not inv.date_paid:
-            continue
-        cid = inv.customer_id
-        due = inv.invoice_due_date
-        paid = inv.date_paid.date() if inv.date_paid else inv.date_issued
-        days_late = (paid - due).days  # negative = paid early
-        if cid not in stats:
-            stats[cid] = {"days_late": [], "count": 0}
-        stats[cid]["days_late"].append(days_late)
-        stats[cid]["count"] += 1
-    result = {}
-    for cid, s in stats.items():
-        dl = s["days_late"]
-        result[cid] = {
-            "avg_days_late":  sum(dl) / len(dl),
-            "late_rate":      sum(1 for d in dl if d > 0) / len(dl),
-            "invoice_count":  s["count"],
-        }
-    return result
+def _get_customer_stats(session: Session):
+    """Per-customer payment stats, read from the incrementally maintained customer_payment_stats rows."""
+    ensure_customer_payment_stats(session)
+    rows = session.exec(
+        select(CustomerPaymentStats).where(CustomerPaymentStats.payment_count > 0)
+    ).all()
+    return {row.customer_id: payment_summary(row) for row in rows}
 
 def _build_features(inv: Invoice, cust_stats: dict) -> list:
     TERMS_DAYS = {"Due on Receipt": 0, "Net 15": 15, "Net 30": 30,
@@ -121,9 +105,10 @@ def _train_risk_model(session: Session):
     try:
         import numpy as np
         from xgboost import XGBClassifier
-        all_invoices = session.exec(select(Invoice)).all()
-        cust_stats = _get_customer_stats(all_invoices)
-        paid = [i for i in all_invoices if i.invoice_status == "paid" and i.date_paid]
+        cust_stats = _get_customer_stats(session)
+        paid = session.exec(
+            select(Invoice).where(Invoice.invoice_status == "paid", Invoice.date_paid.is_not(None))
+        ).all()
         if len(paid) < 20:
             return None
         X, y = [], []
@@ -249,29 +234,14 @@ def get_cashflow_forecast(session: Session = Depends(get_session)):
 
 @router.get("/aging")
 def get_aging_summary(session: Session = Depends(get_session)):
-    """AR aging buckets for outstanding invoices."""
-    today = date.today()
-    buckets = {"current": 0.0, "1_30": 0.0, "31_60": 0.0, "61_90": 0.0, "over_90": 0.0}
-    counts  = {"current": 0,   "1_30": 0,   "31_60": 0,   "61_90": 0,   "over_90": 0}
-
-    outstanding = session.exec(
-        select(Invoice).where(Invoice.invoice_status.in_(["submitted", "sent", "overdue"]))
-    ).all()
-
-    for inv in outstanding:
-        days = (today - inv.invoice_due_date).days
-        if days <= 0:
-            b = "current"
-        elif days <= 30:
-            b = "1_30"
-        elif days <= 60:
-            b = "31_60"
-        elif days <= 90:
-            b = "61_90"
-        else:
-            b = "over_90"
-        buckets[b] += inv.invoice_total
-        counts[b]  += 1
+    """AR aging buckets for outstanding invoices (one grouped CASE query, no invoice rows loaded)."""
+    totals = aging_totals(
+        session, date.today(),
+        [("current", 0), ("1_30", 30), ("31_60", 60), ("61_90", 90)], "over_90",
+        Invoice.invoice_status.in_(["submitted", "sent", "overdue"])
+    )
+    buckets = {key: bucket["amount"] for key, bucket in totals.items()}
+    counts  = {key: bucket["count"]  for key, bucket in totals.items()}
 
     total = sum(buckets.values())
     return {
@@ -283,36 +253,48 @@ def get_aging_summary(session: Session = Depends(get_session)):
             {"label": "90+ days",  "key": "over_90", "amount": round(buckets["over_90"], 2), "count": counts["over_90"]},
         ],
         "total_outstanding": round(total, 2),
-        "total_invoices": len(outstanding),
+        "total_invoices": sum(counts.values()),
     }
 
 
 # ── AI Insights ────────────────────────────────────────────────────────────────
 
 @router.get("/insights")
-async def get_ai_insights(session: Session = Depends(get_session)):
+async def get_ai_insights(session: AsyncSession = Depends(get_async_session)):
     """Claude-generated narrative analysis of the business financials."""
-    from anthropic import Anthropic
+    from anthropic import AsyncAnthropic
 
     # Gather key metrics
     today = date.today()
     three_months_ago = today - timedelta(days=90)
     six_months_ago   = today - timedelta(days=180)
 
-    all_invoices = session.exec(select(Invoice)).all()
-    paid = [i for i in all_invoices if i.invoice_status == "paid"]
-    outstanding = [i for i in all_invoices if i.invoice_status in ("submitted", "sent", "overdue")]
-    overdue = [i for i in all_invoices if i.invoice_status == "overdue" or
-               (i.invoice_status in ("submitted", "sent") and i.invoice_due_date < today)]
+    # One conditional-aggregation query instead of loading every invoice
+    paid_on = func.coalesce(func.date(Invoice.date_paid), Invoice.date_issued)
+    is_paid = Invoice.invoice_status == "paid"
+    is_outstanding = Invoice.invoice_status.in_(("submitted", "sent", "overdue"))
+    is_overdue = (Invoice.invoice_status == "overdue") | (
+        Invoice.invoice_status.in_(("submitted", "sent")) & (Invoice.invoice_due_date < today)
+    )
+
+    def total_where(condition):
+        return func.coalesce(func.sum(case((condition, Invoice.invoice_total), else_=0.0)), 0.0)
+
+    def count_where(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
 
-    recent_revenue = sum(i.invoice_total for i in paid
-                         if (i.date_paid.date() if i.date_paid else i.date_issued) >= three_months_ago)
-    prev_revenue   = sum(i.invoice_total for i in paid
-                         if three_months_ago > (i.date_paid.date() if i.date_paid else i.date_issued) >= six_months_ago)
+    metrics = (await session.exec(select(
+        total_where(is_paid & (paid_on >= three_months_ago)),
+        total_where(is_paid & (paid_on < three_months_ago) & (paid_on >= six_months_ago)),
+        total_where(is_outstanding),
+        count_where(is_outstanding),
+        total_where(is_overdue),
+        count_where(is_overdue),
+        func.count(Invoice.id),
+    ))).one()
+    recent_revenue, prev_revenue, total_outstanding, outstanding_count, total_overdue, overdue_count, invoice_count = metrics
 
     growth = ((recent_revenue - prev_revenue) / prev_revenue * 100) if prev_revenue else 0
-    total_outstanding = sum(i.invoice_total for i in outstanding)
-    total_overdue     = sum(i.invoice_total for i in overdue)
 
     prompt = f"""You are a financial analyst for a small business using SmartInvoice.
 Analyze these metrics and give 3-4 sentences of sharp, actionable insights.
@@ -322,22 +304,22 @@ Key metrics:
 - Revenue last 3 months: ${recent_revenue:,.0f}
 - Revenue 3-6 months ago: ${prev_revenue:,.0f}
 - Revenue growth: {growth:+.1f}%
-- Total outstanding AR: ${total_outstanding:,.0f} ({len(outstanding)} invoices)
-- Overdue AR: ${total_overdue:,.0f} ({len(overdue)} invoices)
-- Total invoices: {len(all_invoices)}
+- Total outstanding AR: ${total_outstanding:,.0f} ({outstanding_count} invoices)
+- Overdue AR: ${total_overdue:,.0f} ({overdue_count} invoices)
+- Total invoices: {invoice_count}
 
 Write 3-4 actionable sentences. No bullet points. No headers. Just clear analysis."""
 
     try:
-        client = Anthropic()
-        response = client.messages.create(
+        client = AsyncAnthropic()
+        response = await client.messages.create(
             model="claude-haiku-4-5-20251001",
             max_tokens=200,
             messages=[{"role": "user", "content": prompt}]
         )
         insight_text = response.content[0].text
     except Exception:
-        insight_text = f"Revenue grew {growth:+.1f}% over the last quarter (${recent_revenue:,.0f} vs ${prev_revenue:,.0f}). You have ${total_outstanding:,.0f} in outstanding receivables across {len(outstanding)} invoices, with ${total_overdue:,.0f} overdue."
+        insight_text = f"Revenue grew {growth:+.1f}% over the last quarter (${recent_revenue:,.0f} vs ${prev_revenue:,.0f}). You have ${total_outstanding:,.0f} in outstanding receivables across {outstanding_count} invoices, with ${total_overdue:,.0f} overdue."
 
     return {
         "insights": insight_text,
@@ -347,7 +329,7 @@ Write 3-4 actionable sentences. No bullet points. No headers. Just clear analysi
             "growth_pct":     round(growth, 1),
             "total_outstanding": round(total_outstanding, 2),
             "total_overdue":  round(total_overdue, 2),
-            "overdue_count":  len(overdue),
+            "overdue_count":  overdue_count,
         }
     }
 
@@ -10,8 +10,10 @@ import psutil
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, text
-from database import get_session
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_async_session
 
 
 router = APIRouter(tags=["Health & Monitoring"])
@@ -33,7 +35,7 @@ async def health_check():
 
 
 @router.get("/health/detailed")
-async def detailed_health_check(session: Session = Depends(get_session)):
+async def detailed_health_check(session: AsyncSession = Depends(get_async_session)):
     """
     Detailed health check with database connectivity and system metrics.
     
@@ -53,7 +55,7 @@ async def detailed_health_check(session: Session = Depends(get_session)):
     # Database connectivity check
     try:
         start_time = time.time()
-        result = session.exec(text("SELECT 1")).first()
+        result = (await session.exec(text("SELECT 1"))).first()
         db_response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
         
         health_status["checks"]["database"] = {
@@ -71,16 +73,18 @@ async def detailed_health_check(session: Session = Depends(get_session)):
     
     # System resource usage
     try:
+        # cpu_percent(interval=1) sleeps for the interval; keep it off the event loop
+        cpu_usage = await run_in_threadpool(psutil.cpu_percent, interval=1)
         health_status["checks"]["system_resources"] = {
             "status": "healthy",
-            "cpu_usage_percent": psutil.cpu_percent(interval=1),
+            "cpu_usage_percent": cpu_usage,
             "memory_usage_percent": psutil.virtual_memory().percent,
             "disk_usage_percent": psutil.disk_usage('/').percent,
             "details": "System resources within normal limits"
         }
         
         # Mark as unhealthy if resources are critically high
-        if (psutil.cpu_percent() > 90 or 
+        if (cpu_usage > 90 or 
             psutil.virtual_memory().percent > 90 or 
             psutil.disk_usage('/').percent > 95):
             health_status["checks"]["system_resources"]["status"] = "unhealthy"
@@ -99,9 +103,9 @@ async def detailed_health_check(session: Session = Depends(get_session)):
         start_time = time.time()
         from models import Invoice, Customer, Product
         
-        invoice_count = len(session.exec(text("SELECT id FROM invoice LIMIT 1")).all())
-        customer_count = len(session.exec(text("SELECT customer_id FROM customer LIMIT 1")).all())
-        product_count = len(session.exec(text("SELECT product_id FROM product LIMIT 1")).all())
+        invoice_count = len((await session.exec(text("SELECT id FROM invoice LIMIT 1"))).all())
+        customer_count = len((await session.exec(text("SELECT customer_id FROM customer LIMIT 1"))).all())
+        product_count = len((await session.exec(text("SELECT product_id FROM product LIMIT 1"))).all())
         
         app_response_time = (time.time() - start_time) * 1000
         
@@ -127,7 +131,7 @@ async def detailed_health_check(session: Session = Depends(get_session)):
 
 
 @router.get("/health/database")
-async def database_health_check(session: Session = Depends(get_session)):
+async def database_health_check(session: AsyncSession = Depends(get_async_session)):
     """
     Focused database health check with connection pooling information.
     """
@@ -135,17 +139,17 @@ async def database_health_check(session: Session = Depends(get_session)):
         start_time = time.time()
         
         # Test basic connectivity
-        basic_query = session.exec(text("SELECT 1 as test")).first()
+        basic_query = (await session.exec(text("SELECT 1 as test"))).first()
         basic_response_time = (time.time() - start_time) * 1000
         
         # Test table access
         start_time = time.time()
-        table_query = session.exec(text("SELECT COUNT(*) FROM invoice")).first()
+        table_query = (await session.exec(text("SELECT COUNT(*) FROM invoice"))).first()
         table_response_time = (time.time() - start_time) * 1000
         
         # Get database version/info
         try:
-            version_query = session.exec(text("SELECT sqlite_version()")).first()
+            version_query = (await session.exec(text("SELECT sqlite_version()"))).first()
             db_version = version_query[0] if version_query else "unknown"
         except:
             db_version = "unknown"
@@ -177,7 +181,7 @@ async def database_health_check(session: Session = Depends(get_session)):
 
 
 @router.get("/metrics")
-async def get_metrics(session: Session = Depends(get_session)):
+async def get_metrics(session: AsyncSession = Depends(get_async_session)):
     """
     Application metrics endpoint for monitoring systems.
     
@@ -190,21 +194,21 @@ async def get_metrics(session: Session = Depends(get_session)):
         from models import Invoice, Customer, Product
         
         # Invoice metrics
-        total_invoices = session.exec(text("SELECT COUNT(*) FROM invoice")).first()[0]
-        draft_invoices = session.exec(text("SELECT COUNT(*) FROM invoice WHERE invoice_status = 'draft'")).first()[0]
-        submitted_invoices = session.exec(text("SELECT COUNT(*) FROM invoice WHERE invoice_status = 'submitted'")).first()[0]
+        total_invoices = (await session.exec(text("SELECT COUNT(*) FROM invoice"))).first()[0]
+        draft_invoices = (await session.exec(text("SELECT COUNT(*) FROM invoice WHERE invoice_status = 'draft'"))).first()[0]
+        submitted_invoices = (await session.exec(text("SELECT COUNT(*) FROM invoice WHERE invoice_status = 'submitted'"))).first()[0]
         
         # Customer metrics
-        total_customers = session.exec(text("SELECT COUNT(*) FROM customer")).first()[0]
+        total_customers = (await session.exec(text("SELECT COUNT(*) FROM customer"))).first()[0]
         
         # Product metrics
-        total_products = session.exec(text("SELECT COUNT(*) FROM product")).first()[0]
+        total_products = (await session.exec(text("SELECT COUNT(*) FROM product"))).first()[0]
         
         # Recent activity (last 7 days)
         seven_days_ago = (datetime.utcnow() - timedelta(days=7)).strftime('%Y-%m-%d')
-        recent_invoices = session.exec(
+        recent_invoices = (await session.exec(
             text(f"SELECT COUNT(*) FROM invoice WHERE date_issued >= '{seven_days_ago}'")
-        ).first()[0]
+        )).first()[0]
         
         # Performance metrics
         query_time = (time.time() - start_time) * 1000
@@ -228,7 +232,7 @@ async def get_metrics(session: Session = Depends(get_session)):
             "performance_metrics": {
                 "query_response_time_ms": round(query_time, 2),
                 "system_uptime_hours": round((time.time() - psutil.boot_time()) / 3600, 2) if hasattr(psutil, 'boot_time') else None,
-                "cpu_usage_percent": psutil.cpu_percent(interval=0.1),
+                "cpu_usage_percent": await run_in_threadpool(psutil.cpu_percent, interval=0.1),
                 "memory_usage_percent": psutil.virtual_memory().percent
             }
         }
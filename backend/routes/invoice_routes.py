@@ -1,12 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select, func
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+from sqlalchemy import insert, update
 from sqlalchemy.orm import selectinload, joinedload
 from database import get_session, engine
-from typing import List
-from datetime import date, timedelta
-from models import Invoice, LineItem, Customer, Product
-from api import CustomerMinimalResponse, InvoiceRequest, InvoiceMinimalResponse, LineItemMinimalResponse, LineItemRequest, ProductMinimalResponse
-from routes.accounting_routes import post_journal_entry
+from typing import List, NamedTuple, Optional, Tuple
+from datetime import date, datetime, timedelta
+from models import DeletedInvoice, Invoice, LineItem, Customer, Product
+from api import (
+    BulkInvoiceCreated, BulkInvoiceError, BulkInvoiceRequest, BulkInvoiceResponse,
+    BulkStatusRequest, BulkStatusResponse,
+    CustomerMinimalResponse, InvoiceRequest, InvoiceMinimalResponse, LineItemMinimalResponse,
+    LineItemRequest, ProductMinimalResponse,
+)
+from routes.accounting_routes import post_journal_entry, post_journal_entries_bulk
+from services.invoice_reader import (
+    decode_cursor, dumps, encode_cursor, fetch_invoice, fetch_invoices, invoice_list_statement,
+)
+from services.customer_payment_stats import record_payment_changes
+from services.report_cache import report_cache
+from services.revenue_rollup import record_invoice_changes
 
 router = APIRouter()
 
@@ -41,6 +55,114 @@ def calculate_due_date(date_issued: date, terms: str) -> date:
 
 
 
+INVOICE_STATUSES = {"draft", "submitted", "sent", "paid", "overdue", "cancelled"}
+
+# Timestamp column stamped when an invoice moves into a status
+STATUS_TIMESTAMP_FIELDS = {
+    "submitted": "date_submitted",
+    "sent": "date_sent",
+    "paid": "date_paid",
+    "cancelled": "date_cancelled",
+}
+
+
+#Invoice fields the derived tables (revenue_rollup, customer_payment_stats) depend on
+class _InvoiceSnapshot(NamedTuple):
+    customer_id: int
+    date_issued: date
+    invoice_status: str
+    invoice_total: float
+    invoice_due_date: date
+    date_paid: Optional[datetime]
+
+
+def _snapshot(invoice, **overrides) -> _InvoiceSnapshot:
+    """Snapshot an Invoice, result row or insert dict (missing fields → None)."""
+    get = invoice.get if isinstance(invoice, dict) else lambda field: getattr(invoice, field, None)
+    values = {field: get(field) for field in _InvoiceSnapshot._fields}
+    values.update(overrides)
+    return _InvoiceSnapshot(**values)
+
+
+def _record_invoice_changes(session: Session, changes) -> None:
+    """Apply (before, after) snapshots to the derived tables in the current transaction."""
+    record_invoice_changes(session, [
+        tuple(None if s is None else (s.date_issued, s.invoice_status, s.invoice_total) for s in change)
+        for change in changes
+    ])
+    record_payment_changes(session, [
+        tuple(None if s is None else (s.customer_id, s.invoice_status, s.invoice_due_date, s.date_paid) for s in change)
+        for change in changes
+    ])
+
+
+#Journal entry (post_journal_entry kwargs) for a status transition, if it posts one
+def _status_journal_entry(invoice_id: int, amount: float, date_issued: date, new_status: str):
+    if new_status == "submitted":
+        return dict(
+            entry_date=date_issued,
+            description=f"AR Invoice #{invoice_id} submitted",
+            reference_type="ar_invoice", reference_id=invoice_id,
+            lines=[
+                {"account_code": "1100", "debit": amount, "credit": 0.0, "description": "Accounts Receivable"},
+                {"account_code": "4000", "debit": 0.0, "credit": amount, "description": "Revenue"},
+            ]
+        )
+    if new_status == "paid":
+        return dict(
+            entry_date=date.today(),
+            description=f"AR Invoice #{invoice_id} paid",
+            reference_type="ar_payment", reference_id=invoice_id,
+            lines=[
+                {"account_code": "1000", "debit": amount, "credit": 0.0, "description": "Cash received"},
+                {"account_code": "1100", "debit": 0.0, "credit": amount, "description": "Accounts Receivable cleared"},
+            ]
+        )
+    return None
+
+
+#Resolve product prices for a set of ids with a single IN query
+def _product_prices(session: Session, product_ids) -> dict:
+    if not product_ids:
+        return {}
+    return dict(session.exec(
+        select(Product.product_id, Product.product_price).where(Product.product_id.in_(product_ids))
+    ).all())
+
+
+#Apply requested line items as a diff against the invoice's current lines
+def _apply_line_item_diff(invoice_db: Invoice, requested: List[LineItemRequest], prices: dict) -> None:
+    """
+    Lines are matched to existing ones by product (in order, so repeated
+    products pair up one-to-one). Matched lines are only touched when their
+    quantity or total changed; unmatched requested lines are inserted and
+    leftover existing lines are deleted via delete-orphan.
+    """
+    existing_by_product = {}
+    for item in invoice_db.line_items:
+        existing_by_product.setdefault(item.product_id, []).append(item)
+
+    for item_data in requested:
+        line_total = item_data.lineitem_qty * prices[item_data.product_id]
+        matches = existing_by_product.get(item_data.product_id)
+        if matches:
+            item = matches.pop(0)
+            if item.lineitem_qty != item_data.lineitem_qty:
+                item.lineitem_qty = item_data.lineitem_qty
+            if item.lineitem_total != line_total:
+                item.lineitem_total = line_total
+        else:
+            invoice_db.line_items.append(LineItem(
+                product_id=item_data.product_id,
+                lineitem_qty=item_data.lineitem_qty,
+                lineitem_total=line_total
+            ))
+
+    for leftovers in existing_by_product.values():
+        for item in leftovers:
+            invoice_db.line_items.remove(item)
+
+
 #Post: Create a new invoice
 @router.post("/invoice", response_model=InvoiceMinimalResponse)
 def create_invoice(invoice_data: InvoiceRequest, session: Session = Depends(get_session)):
@@ -83,7 +205,9 @@ def create_invoice(invoice_data: InvoiceRequest, session: Session = Depends(get_
     )
 
     session.add(invoice)
+    _record_invoice_changes(session, [(None, _snapshot(invoice))])
     session.commit()
+    report_cache.bump_version()
     session.refresh(invoice)
 
     return InvoiceMinimalResponse(
@@ -120,125 +244,251 @@ def create_invoice(invoice_data: InvoiceRequest, session: Session = Depends(get_
 
 
 
-#Get: Retrieve all invoices (optimized with eager loading to fix N+1 issues)
-@router.get("/invoices", response_model=List[InvoiceMinimalResponse])
-def get_all_invoices(session: Session = Depends(get_session)):
+#Post: Create many invoices in one transaction
+BULK_INVOICE_MAX = int(os.getenv("BULK_INVOICE_MAX", 1000))
+
+
+@router.post("/invoices/bulk", response_model=BulkInvoiceResponse)
+def create_invoices_bulk(payload: BulkInvoiceRequest, session: Session = Depends(get_session)):
     """
-    Retrieve all invoices with optimized query to prevent N+1 issues.
+    Create a batch of draft invoices (month-end billing runs).
 
-    Uses selectinload for one-to-many relationships (line_items) and
-    joinedload for many-to-one relationships (customer, product).
+    Customers and products are resolved with one IN query each, totals are
+    computed in memory, and invoice / line item rows are written with
+    executemany inserts inside a single transaction. Invoices that reference a
+    missing customer or product are reported in `errors` by their position in
+    the request; the rest of the batch is still created.
     """
-    # Optimized query with eager loading for all relationships
-    statement = (
-        select(Invoice)
-        .options(
-            # Load customer data with joinedload (many-to-one)
-            joinedload(Invoice.customer),
-            # Load line items with selectinload (one-to-many)
-            selectinload(Invoice.line_items).joinedload(LineItem.product)
-        )
+    requests = payload.invoices
+    if len(requests) > BULK_INVOICE_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_INVOICE_MAX} invoices per bulk request")
+
+    customer_ids = {req.customer_id for req in requests}
+    product_ids = {item.product_id for req in requests for item in req.line_items}
+
+    known_customers = set(session.exec(
+        select(Customer.customer_id).where(Customer.customer_id.in_(customer_ids))
+    ).all())
+    prices = _product_prices(session, product_ids)
+
+    errors = []
+    valid = []   # (request index, invoice row, [line item rows])
+    for index, req in enumerate(requests):
+        if req.customer_id not in known_customers:
+            errors.append(BulkInvoiceError(index=index, detail=f"Customer {req.customer_id} not found"))
+            continue
+        missing = [item.product_id for item in req.line_items if item.product_id not in prices]
+        if missing:
+            errors.append(BulkInvoiceError(index=index, detail=f"Product {missing[0]} not found"))
+            continue
+
+        line_rows = []
+        total_amount = 0.0
+        for item in req.line_items:
+            line_total = item.lineitem_qty * prices[item.product_id]
+            total_amount += line_total
+            line_rows.append({
+                "product_id": item.product_id,
+                "lineitem_qty": item.lineitem_qty,
+                "lineitem_total": line_total,
+            })
+
+        valid.append((index, {
+            "customer_id": req.customer_id,
+            "date_issued": req.date_issued,
+            "invoice_terms": req.invoice_terms,
+            "invoice_due_date": calculate_due_date(req.date_issued, req.invoice_terms),
+            "invoice_total": total_amount,
+            "invoice_status": "draft",
+        }, line_rows))
+
+    created = []
+    if valid:
+        invoice_ids = session.execute(
+            insert(Invoice).returning(Invoice.id, sort_by_parameter_order=True),
+            [invoice_row for _, invoice_row, _ in valid],
+        ).scalars().all()
+
+        line_item_rows = [
+            {**line_row, "invoice_id": invoice_id}
+            for invoice_id, (_, _, line_rows) in zip(invoice_ids, valid)
+            for line_row in line_rows
+        ]
+        if line_item_rows:
+            session.execute(insert(LineItem), line_item_rows)
+        _record_invoice_changes(session, [(None, _snapshot(row)) for _, row, _ in valid])
+        session.commit()
+        report_cache.bump_version()
+
+        created = [
+            BulkInvoiceCreated(index=index, id=invoice_id, invoice_total=invoice_row["invoice_total"])
+            for invoice_id, (index, invoice_row, _) in zip(invoice_ids, valid)
+        ]
+
+    return BulkInvoiceResponse(
+        created=len(created),
+        failed=len(errors),
+        invoices=created,
+        errors=errors,
+    )
+
+
+#Post: Move many invoices to a new status in one transaction
+@router.post("/invoices/status", response_model=BulkStatusResponse)
+def update_invoice_status_bulk(payload: BulkStatusRequest, session: Session = Depends(get_session)):
+    """
+    Bulk status transition (e.g. marking a bank deposit's invoices paid).
+
+    Locks the target rows, updates status and the matching status timestamp
+    with one UPDATE, and posts every resulting AR / cash journal entry
+    through post_journal_entries_bulk — one set-based idempotency check and
+    batched inserts — before a single commit.
+    """
+    new_status = payload.invoice_status
+    if new_status not in INVOICE_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid invoice status '{new_status}'")
+
+    requested_ids = list(dict.fromkeys(payload.invoice_ids))
+    if len(requested_ids) > BULK_INVOICE_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_INVOICE_MAX} invoices per bulk request")
+
+    rows = session.exec(
+        select(Invoice.id, Invoice.customer_id, Invoice.invoice_status, Invoice.invoice_total,
+               Invoice.date_issued, Invoice.invoice_due_date, Invoice.date_paid)
+        .where(Invoice.id.in_(requested_ids))
+        .with_for_update()
+    ).all()
+    found = {row.id: row for row in rows}
+
+    changed = [row for row in rows if row.invoice_status != new_status]
+    changed_ids = [row.id for row in changed]
+
+    posted = 0
+    if changed_ids:
+        values = {"invoice_status": new_status}
+        if new_status in STATUS_TIMESTAMP_FIELDS:
+            values[STATUS_TIMESTAMP_FIELDS[new_status]] = datetime.utcnow()
+        session.execute(update(Invoice).where(Invoice.id.in_(changed_ids)).values(**values))
+
+        entries = [
+            _status_journal_entry(row.id, row.invoice_total, row.date_issued, new_status)
+            for row in changed
+        ]
+        posted = post_journal_entries_bulk(session, [e for e in entries if e])
+        _record_invoice_changes(session, [
+            (_snapshot(row), _snapshot(row, invoice_status=new_status,
+                                       date_paid=values.get("date_paid", row.date_paid)))
+            for row in changed
+        ])
+        session.commit()
+        report_cache.bump_version()
+
+    return BulkStatusResponse(
+        invoice_status=new_status,
+        updated=changed_ids,
+        unchanged=[row.id for row in rows if row.invoice_status == new_status],
+        not_found=[invoice_id for invoice_id in requested_ids if invoice_id not in found],
+        journal_entries_posted=posted,
     )
 
-    invoices = session.exec(statement).unique().all()
-
-    if not invoices:
-        raise HTTPException(status_code=404, detail="No invoices found")
-
-    return [
-        InvoiceMinimalResponse(
-            id=inv.id,
-            customer_id=inv.customer_id,
-            customer=CustomerMinimalResponse(
-                customer_id=inv.customer.customer_id,
-                customer_name=inv.customer.customer_name,
-                customer_address=inv.customer.customer_address,
-                customer_phone=inv.customer.customer_phone,
-                customer_email=inv.customer.customer_email
-            ),
-            date_issued=inv.date_issued,
-            invoice_due_date=inv.invoice_due_date,
-            invoice_terms=inv.invoice_terms,
-            invoice_status=inv.invoice_status,
-            invoice_total=inv.invoice_total,
-            line_items=[
-                LineItemMinimalResponse(
-                    lineitem_id=item.lineitem_id,
-                    product_id=item.product_id,
-                    product=ProductMinimalResponse(
-                        product_id=item.product.product_id,
-                        product_description=item.product.product_description,
-                        product_price=item.product.product_price
-                    ) if item.product else None,
-                    lineitem_qty=item.lineitem_qty,
-                    lineitem_total=item.lineitem_total
+
+#Keyset pagination helpers — cursors encode the (date_issued, id) of the last row served
+INVOICE_PAGE_MAX = 1000
+INVOICE_STREAM_CHUNK_SIZE = int(os.getenv("INVOICE_STREAM_CHUNK_SIZE", 500))
+
+
+def _decode_cursor(cursor: str) -> Tuple[date, int]:
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+#Get: Retrieve all invoices (column projection, no ORM hydration)
+@router.get("/invoices", response_model=List[InvoiceMinimalResponse])
+def get_all_invoices(
+    limit: Optional[int] = Query(None, ge=1, le=INVOICE_PAGE_MAX, description="Page size; omit to return every invoice"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+    status: Optional[str] = Query(None, description="Filter by invoice status"),
+    customer_id: Optional[int] = Query(None, description="Filter by customer ID"),
+    session: Session = Depends(get_session)
+):
+    """
+    Retrieve invoices via the projection read path: one query for invoice +
+    customer columns, one for line items + product columns, serialized
+    straight from row tuples.
+
+    Pass `limit` (and then `cursor`) for keyset pagination: the body stays a
+    plain list and the cursor for the next page is returned in the
+    X-Next-Cursor header (absent on the last page).
+    """
+    if limit is None and cursor is None:
+        invoices = fetch_invoices(session, invoice_list_statement(status=status, customer_id=customer_id))
+        if not invoices:
+            raise HTTPException(status_code=404, detail="No invoices found")
+        return Response(content=dumps(invoices), media_type="application/json")
+
+    page_size = limit or INVOICE_STREAM_CHUNK_SIZE
+    after = _decode_cursor(cursor) if cursor else None
+    # Fetch one extra row to learn whether another page exists
+    invoices = fetch_invoices(session, invoice_list_statement(page_size + 1, after, status, customer_id))
+
+    headers = {}
+    if len(invoices) > page_size:
+        invoices = invoices[:page_size]
+        last = invoices[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last["date_issued"], last["id"])
+
+    return Response(content=dumps(invoices), media_type="application/json", headers=headers)
+
+
+#Get: Stream every invoice as NDJSON in fixed-size keyset chunks
+@router.get("/invoices/stream")
+def stream_invoices(
+    status: Optional[str] = Query(None, description="Filter by invoice status"),
+    customer_id: Optional[int] = Query(None, description="Filter by customer ID"),
+    chunk_size: int = Query(INVOICE_STREAM_CHUNK_SIZE, ge=1, le=INVOICE_PAGE_MAX),
+):
+    """
+    Stream all invoices, one JSON object per line.
+
+    Only one chunk of rows is alive at a time, so worker memory stays flat
+    regardless of table size. The generator owns its session because the
+    request-scoped one is closed before the body is sent.
+    """
+    def generate():
+        after = None
+        with Session(engine) as stream_session:
+            while True:
+                invoices = fetch_invoices(
+                    stream_session, invoice_list_statement(chunk_size, after, status, customer_id)
                 )
-                for item in inv.line_items
-            ]
-        )
-        for inv in invoices
-    ]
+                if not invoices:
+                    break
+                yield b"".join(dumps(inv) + b"\n" for inv in invoices)
+                if len(invoices) < chunk_size:
+                    break
+                after = (invoices[-1]["date_issued"], invoices[-1]["id"])
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 
-#Get: Retrieve a specific invoice by ID (optimized with eager loading)
+#Get: Retrieve a specific invoice by ID (column projection, no ORM hydration)
 @router.get("/invoice/{invoice_id}", response_model=InvoiceMinimalResponse)
 def get_invoice(invoice_id: int, session: Session = Depends(get_session)):
     """
-    Retrieve a specific invoice with optimized query to prevent N+1 issues.
-
-    Loads customer and all line items with their product details in a single query.
+    Retrieve a specific invoice with its customer and line item products
+    using two column-projection queries.
     """
-    # Optimized query with eager loading
-    statement = (
-        select(Invoice)
-        .where(Invoice.id == invoice_id)
-        .options(
-            # Load customer data with joinedload (many-to-one)
-            joinedload(Invoice.customer),
-            # Load line items with selectinload (one-to-many)
-            selectinload(Invoice.line_items).joinedload(LineItem.product)
-        )
-    )
-
-    invoice = session.exec(statement).unique().first()
+    invoice = fetch_invoice(session, invoice_id)
 
     if not invoice:
-        max_id = session.exec(select(func.max(Invoice.id))).first() or 0
-        if invoice_id <= max_id:
+        if session.get(DeletedInvoice, invoice_id):
             raise HTTPException(status_code=404, detail=f"Invoice #{invoice_id} has been deleted")
         else:
             raise HTTPException(status_code=404, detail=f"Invoice #{invoice_id} does not exist")
 
-    return InvoiceMinimalResponse(
-        id=invoice.id,
-        customer_id=invoice.customer_id,
-        customer=CustomerMinimalResponse(
-            customer_id=invoice.customer.customer_id,
-            customer_name=invoice.customer.customer_name,
-            customer_address=invoice.customer.customer_address,
-            customer_phone=invoice.customer.customer_phone,
-            customer_email=invoice.customer.customer_email,
-        ),
-        date_issued=invoice.date_issued,
-        invoice_due_date=invoice.invoice_due_date,
-        invoice_terms=invoice.invoice_terms,
-        invoice_status=invoice.invoice_status,
-        invoice_total=invoice.invoice_total,
-        line_items=[
-            LineItemMinimalResponse(
-                lineitem_id=item.lineitem_id,
-                product_id=item.product_id,
-                product=ProductMinimalResponse(
-                    product_id=item.product.product_id,
-                    product_description=item.product.product_description,
-                    product_price=item.product.product_price
-                ) if item.product else None,
-                lineitem_qty=item.lineitem_qty,
-                lineitem_total=item.lineitem_total
-            )
-            for item in invoice.line_items
-        ]
-    )
+    return Response(content=dumps(invoice), media_type="application/json")
 
 
 
@@ -249,7 +499,11 @@ def delete_invoice(invoice_id: int, session: Session = Depends(get_session)):
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     session.delete(invoice)
+    _record_invoice_changes(session, [(_snapshot(invoice), None)])
+    # merge: SQLite can reuse the highest id, so a tombstone may already exist
+    session.merge(DeletedInvoice(invoice_id=invoice_id))
     session.commit()
+    report_cache.bump_version()
     return {"deleted": True, "id": invoice_id, "message": "Invoice deleted successfully"}
 
 #Put: Update a specific invoice by ID (optimized with eager loading)
@@ -281,9 +535,16 @@ def update_invoice(invoice_id: int, updated_invoice: InvoiceRequest, session: Se
         if not customer:
             raise HTTPException(status_code=404, detail="Customer not found")
 
+    # Resolve all referenced products before mutating anything
+    prices = _product_prices(session, {item.product_id for item in updated_invoice.line_items})
+    for item_data in updated_invoice.line_items:
+        if item_data.product_id not in prices:
+            raise HTTPException(status_code=404, detail=f"Product {item_data.product_id} not found")
+
     # Update invoice fields (matching actual Invoice model)
     old_status = invoice_db.invoice_status
     new_status = updated_invoice.invoice_status or "draft"
+    before = _snapshot(invoice_db)
 
     invoice_db.customer_id = updated_invoice.customer_id
     invoice_db.date_issued = updated_invoice.date_issued
@@ -291,53 +552,24 @@ def update_invoice(invoice_id: int, updated_invoice: InvoiceRequest, session: Se
     invoice_db.invoice_due_date = calculate_due_date(updated_invoice.date_issued, updated_invoice.invoice_terms)
     invoice_db.invoice_status = new_status
     invoice_db.invoice_total = updated_invoice.invoice_total
+    if old_status != new_status and new_status in STATUS_TIMESTAMP_FIELDS:
+        setattr(invoice_db, STATUS_TIMESTAMP_FIELDS[new_status], datetime.utcnow())
 
-    # Clear old line items and add new ones
-    invoice_db.line_items.clear()
-
-    for item_data in updated_invoice.line_items:
-        product = session.get(Product, item_data.product_id)
-        if not product:
-            raise HTTPException(status_code=404, detail=f"Product {item_data.product_id} not found")
-
-        line_total = item_data.lineitem_qty * product.product_price
-
-        new_item = LineItem(
-            product_id=item_data.product_id,
-            lineitem_qty=item_data.lineitem_qty,
-            lineitem_total=line_total
-        )
-        invoice_db.line_items.append(new_item)
+    # Update only the line items that changed (one batched product lookup)
+    _apply_line_item_diff(invoice_db, updated_invoice.line_items, prices)
 
     session.add(invoice_db)
+    _record_invoice_changes(session, [(before, _snapshot(invoice_db))])
     session.commit()
     session.refresh(invoice_db)
 
     # Auto-post journal entries on status transitions
-    amount = invoice_db.invoice_total
     if old_status != new_status:
-        if new_status == "submitted":
-            post_journal_entry(
-                session, invoice_db.date_issued,
-                f"AR Invoice #{invoice_id} submitted",
-                "ar_invoice", invoice_id,
-                [
-                    {"account_code": "1100", "debit": amount, "credit": 0.0, "description": "Accounts Receivable"},
-                    {"account_code": "4000", "debit": 0.0, "credit": amount, "description": "Revenue"},
-                ]
-            )
-            session.commit()
-        elif new_status == "paid":
-            post_journal_entry(
-                session, date.today(),
-                f"AR Invoice #{invoice_id} paid",
-                "ar_payment", invoice_id,
-                [
-                    {"account_code": "1000", "debit": amount, "credit": 0.0, "description": "Cash received"},
-                    {"account_code": "1100", "debit": 0.0, "credit": amount, "description": "Accounts Receivable cleared"},
-                ]
-            )
+        entry = _status_journal_entry(invoice_id, invoice_db.invoice_total, invoice_db.date_issued, new_status)
+        if entry:
+            post_journal_entry(session, **entry)
             session.commit()
+    report_cache.bump_version()
 
     # Reload with relationships to ensure we have fresh data including line item products
     statement = (
@@ -17,6 +17,8 @@ from sqlmodel import Session, select
 from database import get_session
 from models import BankAccount, Company, CategoryRule, ChartOfAccount, JournalEntry, JournalLine
 from routes.accounting_routes import apply_category_rules, CONFIDENCE_THRESHOLD
+from services.classification_memo import hit_rate, lookup_memos
+from services.transaction_knn import classify_knn
 
 import plaid
 from plaid.api import plaid_api
@@ -272,10 +274,13 @@ def fetch_transactions(
                 "bank_account_id": bank_account_id,
                 "gl_account_code": bank_account.gl_account_code,
                 "flagged_count": 0, "rule_matched_count": 0,
+                "memo_matched_count": 0, "memo_hit_rate": 0.0, "knn_matched_count": 0,
             }
 
-        # Apply category rules first
-        rule_matched, needs_claude = apply_category_rules(raw, session)
+        # Apply category rules first, then confirmed classifications for this account and their nearest neighbours
+        rule_matched, unmatched = apply_category_rules(raw, session, bank_account.company_id)
+        memo_matched, memo_missed = lookup_memos(session, unmatched, bank_account.gl_account_code)
+        knn_matched, needs_claude = classify_knn(session, memo_missed, bank_account.gl_account_code)
 
         claude_classified = []
         if needs_claude:
@@ -288,7 +293,7 @@ def fetch_transactions(
                 t.setdefault("confidence", 0.80)
                 t.setdefault("rule_matched", None)
 
-        classified = rule_matched + claude_classified
+        classified = rule_matched + memo_matched + knn_matched + claude_classified
         gl_code = bank_account.gl_account_code
         total_credits = sum(t.get("amount", 0) for t in classified if t.get("debit_account") == gl_code)
         total_debits = sum(t.get("amount", 0) for t in classified if t.get("credit_account") == gl_code)
@@ -303,6 +308,9 @@ def fetch_transactions(
             "gl_account_code": gl_code,
             "flagged_count": flagged,
             "rule_matched_count": len(rule_matched),
+            "memo_matched_count": len(memo_matched),
+            "memo_hit_rate": hit_rate(len(memo_matched), len(unmatched)),
+            "knn_matched_count": len(knn_matched),
         }
     except plaid.ApiException as e:
         raise HTTPException(status_code=400, detail=f"Plaid error: {e.body}")
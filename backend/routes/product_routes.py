@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select, update
 from database import get_session, engine
 from typing import List
 import models
 from models import Product
 from api import ProductRequest, ProductMinimalResponse
+from services.product_index import product_index
+from services.report_cache import report_cache
+from services.search_index import search_ids
 
 router = APIRouter()
 models.SQLModel.metadata.create_all(bind=engine)
@@ -23,6 +26,8 @@ def create_product(product: ProductRequest, session: Session = Depends(get_sessi
     product_db = Product.model_validate(product)
     session.add(product_db)
     session.commit()
+    product_index.invalidate()
+    report_cache.bump_version()
     session.refresh(product_db)
     return ProductMinimalResponse(
         **product_db.model_dump()
@@ -32,13 +37,38 @@ def create_product(product: ProductRequest, session: Session = Depends(get_sessi
 @router.get('/products', response_model=List[ProductMinimalResponse])
 def get_products(session: Session = Depends(get_session)):
     products = session.exec(select(Product)).all()
-    print("Session started for all products retrieval")
     return [
         ProductMinimalResponse(
             **product.model_dump()
         ) for product in products
     ]
 
+# Typeahead suggestions from the in-process prefix index (no DB round trip once built)
+@router.get('/products/suggest', response_model=List[ProductMinimalResponse])
+def suggest_products(
+    q: str = Query(..., min_length=1, description="Prefix of the description or of any word in it"),
+    limit: int = Query(10, ge=1, le=50),
+    session: Session = Depends(get_session)
+):
+    return product_index.suggest(session, q, limit)
+
+# Search products by description (prefix typeahead, best match first)
+@router.get('/products/search', response_model=List[ProductMinimalResponse])
+def search_products(
+    q: str = Query(..., min_length=1, description="Search text; each word is prefix-matched"),
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_session)
+):
+    ids = search_ids(session, "product", q, limit)
+    if not ids:
+        return []
+    by_id = {p.product_id: p for p in session.exec(select(Product).where(Product.product_id.in_(ids))).all()}
+    return [
+        ProductMinimalResponse(
+            **by_id[i].model_dump()
+        ) for i in ids if i in by_id
+    ]
+
 # update an existing product
 @router.put('/product/{product_id}', response_model=ProductMinimalResponse)
 def update_product(product_id: int, product: ProductRequest, session: Session = Depends(get_session)):
@@ -57,6 +87,8 @@ def update_product(product_id: int, product: ProductRequest, session: Session =
 
     session.add(product_db)
     session.commit()
+    product_index.invalidate()
+    report_cache.bump_version()
     session.refresh(product_db)
     return ProductMinimalResponse(
         **product_db.model_dump()
@@ -71,6 +103,8 @@ def delete_product(product_id: int, session: Session = Depends(get_session)):
 
     session.delete(product_db)
     session.commit()
+    product_index.invalidate()
+    report_cache.bump_version()
     return ProductMinimalResponse(
         **{"deleted": True, "id": product_id, "message": "Product deleted successfully"}
     )
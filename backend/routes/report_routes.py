@@ -1,20 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+from pydantic import BaseModel
 from sqlmodel import Session, select, func, and_, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date, datetime, timedelta
-from typing import Optional, List
-from database import get_session
+from typing import Any, Dict, Optional, List
+from database import get_async_session, get_async_engine, get_session
 from models import Invoice, Customer, Product, LineItem
+from services.invoice_reader import decode_cursor, dumps
+from services.report_cache import report_cache
+from services import report_jobs
 from services.report_service import ReportService
 import logging
+import os
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+REPORT_PAGE_MAX = 1000
+
+
+class ReportJobCreate(BaseModel):
+    report_type: str                      # invoices | aging | overdue
+    params: Dict[str, Any] = {}           # same filters as the matching GET report
+
 @router.get("/revenue-summary")
 async def get_revenue_summary(
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Get revenue summary dashboard data
@@ -28,6 +42,22 @@ async def get_revenue_summary(
         logger.error(f"Error generating revenue summary: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to generate revenue summary")
 
+@router.get("/dashboard")
+async def get_dashboard(
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Get summary statistics and revenue summary in a single response
+    Backed by one conditional-aggregation query and one trend query
+    """
+    try:
+        report_service = ReportService(session)
+        dashboard = await report_service.get_dashboard()
+        return dashboard
+    except Exception as e:
+        logger.error(f"Error generating dashboard: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to generate dashboard")
+
 @router.get("/invoices")
 async def get_all_invoices_report(
     start_date: Optional[date] = Query(None, description="Start date filter"),
@@ -38,11 +68,17 @@ async def get_all_invoices_report(
     max_amount: Optional[float] = Query(None, description="Maximum amount filter"),
     page: int = Query(1, description="Page number", ge=1),
     page_size: int = Query(50, description="Items per page", ge=1, le=100),
-    session: Session = Depends(get_session)
+    cursor: Optional[str] = Query(None, description="Keyset cursor from pagination.next_cursor (replaces page for deep pages; summary and totals are returned on the first page only)"),
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Get all invoices with filtering, pagination, and summary statistics
+    Summary totals cover every invoice matching the filters, not just the page
     """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         report_service = ReportService(session)
         result = await report_service.get_all_invoices_report(
@@ -53,7 +89,9 @@ async def get_all_invoices_report(
             min_amount=min_amount,
             max_amount=max_amount,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            after=after,
+            include_totals=after is None
         )
         return result
     except Exception as e:
@@ -63,7 +101,7 @@ async def get_all_invoices_report(
 @router.get("/customer/{customer_id}")
 async def get_customer_report(
     customer_id: int,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Get detailed report for a specific customer
@@ -80,7 +118,10 @@ async def get_customer_report(
 @router.get("/aging")
 async def get_invoice_aging_report(
     as_of_date: Optional[date] = Query(None, description="Aging calculation date (defaults to today)"),
-    session: Session = Depends(get_session)
+    include_invoices: bool = Query(True, description="Include the per-invoice detail list"),
+    page: Optional[int] = Query(None, description="Detail page number", ge=1),
+    page_size: Optional[int] = Query(None, description="Detail items per page (omit for all)", ge=1, le=REPORT_PAGE_MAX),
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Get invoice aging report with buckets: 0-15, 16-30, 31-60, 60+ days
@@ -91,15 +132,35 @@ async def get_invoice_aging_report(
         if not as_of_date:
             as_of_date = date.today()
         
-        result = await report_service.get_aging_report(as_of_date)
+        result = await report_service.get_aging_report(as_of_date, include_invoices, page, page_size)
         return result
     except Exception as e:
         logger.error(f"Error generating aging report: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to generate aging report")
 
+@router.get("/aging/stream")
+def stream_invoice_aging_report(
+    as_of_date: Optional[date] = Query(None, description="Aging calculation date (defaults to today)")
+):
+    """
+    Stream the aging report's per-invoice detail rows as NDJSON, oldest bucket last
+    """
+    as_of_date = as_of_date or date.today()
+
+    async def generate():
+        # The request-scoped session is closed before the body streams
+        async with AsyncSession(get_async_engine()) as stream_session:
+            async for row in ReportService(stream_session).iter_aging_invoices(as_of_date):
+                yield dumps(row) + b"\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @router.get("/overdue")
 async def get_overdue_invoices_report(
-    session: Session = Depends(get_session)
+    include_invoices: bool = Query(True, description="Include the per-invoice detail list"),
+    page: Optional[int] = Query(None, description="Detail page number", ge=1),
+    page_size: Optional[int] = Query(None, description="Detail items per page (omit for all)", ge=1, le=REPORT_PAGE_MAX),
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Get overdue invoices report showing all past-due invoices with action items
@@ -107,15 +168,79 @@ async def get_overdue_invoices_report(
     """
     try:
         report_service = ReportService(session)
-        result = await report_service.get_overdue_report()
+        result = await report_service.get_overdue_report(include_invoices, page, page_size)
         return result
     except Exception as e:
         logger.error(f"Error generating overdue report: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to generate overdue report")
 
+@router.get("/overdue/stream")
+def stream_overdue_invoices_report():
+    """
+    Stream the overdue report's per-invoice detail rows as NDJSON, oldest due date first
+    """
+    async def generate():
+        async with AsyncSession(get_async_engine()) as stream_session:
+            async for row in ReportService(stream_session).iter_overdue_invoices():
+                yield dumps(row) + b"\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.post("/jobs", status_code=202)
+def create_report_job(body: ReportJobCreate, session: Session = Depends(get_session)):
+    """
+    Queue a full report export (no pagination) to be built in the background
+    Poll GET /reports/jobs/{id} for progress; result_url is set once it completes
+    """
+    try:
+        job = report_jobs.create_job(session, body.report_type, body.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except report_jobs.ReportJobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return report_jobs.job_status(job)
+
+@router.get("/jobs/{job_id}")
+def get_report_job(job_id: str, session: Session = Depends(get_session)):
+    """
+    Report job status, progress (0-100) and, once completed, the result link
+    """
+    job = report_jobs.get_job(session, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return report_jobs.job_status(job)
+
+@router.get("/jobs/{job_id}/result")
+def get_report_job_result(job_id: str, session: Session = Depends(get_session)):
+    """
+    Download a completed job's JSON result
+    With S3 storage this redirects to a presigned URL (results can exceed Lambda's response limit)
+    """
+    job = report_jobs.get_job(session, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status}")
+
+    download_url = report_jobs.result_download_url(job)
+    if download_url:
+        return RedirectResponse(download_url)
+    path = report_jobs.result_path(job)
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Report result missing from storage")
+    return FileResponse(path, media_type="application/json", filename=f"{job.report_type}-report-{job.id}.json")
+
+@router.get("/cache/stats")
+def get_report_cache_stats():
+    """
+    Report cache statistics: totals, hit rate and per-entry hits/misses
+    Add ?refresh=true (or Cache-Control: no-cache) to any report to bypass the cache
+    """
+    return report_cache.stats()
+
 @router.get("/customers/list")
 async def get_customers_for_reports(
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Get list of customers for dropdown selection in reports
@@ -123,7 +248,7 @@ async def get_customers_for_reports(
     """
     try:
         statement = select(Customer.customer_id, Customer.customer_name, Customer.customer_email).order_by(Customer.customer_name)
-        customers = session.exec(statement).all()
+        customers = (await session.exec(statement)).all()
         
         return [
             {
@@ -139,7 +264,7 @@ async def get_customers_for_reports(
 
 @router.get("/summary-stats")
 async def get_summary_statistics(
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Get key summary statistics for the reports dashboard
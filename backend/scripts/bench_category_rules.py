@@ -0,0 +1,125 @@
+"""
+Benchmark: sequential category-rule loop vs the compiled rule engine.
+
+Generates RULES rules (contains / starts_with / exact / regex mix with
+random priorities) and TRANSACTIONS bank descriptions, then classifies:
+  - legacy   → the previous apply_category_rules loop: every rule per
+               transaction, re-lowercasing values and calling re.search on
+               uncompiled patterns (run on a LEGACY_SAMPLE subset and
+               extrapolated — the full run takes minutes)
+  - compiled → services.category_rules.RuleEngine: exact dict, prefix
+               table, Aho-Corasick automaton for contains, pre-compiled
+               regexes, same priority order
+Rule matches on the sample are checked to be identical. No database is
+needed.
+
+Run:
+    python scripts/bench_category_rules.py                 # 1,000 rules x 100k transactions
+    python scripts/bench_category_rules.py 2000 50000      # custom sizes
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import re
+import string
+import time
+
+from models import CategoryRule
+from services.category_rules import RuleEngine
+
+LEGACY_SAMPLE = 2_000
+PREFIXES = ["pos ", "ach ", "debit card ", "wire ", "check ", "online transfer ", ""]
+
+
+def word(rng) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+
+
+def make_rules(rng, n_rules: int):
+    vocabulary = [word(rng) for _ in range(n_rules)]
+    rules = []
+    for i, value in enumerate(vocabulary):
+        roll = rng.random()
+        if roll < 0.6:
+            match_type, match_value = "contains", value
+        elif roll < 0.8:
+            match_type, match_value = "starts_with", rng.choice(PREFIXES[:-1]) + value
+        elif roll < 0.95:
+            match_type, match_value = "exact", f"{value} {word(rng)}"
+        else:
+            match_type, match_value = "regex", rf"{value[:3]}\d+{value[3:]}"
+        rules.append(CategoryRule(
+            id=i + 1, name=f"Rule {i + 1}", match_type=match_type,
+            match_value=match_value if match_type == "regex" else match_value.upper(),
+            debit_account="5000", credit_account="1000", priority=rng.randint(1, 200),
+        ))
+    rules.sort(key=lambda rule: (rule.priority, rule.id))
+    return rules, vocabulary
+
+
+def make_transactions(rng, rules, vocabulary, n_transactions: int):
+    descriptions = []
+    for _ in range(n_transactions):
+        roll = rng.random()
+        if roll < 0.3:
+            rule = rng.choice(rules)
+            descriptions.append(rule.match_value if rule.match_type != "regex" else f"{word(rng)} {rule.match_value[:3]}42{rule.match_value[6:]}")
+        elif roll < 0.6:
+            descriptions.append(f"{rng.choice(PREFIXES)}{rng.choice(vocabulary)} #{rng.randint(1000, 9999)} {word(rng)}".upper())
+        else:
+            descriptions.append(f"{rng.choice(PREFIXES)}{word(rng)} {word(rng)} {rng.randint(1, 99)}".upper())
+    return descriptions
+
+
+def legacy_match(rules, description: str):
+    desc = description.lower()
+    for rule in rules:
+        val = rule.match_value.lower()
+        if rule.match_type == "contains" and val in desc:
+            return rule.name
+        elif rule.match_type == "starts_with" and desc.startswith(val):
+            return rule.name
+        elif rule.match_type == "exact" and desc == val:
+            return rule.name
+        elif rule.match_type == "regex":
+            if re.search(val, desc, re.IGNORECASE):
+                return rule.name
+    return None
+
+
+def main():
+    n_rules = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    n_transactions = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    rng = random.Random(42)
+    rules, vocabulary = make_rules(rng, n_rules)
+    descriptions = make_transactions(rng, rules, vocabulary, n_transactions)
+    sample = descriptions[:LEGACY_SAMPLE]
+    print(f"⏱️  {n_rules} rules x {n_transactions} transactions")
+
+    started = time.perf_counter()
+    legacy = [legacy_match(rules, d) for d in sample]
+    legacy_seconds = (time.perf_counter() - started) * len(descriptions) / len(sample)
+
+    started = time.perf_counter()
+    engine = RuleEngine(rules)
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    compiled = [engine.match(d) for d in descriptions]
+    compiled_seconds = time.perf_counter() - started
+
+    compiled_names = [hit.name if hit else None for hit in compiled[:LEGACY_SAMPLE]]
+    status = "✅ identical" if compiled_names == legacy else "❌ differ"
+    matched = sum(1 for hit in compiled if hit)
+
+    print(f"{'variant':>10} {'total (s)':>10} {'per txn (µs)':>13}")
+    print(f"{'legacy':>10} {legacy_seconds:>10.2f} {legacy_seconds / len(descriptions) * 1e6:>13.1f}   (extrapolated from {len(sample)})")
+    print(f"{'compiled':>10} {compiled_seconds:>10.2f} {compiled_seconds / len(descriptions) * 1e6:>13.1f}   (+{build_seconds * 1000:.0f} ms build)")
+    print(f"{matched} of {len(descriptions)} transactions matched a rule; sample matches {status}; "
+          f"speedup {legacy_seconds / compiled_seconds:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark: per-metric dashboard queries vs single-scan conditional aggregation.
+
+Seeds a throwaway SQLite database with N invoices spread over three years
+and compares one dashboard load (summary statistics + revenue summary):
+  - legacy → the previous ReportService queries: four summary COUNT/SUMs,
+             four revenue SUMs and one SUM per trend month over `invoice`
+  - single → ReportService.get_dashboard (on an aiosqlite AsyncSession):
+             one SUM(CASE ...) SELECT plus one grouped trend SELECT over
+             `revenue_rollup`
+Statements are counted with a before_cursor_execute listener.
+
+Run:
+    python scripts/bench_dashboard_queries.py            # 10k and 100k invoices
+    python scripts/bench_dashboard_queries.py 5000       # custom sizes
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, and_, create_engine, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import Customer, Invoice
+from services.report_service import ReportService
+from services.revenue_rollup import rebuild_revenue_rollup
+
+RUNS = 5
+TREND_MONTHS = 6
+
+
+def seed(engine, n_invoices: int):
+    rng = random.Random(42)
+    with Session(engine) as session:
+        session.execute(insert(Customer), [
+            {"customer_name": f"Customer {i}", "customer_address": f"{i} Main St",
+             "customer_phone": "5550000000", "customer_email": f"c{i}@example.com"}
+            for i in range(1, 501)
+        ])
+        start = date.today() - timedelta(days=3 * 365)
+        session.execute(insert(Invoice), [
+            {"customer_id": rng.randint(1, 500), "date_issued": start + timedelta(days=rng.randint(0, 3 * 365)),
+             "invoice_terms": "Net 30", "invoice_due_date": start,
+             "invoice_total": round(rng.uniform(50, 5000), 2),
+             "invoice_status": rng.choice(["draft", "submitted", "sent", "paid", "cancelled"])}
+            for _ in range(n_invoices)
+        ])
+        session.commit()
+        rebuild_revenue_rollup(session)
+
+
+def _month_range(year: int, month: int):
+    month_start = date(year, month, 1)
+    next_month = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return month_start, next_month - timedelta(days=1)
+
+
+def legacy_dashboard(session: Session) -> dict:
+    """The per-metric queries get_summary_statistics + get_revenue_summary used to issue"""
+    today = date.today()
+    not_cancelled = Invoice.invoice_status != 'cancelled'
+
+    def scalar(stmt):
+        return session.exec(stmt).first()
+
+    def month_sum(year, month, until=None):
+        month_start, month_end = _month_range(year, month)
+        return scalar(select(func.count(Invoice.id), func.coalesce(func.sum(Invoice.invoice_total), 0)).where(
+            and_(Invoice.date_issued >= month_start, Invoice.date_issued <= (until or month_end), not_cancelled)))
+
+    summary = {
+        "total_invoices": scalar(select(func.count(Invoice.id)).where(not_cancelled)),
+        "total_revenue": scalar(select(func.coalesce(func.sum(Invoice.invoice_total), 0)).where(not_cancelled)),
+        "outstanding_amount": scalar(select(func.coalesce(func.sum(Invoice.invoice_total), 0)).where(
+            Invoice.invoice_status.in_(['draft', 'sent']))),
+        "total_customers": scalar(select(func.count(Customer.customer_id))),
+    }
+    last = ReportService._last_month(today)
+    revenue = {
+        "current": month_sum(today.year, today.month, until=today),
+        "last": month_sum(last.year, last.month),
+        "paid": scalar(select(func.coalesce(func.sum(Invoice.invoice_total), 0)).where(Invoice.invoice_status == 'paid')),
+        "unpaid": scalar(select(func.coalesce(func.sum(Invoice.invoice_total), 0)).where(
+            Invoice.invoice_status.in_(['draft', 'sent']))),
+        "trend": [],
+    }
+    index = today.year * 12 + today.month - 1
+    for i in range(TREND_MONTHS - 1, -1, -1):
+        year, month = divmod(index - i, 12)
+        revenue["trend"].append(month_sum(year, month + 1))
+    return {"summary": summary, "revenue": revenue}
+
+
+def measure(fn, engine):
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    with Session(engine) as session:
+        fn(session)   # warm-up (rollup backfill check, statement cache)
+        event.listen(engine, "before_cursor_execute", count)
+        timings = []
+        for _ in range(RUNS):
+            started = time.perf_counter()
+            fn(session)
+            timings.append(time.perf_counter() - started)
+        event.remove(engine, "before_cursor_execute", count)
+    return min(timings), statements[0] // RUNS
+
+
+async def measure_single_scan(db_path: str):
+    """Same measurement for ReportService.get_dashboard over an async session"""
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    async with AsyncSession(async_engine) as session:
+        await ReportService(session).get_dashboard()   # warm-up
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+        timings = []
+        for _ in range(RUNS):
+            started = time.perf_counter()
+            await ReportService(session).get_dashboard()
+            timings.append(time.perf_counter() - started)
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    await async_engine.dispose()
+    return min(timings), statements[0] // RUNS
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'invoices':>10} {'legacy (ms)':>12} {'queries':>8} {'single (ms)':>12} {'queries':>8} {'speedup':>8}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'bench.db')
+            engine = create_engine(f"sqlite:///{db_path}")
+            SQLModel.metadata.create_all(engine)
+            seed(engine, n)
+            legacy, legacy_queries = measure(legacy_dashboard, engine)
+            single, single_queries = asyncio.run(measure_single_scan(db_path))
+            print(f"{n:>10} {legacy * 1000:>12.2f} {legacy_queries:>8} {single * 1000:>12.2f} "
+                  f"{single_queries:>8} {legacy / single:>7.1f}x")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
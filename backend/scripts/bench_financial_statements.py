@@ -0,0 +1,164 @@
+"""
+Benchmark: 12-month comparative income statement over a seeded ledger.
+
+Seeds a throwaway SQLite database with N journal lines (two per entry)
+spread over three years and times one 12-month statement:
+  - python     → fetch every line in the range and accumulate per account
+                 and month in Python dicts
+  - numpy      → the same lines fetched as columns and folded with
+                 np.bincount (account index × period index)
+  - grouped    → services.financial_statements with
+                 ACCOUNT_BALANCE_CACHE=false: lines grouped per account and
+                 month in SQL, then folded with NumPy
+  - checkpoint → services.financial_statements as served: whole months
+                 read from `account_period_total`, only the trailing
+                 partial month grouped from `journal_line`
+Each variant's net income is checked against the python baseline.
+
+Run:
+    python scripts/bench_financial_statements.py              # 100k and 1M lines
+    python scripts/bench_financial_statements.py 200000       # custom sizes
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from models import ChartOfAccount, JournalEntry, JournalLine
+from services import financial_statements
+from services.account_balances import rebuild_account_balances
+
+RUNS = 3
+ACCOUNTS = [
+    ("1000", "Cash", "asset", "debit"),
+    ("1100", "Accounts Receivable", "asset", "debit"),
+    ("2000", "Accounts Payable", "liability", "credit"),
+    ("3000", "Owner's Equity", "equity", "credit"),
+    ("4000", "Revenue", "revenue", "credit"),
+    ("5000", "Cost of Goods Sold", "expense", "debit"),
+]
+PAIRS = [("1100", "4000"), ("1000", "1100"), ("5000", "2000"), ("2000", "1000"), ("1000", "3000")]
+
+
+def seed(engine, n_lines: int):
+    rng = random.Random(42)
+    start = date.today() - timedelta(days=3 * 365)
+    with Session(engine) as session:
+        session.execute(insert(ChartOfAccount), [
+            {"code": code, "name": name, "account_type": kind, "normal_balance": normal, "is_active": True}
+            for code, name, kind, normal in ACCOUNTS
+        ])
+        ids = dict(session.exec(select(ChartOfAccount.code, ChartOfAccount.id)).all())
+
+        n_entries = n_lines // 2
+        batch = 50_000
+        for offset in range(0, n_entries, batch):
+            count = min(batch, n_entries - offset)
+            session.execute(insert(JournalEntry), [
+                {"id": offset + i + 1, "entry_date": start + timedelta(days=rng.randint(0, 3 * 365)),
+                 "description": "Seeded entry", "reference_type": "manual", "reference_id": offset + i + 1}
+                for i in range(count)
+            ])
+            lines = []
+            for i in range(count):
+                debit_code, credit_code = rng.choice(PAIRS)
+                amount = round(rng.uniform(1, 2000), 2)
+                lines.append({"journal_entry_id": offset + i + 1, "account_id": ids[debit_code], "debit": amount, "credit": 0.0})
+                lines.append({"journal_entry_id": offset + i + 1, "account_id": ids[credit_code], "debit": 0.0, "credit": amount})
+            session.execute(insert(JournalLine), lines)
+        session.commit()
+        rebuild_account_balances(session)
+
+
+def _line_statement(periods):
+    return (
+        select(JournalLine.account_id, JournalEntry.entry_date, JournalLine.debit, JournalLine.credit)
+        .join(JournalEntry, JournalLine.journal_entry_id == JournalEntry.id)
+        .where(JournalEntry.entry_date >= periods[0][0], JournalEntry.entry_date <= periods[-1][1])
+    )
+
+
+def _net_income(session, totals_by_account):
+    kinds = dict(session.exec(select(ChartOfAccount.id, ChartOfAccount.account_type)).all())
+    # Debit-positive movements: net income is minus the revenue + expense movement
+    return -sum(value for account_id, value in totals_by_account.items() if kinds[account_id] in ("revenue", "expense"))
+
+
+def python_statement(session, periods):
+    totals = {}
+    for account_id, entry_date, debit, credit in session.execute(_line_statement(periods)):
+        key = (account_id, entry_date.year, entry_date.month)
+        totals[key] = totals.get(key, 0.0) + debit - credit
+    by_account = {}
+    for (account_id, _, _), value in totals.items():
+        by_account[account_id] = by_account.get(account_id, 0.0) + value
+    return _net_income(session, by_account)
+
+
+def numpy_statement(session, periods):
+    ids = np.array(sorted(session.exec(select(ChartOfAccount.id)).all()), dtype=np.int64)
+    rows = session.execute(_line_statement(periods)).all()
+    account_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    months = np.fromiter((r[1].year * 12 + r[1].month - 1 for r in rows), dtype=np.int64, count=len(rows))
+    net = np.fromiter((r[2] - r[3] for r in rows), dtype=float, count=len(rows))
+    period_index = months - (periods[0][0].year * 12 + periods[0][0].month - 1)
+    matrix = np.bincount(np.searchsorted(ids, account_ids) * len(periods) + period_index, weights=net,
+                         minlength=len(ids) * len(periods)).reshape(len(ids), len(periods))
+    return _net_income(session, dict(zip(ids.tolist(), matrix.sum(axis=1).tolist())))
+
+
+def service_statement(session, periods, cache: bool):
+    financial_statements.ACCOUNT_BALANCE_CACHE = cache
+    statement = financial_statements.income_statement(session, periods, "month")
+    return sum(statement["net_income"])
+
+
+def timed(fn, *args):
+    best, result = float("inf"), None
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run(n_lines: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        print(f"\n🌱 Seeding {n_lines} journal lines...")
+        seed(engine, n_lines)
+
+        periods = financial_statements.build_periods(*financial_statements.default_range(), "month")
+        print(f"{'variant':>12} {'best (ms)':>10} {'net income':>16}")
+        with Session(engine) as session:
+            _, baseline = timed(python_statement, session, periods)
+            for variant, fn, args in (
+                ("python", python_statement, (session, periods)),
+                ("numpy", numpy_statement, (session, periods)),
+                ("grouped", service_statement, (session, periods, False)),
+                ("checkpoint", service_statement, (session, periods, True)),
+            ):
+                seconds, net_income = timed(fn, *args)
+                status = "✅" if abs(net_income - baseline) < 0.01 * len(periods) else "❌"
+                print(f"{variant:>12} {seconds * 1000:>10.1f} {net_income:>16.2f} {status}")
+        engine.dispose()
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    for n_lines in sizes:
+        run(n_lines)
+
+
+if __name__ == "__main__":
+    main()
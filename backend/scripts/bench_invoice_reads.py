@@ -0,0 +1,142 @@
+"""
+Benchmark: ORM-hydrated vs column-projection invoice list reads.
+
+Seeds a throwaway SQLite database with N invoices (3 line items each) and
+times both read paths end to end, from query to serialized JSON bytes:
+  - orm        → select(Invoice) + joinedload/selectinload, copy into
+                 InvoiceMinimalResponse models, dump with Pydantic
+  - projection → services.invoice_reader.fetch_invoices + dumps
+
+Run:
+    python scripts/bench_invoice_reads.py            # 10k and 100k invoices
+    python scripts/bench_invoice_reads.py 5000       # custom sizes
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload, selectinload
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from api import CustomerMinimalResponse, InvoiceMinimalResponse, LineItemMinimalResponse, ProductMinimalResponse
+from models import Customer, Invoice, LineItem, Product
+from services.invoice_reader import dumps, fetch_invoices, invoice_list_statement
+
+LINES_PER_INVOICE = 3
+RUNS = 3
+
+
+def seed(engine, n_invoices: int):
+    rng = random.Random(42)
+    with Session(engine) as session:
+        session.execute(insert(Customer), [
+            {"customer_name": f"Customer {i}", "customer_address": f"{i} Main St",
+             "customer_phone": "5550000000", "customer_email": f"c{i}@example.com"}
+            for i in range(1, 501)
+        ])
+        session.execute(insert(Product), [
+            {"product_description": f"Product {i}", "product_price": round(rng.uniform(5, 500), 2)}
+            for i in range(1, 201)
+        ])
+        start = date(2020, 1, 1)
+        session.execute(insert(Invoice), [
+            {"customer_id": rng.randint(1, 500), "date_issued": start + timedelta(days=i % 2000),
+             "invoice_terms": "Net 30", "invoice_due_date": start + timedelta(days=i % 2000 + 30),
+             "invoice_total": 100.0, "invoice_status": rng.choice(["draft", "submitted", "paid"])}
+            for i in range(n_invoices)
+        ])
+        session.execute(insert(LineItem), [
+            {"invoice_id": inv_id, "product_id": rng.randint(1, 200),
+             "lineitem_qty": rng.randint(1, 5), "lineitem_total": 33.3}
+            for inv_id in range(1, n_invoices + 1)
+            for _ in range(LINES_PER_INVOICE)
+        ])
+        session.commit()
+
+
+_response_list = TypeAdapter(List[InvoiceMinimalResponse])
+
+
+def orm_path(engine) -> bytes:
+    with Session(engine) as session:
+        invoices = session.exec(
+            select(Invoice).options(
+                joinedload(Invoice.customer),
+                selectinload(Invoice.line_items).joinedload(LineItem.product),
+            )
+        ).unique().all()
+        models = [
+            InvoiceMinimalResponse(
+                id=inv.id,
+                customer_id=inv.customer_id,
+                customer=CustomerMinimalResponse(
+                    customer_id=inv.customer.customer_id,
+                    customer_name=inv.customer.customer_name,
+                    customer_address=inv.customer.customer_address,
+                    customer_phone=inv.customer.customer_phone,
+                    customer_email=inv.customer.customer_email,
+                ),
+                date_issued=inv.date_issued,
+                invoice_due_date=inv.invoice_due_date,
+                invoice_terms=inv.invoice_terms,
+                invoice_status=inv.invoice_status,
+                invoice_total=inv.invoice_total,
+                line_items=[
+                    LineItemMinimalResponse(
+                        lineitem_id=item.lineitem_id,
+                        product_id=item.product_id,
+                        product=ProductMinimalResponse(
+                            product_id=item.product.product_id,
+                            product_description=item.product.product_description,
+                            product_price=item.product.product_price,
+                        ) if item.product else None,
+                        lineitem_qty=item.lineitem_qty,
+                        lineitem_total=item.lineitem_total,
+                    )
+                    for item in inv.line_items
+                ],
+            )
+            for inv in invoices
+        ]
+        return _response_list.dump_json(models)
+
+
+def projection_path(engine) -> bytes:
+    with Session(engine) as session:
+        return dumps(fetch_invoices(session, invoice_list_statement()))
+
+
+def best_of(fn, engine) -> float:
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        fn(engine)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'invoices':>10} {'orm (s)':>10} {'projection (s)':>15} {'speedup':>8}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            SQLModel.metadata.create_all(engine)
+            seed(engine, n)
+            orm = best_of(orm_path, engine)
+            projection = best_of(projection_path, engine)
+            print(f"{n:>10} {orm:>10.3f} {projection:>15.3f} {orm / projection:>7.1f}x")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
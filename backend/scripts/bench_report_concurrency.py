@@ -0,0 +1,178 @@
+"""
+Benchmark: blocking vs async report endpoints under mixed report + CRUD load.
+
+Seeds a throwaway SQLite database (WAL mode) and serves two variants of
+the aging report from a minimal FastAPI app:
+  - blocking → `async def` endpoint running the aging queries on a sync
+               Session, i.e. the report routes before AsyncSession: every
+               query blocks the event loop
+  - async    → the same report via ReportService on an aiosqlite AsyncSession
+Each run keeps REPORT_WORKERS clients requesting the report and
+CRUD_WORKERS clients reading / updating single invoices (`def` endpoints,
+served from the threadpool) for DURATION seconds, all through one
+in-process ASGI transport. Reports throughput and CRUD latency p50 / p95:
+with blocking reports, CRUD requests queue behind whole report queries.
+
+Run:
+    python scripts/bench_report_concurrency.py            # 20k invoices
+    python scripts/bench_report_concurrency.py 100000     # custom size
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import Customer, Invoice
+from services.aging import aging_totals
+from services.report_service import ReportService
+
+REPORT_WORKERS = 4
+CRUD_WORKERS = 8
+DURATION = 5.0
+
+
+def seed(engine, n_invoices: int):
+    rng = random.Random(42)
+    today = date.today()
+    with Session(engine) as session:
+        session.execute(text("PRAGMA journal_mode=WAL"))
+        session.execute(insert(Customer), [
+            {"customer_name": f"Customer {i}", "customer_address": f"{i} Main St",
+             "customer_phone": "5550000000", "customer_email": f"c{i}@example.com"}
+            for i in range(1, 501)
+        ])
+        session.execute(insert(Invoice), [
+            {"customer_id": rng.randint(1, 500), "date_issued": today - timedelta(days=rng.randint(0, 365)),
+             "invoice_terms": "Net 30", "invoice_due_date": today - timedelta(days=rng.randint(-30, 180)),
+             "invoice_total": round(rng.uniform(50, 5000), 2),
+             "invoice_status": rng.choice(["draft", "submitted", "sent", "paid", "overdue"])}
+            for _ in range(n_invoices)
+        ])
+        session.commit()
+
+
+def build_app(db_path: str, n_invoices: int) -> FastAPI:
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    app = FastAPI()
+    app.state.engines = (engine, async_engine)
+
+    def get_session():
+        with Session(engine) as session:
+            yield session
+
+    async def get_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    @app.get("/blocking/aging")
+    async def blocking_aging(session: Session = Depends(get_session)):
+        # Statements come from ReportService; execution is synchronous, on the event loop
+        as_of = date.today()
+        service = ReportService(session)
+        totals = aging_totals(session, as_of, ReportService.AGING_BOUNDS, ReportService.AGING_OVERFLOW,
+                              *service._aging_filters(as_of))
+        rows = [service._aging_detail(row) for row in session.exec(service._aging_detail_statement(as_of)).all()]
+        return {"buckets": len(totals), "invoices": len(rows)}
+
+    @app.get("/async/aging")
+    async def async_aging(session: AsyncSession = Depends(get_async_session)):
+        report = await ReportService(session).get_aging_report(date.today())
+        return {"buckets": len(report["aging_buckets"]), "invoices": len(report["invoices"])}
+
+    @app.get("/invoice/{invoice_id}")
+    def read_invoice(invoice_id: int, session: Session = Depends(get_session)):
+        return session.get(Invoice, invoice_id)
+
+    @app.patch("/invoice/{invoice_id}")
+    def touch_invoice(invoice_id: int, session: Session = Depends(get_session)):
+        invoice = session.get(Invoice, invoice_id)
+        invoice.invoice_total = round(invoice.invoice_total + 0.01, 2)
+        session.add(invoice)
+        session.commit()
+        return {"id": invoice_id}
+
+    app.state.n_invoices = n_invoices
+    return app
+
+
+async def run_load(app: FastAPI, report_path: str):
+    rng = random.Random(7)
+    deadline = time.perf_counter() + DURATION
+    reports = [0]
+    crud_latencies = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def report_worker():
+            while time.perf_counter() < deadline:
+                response = await client.get(report_path)
+                response.raise_for_status()
+                reports[0] += 1
+
+        async def crud_worker():
+            while time.perf_counter() < deadline:
+                invoice_id = rng.randint(1, app.state.n_invoices)
+                started = time.perf_counter()
+                if rng.random() < 0.2:
+                    response = await client.patch(f"/invoice/{invoice_id}")
+                else:
+                    response = await client.get(f"/invoice/{invoice_id}")
+                response.raise_for_status()
+                crud_latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(
+            *[report_worker() for _ in range(REPORT_WORKERS)],
+            *[crud_worker() for _ in range(CRUD_WORKERS)],
+        )
+
+    crud_latencies.sort()
+    p95 = crud_latencies[int(len(crud_latencies) * 0.95) - 1] if crud_latencies else 0.0
+    return {
+        "reports_per_s": reports[0] / DURATION,
+        "crud_per_s": len(crud_latencies) / DURATION,
+        "crud_p50_ms": statistics.median(crud_latencies) * 1000 if crud_latencies else 0.0,
+        "crud_p95_ms": p95 * 1000,
+    }
+
+
+async def run_variants(app: FastAPI):
+    print(f"{'variant':>10} {'reports/s':>10} {'crud/s':>8} {'crud p50 (ms)':>14} {'crud p95 (ms)':>14}")
+    for variant, path in (("blocking", "/blocking/aging"), ("async", "/async/aging")):
+        result = await run_load(app, path)
+        print(f"{variant:>10} {result['reports_per_s']:>10.1f} {result['crud_per_s']:>8.1f} "
+              f"{result['crud_p50_ms']:>14.2f} {result['crud_p95_ms']:>14.2f}")
+
+    sync_engine, async_engine = app.state.engines
+    sync_engine.dispose()
+    await async_engine.dispose()
+
+
+def main():
+    n_invoices = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{db_path}")
+        SQLModel.metadata.create_all(engine)
+        seed(engine, n_invoices)
+        engine.dispose()
+
+        print(f"⏱️  {n_invoices} invoices, {REPORT_WORKERS} report + {CRUD_WORKERS} CRUD workers, {DURATION:.0f}s per variant")
+        asyncio.run(run_variants(build_app(db_path, n_invoices)))
+
+
+if __name__ == "__main__":
+    main()
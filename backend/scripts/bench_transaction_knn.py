@@ -0,0 +1,176 @@
+"""
+Benchmark: throughput and accuracy of the embedding kNN transaction stage.
+
+Generates bank descriptions for ~50 merchants in 8 categories (store
+numbers, card suffixes, "POS" / "DEBIT CARD" prefixes, cities), confirms
+TRAIN_VARIANTS variants of 75% of the merchants into a memo-shaped index,
+and classifies a held-out statement of fresh variants:
+  - seen   → new variants of merchants that have confirmed rows
+  - unseen → merchants never confirmed (same categories)
+For each embedder it reports the exact memo hit rate (what
+services.classification_memo alone would catch), then kNN coverage (share
+of transactions at or above KNN_MIN_CONFIDENCE, i.e. kept away from the
+model) and accuracy on the covered ones, plus throughput:
+  - minilm  → services.transaction_knn.embed (all-MiniLM-L6-v2, needs
+              sentence-transformers or ML_EXTRACTOR_MODE=lambda/http;
+              skipped when unavailable)
+  - trigram → hashed character trigrams, a dependency-free baseline
+Search cost is also timed against larger random indexes of MiniLM-sized
+(384-d) vectors.
+
+Run:
+    python scripts/bench_transaction_knn.py               # 2,000 transactions
+    python scripts/bench_transaction_knn.py 10000         # custom size
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import time
+import zlib
+
+import numpy as np
+
+from services import transaction_knn
+from services.classification_memo import merchant_key
+from services.transaction_knn import KnnIndex, KnnLabel
+
+TRAIN_VARIANTS = 3
+SEEN_SHARE = 0.75
+INDEX_SIZES = [1_000, 10_000, 100_000]
+STATEMENT_SIZE = 500
+TRIGRAM_DIMENSIONS = 2048
+MINILM_DIMENSIONS = 384
+
+CATEGORIES = {
+    # category: (sign, debit, credit, merchants)
+    "travel":    (-1, "6100", "1000", ["UBER TRIP", "LYFT RIDE", "DELTA AIR LINES", "UNITED AIRLINES", "MARRIOTT HOTELS",
+                                       "HILTON HOTELS", "AMTRAK", "AIRBNB"]),
+    "meals":     (-1, "6200", "1000", ["UBER EATS", "DOORDASH", "GRUBHUB", "STARBUCKS", "CHIPOTLE", "MCDONALDS",
+                                       "PANERA BREAD", "DUNKIN"]),
+    "software":  (-1, "6300", "1000", ["GITHUB", "ATLASSIAN", "SLACK TECHNOLOGIES", "ZOOM US", "ADOBE CREATIVE CLOUD",
+                                       "GOOGLE WORKSPACE", "DROPBOX", "AMAZON WEB SERVICES"]),
+    "office":    (-1, "6400", "1000", ["STAPLES", "OFFICE DEPOT", "AMAZON MKTPLACE", "BEST BUY", "IKEA", "COSTCO WHOLESALE"]),
+    "fuel":      (-1, "6500", "1000", ["SHELL OIL", "CHEVRON", "EXXONMOBIL", "BP GAS", "SPEEDWAY", "SUNOCO"]),
+    "utilities": (-1, "6600", "1000", ["COMCAST CABLE", "VERIZON WIRELESS", "AT T WIRELESS", "PG E UTILITY",
+                                       "CON EDISON", "DUKE ENERGY"]),
+    "revenue":   (1, "1000", "4000", ["STRIPE TRANSFER", "SQUARE DEPOSIT", "PAYPAL TRANSFER", "SHOPIFY PAYOUT"]),
+    "customer":  (1, "1000", "1100", ["ACME CORP PAYMENT", "GLOBEX INVOICE PAYMENT", "INITECH ACH PAYMENT",
+                                      "UMBRELLA CO REMITTANCE"]),
+}
+PREFIXES = ["", "", "POS ", "DEBIT CARD ", "CHECKCARD ", "ACH ", "RECURRING "]
+SEPARATORS = [" ", " *", " #", "*"]
+CITIES = ["SEATTLE WA", "NEW YORK NY", "AUSTIN TX", "CHICAGO IL", "DENVER CO", "", ""]
+
+
+def code(rng) -> str:
+    chars = "ABCDEFGHJKLMNPQRSTUVWXYZ0123456789"
+    return "".join(rng.choice(chars) for _ in range(rng.randint(3, 8)))
+
+
+def variant(rng, merchant: str) -> str:
+    return f"{rng.choice(PREFIXES)}{merchant}{rng.choice(SEPARATORS)}{code(rng)} {rng.choice(CITIES)}".strip()
+
+
+def make_dataset(rng, n_transactions: int):
+    merchants = [(name, category) for category, (_, _, _, names) in CATEGORIES.items() for name in names]
+    rng.shuffle(merchants)
+    seen = merchants[:int(len(merchants) * SEEN_SHARE)]
+    unseen = merchants[len(seen):]
+
+    memo = {}
+    for name, category in seen:
+        for _ in range(TRAIN_VARIANTS):
+            memo.setdefault((merchant_key(variant(rng, name)), CATEGORIES[category][0]), category)
+
+    statement = []
+    for _ in range(n_transactions):
+        bucket = "seen" if rng.random() < 0.8 else "unseen"
+        name, category = rng.choice(seen if bucket == "seen" else unseen)
+        statement.append((variant(rng, name), CATEGORIES[category][0], category, bucket))
+    return memo, statement
+
+
+def trigram_embed(texts):
+    vectors = np.zeros((len(texts), TRIGRAM_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        padded = f"  {text} "
+        for i in range(len(padded) - 2):
+            vectors[row, zlib.crc32(padded[i:i + 3].encode()) % TRIGRAM_DIMENSIONS] += 1.0
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+def build_index(memo, embed):
+    keys = [key for key, _ in memo]
+    labels = []
+    for (key, _), category in memo.items():
+        _, debit, credit, _ = CATEGORIES[category]
+        labels.append(KnnLabel(key, debit, credit, "credit" if debit == "1000" else "debit", category))
+    return KnnIndex(labels, np.array([sign for _, sign in memo], dtype=np.int8), embed(keys))
+
+
+def evaluate(name, embed, memo, statement):
+    started = time.perf_counter()
+    index = build_index(memo, embed)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    keys = [merchant_key(description) for description, _, _, _ in statement]
+    distinct = sorted(set(keys))
+    vectors = embed(distinct)
+    rows = {key: row for row, key in enumerate(distinct)}
+    embed_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    results = index.classify(vectors[[rows[key] for key in keys]], np.array([sign for _, sign, _, _ in statement], dtype=np.int8))
+    search_seconds = time.perf_counter() - started
+
+    print(f"\n🔎 {name}: {len(index)} confirmed rows, built in {build_seconds * 1000:.0f} ms")
+    print(f"{'bucket':>8} {'txns':>6} {'memo hit':>9} {'covered':>8} {'accurate':>9} {'top-1':>7}")
+    for bucket in ("seen", "unseen", "all"):
+        picked = [(txn, key, result) for txn, key, result in zip(statement, keys, results) if bucket in ("all", txn[3])]
+        memo_hits = sum(1 for (_, sign, _, _), key, _ in picked if (key, sign) in memo)
+        covered = [(txn, result) for txn, _, result in picked if result and result[1] >= transaction_knn.KNN_MIN_CONFIDENCE]
+        accurate = sum(1 for txn, result in covered if result[0].journal_description == txn[2])
+        top1 = sum(1 for txn, _, result in picked if result and result[0].journal_description == txn[2])
+        print(f"{bucket:>8} {len(picked):>6} {memo_hits / len(picked):>9.1%} {len(covered) / len(picked):>8.1%} "
+              f"{accurate / max(len(covered), 1):>9.1%} {top1 / len(picked):>7.1%}")
+    total = embed_seconds + search_seconds
+    print(f"throughput: {len(statement) / total:,.0f} txn/s "
+          f"(embed {embed_seconds * 1000:.0f} ms for {len(distinct)} distinct keys, search {search_seconds * 1000:.0f} ms)")
+
+
+def search_scaling(dimensions: int):
+    rng = np.random.default_rng(42)
+    print(f"\n📈 Search cost per {STATEMENT_SIZE}-transaction statement ({dimensions}-d, brute force)")
+    queries = rng.standard_normal((STATEMENT_SIZE, dimensions), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    signs = np.full(STATEMENT_SIZE, -1, dtype=np.int8)
+    for size in INDEX_SIZES:
+        vectors = rng.standard_normal((size, dimensions), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        labels = [KnnLabel(str(i), "5000", "1000", "debit", "") for i in range(size)]
+        index = KnnIndex(labels, np.full(size, -1, dtype=np.int8), vectors)
+        started = time.perf_counter()
+        index.classify(queries, signs)
+        print(f"{size:>10,} rows {(time.perf_counter() - started) * 1000:>8.1f} ms")
+
+
+def main():
+    n_transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    rng = random.Random(42)
+    memo, statement = make_dataset(rng, n_transactions)
+    print(f"⏱️  {len(memo)} confirmed merchant keys, {n_transactions} statement transactions, "
+          f"KNN_MIN_CONFIDENCE={transaction_knn.KNN_MIN_CONFIDENCE}")
+
+    if transaction_knn.embed(["probe"]) is not None:
+        evaluate("minilm", transaction_knn.embed, memo, statement)
+    else:
+        print("\n⚠️  No embedding backend (install sentence-transformers or set ML_EXTRACTOR_MODE); skipping minilm")
+    evaluate("trigram", trigram_embed, memo, statement)
+    search_scaling(MINILM_DIMENSIONS)
+
+
+if __name__ == "__main__":
+    main()
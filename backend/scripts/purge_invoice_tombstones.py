@@ -0,0 +1,57 @@
+"""
+Purge old deleted-invoice tombstones.
+
+delete_invoice writes one `deleted_invoice` row per deleted invoice so that
+GET /invoice/{id} can answer "has been deleted" with a primary-key lookup.
+Stale tabs and crawlers stop asking about long-gone ids, so tombstones past
+the retention window are dropped in a single set-based DELETE; those ids
+then fall back to "does not exist".
+
+Run locally:
+    python scripts/purge_invoice_tombstones.py            # default 365 days
+    python scripts/purge_invoice_tombstones.py --days 90
+
+Run against AWS:
+    DATABASE_URL="postgresql://..." python scripts/purge_invoice_tombstones.py
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlalchemy import delete
+from sqlmodel import Session
+from database import engine, create_db_and_tables
+from models import DeletedInvoice
+
+DEFAULT_RETENTION_DAYS = int(os.getenv("INVOICE_TOMBSTONE_RETENTION_DAYS", 365))
+
+
+def purge_tombstones(session: Session, retention_days: int) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    result = session.execute(delete(DeletedInvoice).where(DeletedInvoice.deleted_at < cutoff))
+    session.commit()
+    return result.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purge deleted-invoice tombstones past retention")
+    parser.add_argument("--days", type=int, default=DEFAULT_RETENTION_DAYS,
+                        help=f"keep tombstones newer than this many days (default {DEFAULT_RETENTION_DAYS})")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        purged = purge_tombstones(session, args.days)
+
+    print(f"🧹 Purged {purged} invoice tombstone(s) older than {args.days} days.")
+
+
+if __name__ == "__main__":
+    main()
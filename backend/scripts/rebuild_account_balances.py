@@ -0,0 +1,37 @@
+"""
+Rebuild cached GL account balances from the journal_line table.
+
+Journal write paths keep `account_balance` and the monthly ledger
+checkpoints in `account_period_total` current incrementally; run this
+after writes that bypass them (manual SQL, restores) or to repair drift.
+Each table is recomputed with a single grouped INSERT ... SELECT.
+
+Run locally:
+    python scripts/rebuild_account_balances.py
+
+Run against AWS:
+    DATABASE_URL="postgresql://..." python scripts/rebuild_account_balances.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlmodel import Session
+from database import engine, create_db_and_tables
+from services.account_balances import rebuild_account_balances
+
+
+def main():
+    create_db_and_tables()
+    with Session(engine) as session:
+        rows = rebuild_account_balances(session)
+
+    print(f"📊 Rebuilt balances for {rows} account(s).")
+
+
+if __name__ == "__main__":
+    main()
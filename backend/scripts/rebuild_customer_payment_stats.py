@@ -0,0 +1,36 @@
+"""
+Rebuild per-customer payment statistics from the invoice table.
+
+Invoice routes keep `customer_payment_stats` current incrementally; run this after
+writes that bypass them (seed scripts, manual SQL, restores) or to repair
+drift. Every customer row is recomputed in one pass over invoice history.
+
+Run locally:
+    python scripts/rebuild_customer_payment_stats.py
+
+Run against AWS:
+    DATABASE_URL="postgresql://..." python scripts/rebuild_customer_payment_stats.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlmodel import Session
+from database import engine, create_db_and_tables
+from services.customer_payment_stats import rebuild_customer_payment_stats
+
+
+def main():
+    create_db_and_tables()
+    with Session(engine) as session:
+        rows = rebuild_customer_payment_stats(session)
+
+    print(f"📊 Rebuilt payment stats for {rows} customer(s).")
+
+
+if __name__ == "__main__":
+    main()
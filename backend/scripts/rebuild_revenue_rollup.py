@@ -0,0 +1,36 @@
+"""
+Rebuild the monthly revenue rollup from the invoice table.
+
+Invoice routes keep `revenue_rollup` current incrementally; run this after
+writes that bypass them (seed scripts, manual SQL, restores) or to repair
+drift. The table is recomputed with a single grouped INSERT ... SELECT.
+
+Run locally:
+    python scripts/rebuild_revenue_rollup.py
+
+Run against AWS:
+    DATABASE_URL="postgresql://..." python scripts/rebuild_revenue_rollup.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlmodel import Session
+from database import engine, create_db_and_tables
+from services.revenue_rollup import rebuild_revenue_rollup
+
+
+def main():
+    create_db_and_tables()
+    with Session(engine) as session:
+        rows = rebuild_revenue_rollup(session)
+
+    print(f"📊 Rebuilt revenue rollup: {rows} (year, month, status) row(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,7 @@ load_dotenv()
 from sqlmodel import Session, select
 from database import engine, create_db_and_tables
 from models import Invoice, ChartOfAccount, JournalEntry, JournalLine
+from services.account_balances import rebuild_account_balances
 
 
 def get_account(session: Session, code: str) -> ChartOfAccount:
@@ -118,6 +119,8 @@ def main():
                     posted_cash += 1
 
         session.commit()
+        # Lines above bypass post_journal_entry, so refresh the cached balances
+        rebuild_account_balances(session)
 
     print(f"✅ Done!")
     print(f"   📋 AR entries posted  : {posted_ar}")
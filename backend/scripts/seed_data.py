@@ -11,6 +11,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database import engine, create_db_and_tables
 from models import Customer, Product, Invoice, LineItem
+from services.customer_payment_stats import rebuild_customer_payment_stats
+from services.revenue_rollup import rebuild_revenue_rollup
 
 
 def generate_due_date(sent_date: date, terms: str) -> date:
@@ -389,6 +391,9 @@ def seed(
             session.add(invoice)
 
         session.commit()
+        # Invoices above bypass the invoice routes, so refresh the aggregates built from them
+        rebuild_revenue_rollup(session)
+        rebuild_customer_payment_stats(session)
         
         print(f"\n✅ Successfully generated:")
         print(f"   📋 {num_customers} customers")
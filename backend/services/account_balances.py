@@ -0,0 +1,132 @@
+"""
+Incrementally maintained GL account balances (account → debit / credit totals).
+
+Journal write paths call record_journal_lines() with the (account_id,
+entry_date, debit, credit) of every line they add, inside the same
+transaction; deltas are merged per account — and per account and month
+for `account_period_total` — and applied with additive upserts. Trial
+balance, account list and P&L then read O(accounts) rows instead of
+summing `journal_line`; the monthly rows are the general ledger's balance
+checkpoints (services.ledger).
+
+account_totals() is the single read path. With ACCOUNT_BALANCE_CACHE=false
+it falls back to one GROUP BY account_id over `journal_line` (no table
+reads, e.g. while checking for drift). rebuild_account_balances()
+recomputes both tables with grouped INSERT ... SELECTs
+(scripts/rebuild_account_balances.py, and lazily on first use until the
+rebuild has been recorded, see services.backfill).
+"""
+
+import os
+from datetime import date
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import Integer, cast, delete, extract, func, insert
+from sqlmodel import Session, select
+
+from models import AccountBalance, AccountPeriodTotal, JournalEntry, JournalLine
+from services.backfill import is_backfilled, mark_backfilled
+from services.upsert import upsert_increments
+
+ACCOUNT_BALANCE_CACHE = os.getenv("ACCOUNT_BALANCE_CACHE", "true").lower() == "true"
+
+# (account_id, entry_date, debit, credit)
+LineAmounts = Tuple[int, date, float, float]
+
+BACKFILL_NAME = "account_balances"
+
+_checked = set()   # engine urls already verified as backfilled
+
+
+def record_journal_lines(session: Session, lines: Iterable[LineAmounts]) -> None:
+    """Add newly written journal lines to their accounts' totals. Does not commit."""
+    deltas: Dict[int, list] = {}
+    period_deltas: Dict[Tuple[int, int, int], list] = {}
+    for account_id, entry_date, debit, credit in lines:
+        for totals in (
+            deltas.setdefault(account_id, [0.0, 0.0, 0]),
+            period_deltas.setdefault((account_id, entry_date.year, entry_date.month), [0.0, 0.0, 0]),
+        ):
+            totals[0] += debit or 0.0
+            totals[1] += credit or 0.0
+            totals[2] += 1
+
+    rows = [
+        {"account_id": account_id, "debit_total": debit, "credit_total": credit, "line_count": count}
+        for account_id, (debit, credit, count) in deltas.items()
+    ]
+    upsert_increments(session, AccountBalance, ("account_id",), rows)
+    period_rows = [
+        {"account_id": account_id, "year": year, "month": month,
+         "debit_total": debit, "credit_total": credit, "line_count": count}
+        for (account_id, year, month), (debit, credit, count) in period_deltas.items()
+    ]
+    upsert_increments(session, AccountPeriodTotal, ("account_id", "year", "month"), period_rows)
+
+
+def rebuild_account_balances(session: Session) -> int:
+    """Recompute every account's (and account-month's) totals with grouped INSERT ... SELECTs. Commits."""
+    grouped = (
+        select(
+            JournalLine.account_id,
+            func.coalesce(func.sum(JournalLine.debit), 0.0),
+            func.coalesce(func.sum(JournalLine.credit), 0.0),
+            func.count(JournalLine.id),
+        )
+        .group_by(JournalLine.account_id)
+    )
+    session.execute(delete(AccountBalance))
+    session.execute(
+        insert(AccountBalance).from_select(["account_id", "debit_total", "credit_total", "line_count"], grouped)
+    )
+
+    year = cast(extract("year", JournalEntry.entry_date), Integer)
+    month = cast(extract("month", JournalEntry.entry_date), Integer)
+    grouped_by_month = (
+        select(
+            JournalLine.account_id,
+            year,
+            month,
+            func.coalesce(func.sum(JournalLine.debit), 0.0),
+            func.coalesce(func.sum(JournalLine.credit), 0.0),
+            func.count(JournalLine.id),
+        )
+        .join(JournalEntry, JournalLine.journal_entry_id == JournalEntry.id)
+        .group_by(JournalLine.account_id, year, month)
+    )
+    session.execute(delete(AccountPeriodTotal))
+    session.execute(
+        insert(AccountPeriodTotal).from_select(
+            ["account_id", "year", "month", "debit_total", "credit_total", "line_count"], grouped_by_month
+        )
+    )
+    mark_backfilled(session, BACKFILL_NAME)
+    session.commit()
+    return session.exec(select(func.count()).select_from(AccountBalance)).one()
+
+
+def ensure_account_balances(session: Session) -> None:
+    """Rebuild both tables from journal lines unless a completed backfill is recorded (checked once per process)."""
+    key = str(session.get_bind().url)
+    if key in _checked:
+        return
+    if not is_backfilled(session, BACKFILL_NAME):
+        rebuild_account_balances(session)
+    _checked.add(key)
+
+
+def account_totals(session: Session) -> Dict[int, Tuple[float, float]]:
+    """{account_id: (total debit, total credit)} for every account with journal lines."""
+    if ACCOUNT_BALANCE_CACHE:
+        ensure_account_balances(session)
+        stmt = select(AccountBalance.account_id, AccountBalance.debit_total, AccountBalance.credit_total)
+    else:
+        stmt = (
+            select(
+                JournalLine.account_id,
+                func.coalesce(func.sum(JournalLine.debit), 0.0),
+                func.coalesce(func.sum(JournalLine.credit), 0.0),
+            )
+            .group_by(JournalLine.account_id)
+        )
+    return {account_id: (debit, credit) for account_id, debit, credit in session.exec(stmt).all()}
@@ -0,0 +1,54 @@
+"""
+SQL-side aging buckets for outstanding invoices.
+
+Buckets are a CASE on invoice_due_date against cutoff dates computed in
+Python (`due_date >= as_of - N days`), so bucketing is dialect-neutral and
+can use the due-date indexes. aging_totals() returns per-bucket count,
+amount, days-overdue sum and oldest due date from one grouped query;
+report detail lists select days_overdue() / aging_bucket() as columns and
+page or stream the rows without re-bucketing them in Python.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import Integer, cast, func, literal
+from sqlmodel import Session, case, select
+
+from models import Invoice
+
+# (bucket key, max days overdue) pairs, max days inclusive — evaluated in order, first match wins
+Bounds = Sequence[Tuple[Any, int]]
+
+
+def days_overdue(session: Session, as_of: date):
+    """Whole days from invoice_due_date to `as_of` (negative when not yet due)."""
+    if session.get_bind().dialect.name == "sqlite":
+        return cast(func.julianday(literal(as_of.isoformat())) - func.julianday(Invoice.invoice_due_date), Integer)
+    return cast(literal(as_of) - Invoice.invoice_due_date, Integer)
+
+
+def aging_bucket(as_of: date, bounds: Bounds, overflow: Any):
+    """CASE expression mapping invoice_due_date to the first bucket whose max days it fits."""
+    return case(
+        *[(Invoice.invoice_due_date >= as_of - timedelta(days=max_days), key) for key, max_days in bounds],
+        else_=overflow
+    )
+
+
+def aging_totals(session: Session, as_of: date, bounds: Bounds, overflow: Any, *where) -> Dict[Any, Dict[str, Any]]:
+    """Count, amount, days-overdue sum and oldest due date per bucket in one grouped query."""
+    bucket = aging_bucket(as_of, bounds, overflow).label("bucket")
+    stmt = select(
+        bucket,
+        func.count(Invoice.id),
+        func.coalesce(func.sum(Invoice.invoice_total), 0.0),
+        func.coalesce(func.sum(days_overdue(session, as_of)), 0),
+        func.min(Invoice.invoice_due_date)
+    ).where(*where).group_by(bucket)
+
+    keys: List[Any] = [key for key, _ in bounds] + [overflow]
+    totals = {key: {"count": 0, "amount": 0.0, "days_sum": 0, "oldest_due": None} for key in keys}
+    for key, count, amount, days_sum, oldest_due in session.exec(stmt).all():
+        totals[key] = {"count": count, "amount": float(amount), "days_sum": int(days_sum), "oldest_due": oldest_due}
+    return totals
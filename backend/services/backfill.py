@@ -0,0 +1,28 @@
+"""
+Backfill markers for incrementally maintained aggregate tables.
+
+Write paths upsert deltas from the first write on, so a non-empty table
+does not mean it was ever built from history: on an existing database the
+first invoice or journal write would otherwise leave a table holding only
+that write's delta. Each rebuild_*() function records an
+`aggregate_backfill` row in the same transaction as its rebuild, and the
+ensure_*() read guards rebuild whenever the marker is missing — the rebuild
+recomputes from source rows, so deltas written before it are absorbed.
+"""
+
+from datetime import datetime
+
+from sqlmodel import Session, select
+
+from models import AggregateBackfill
+
+
+def is_backfilled(session: Session, name: str) -> bool:
+    return session.exec(select(AggregateBackfill.name).where(AggregateBackfill.name == name)).first() is not None
+
+
+def mark_backfilled(session: Session, name: str) -> None:
+    """Record that `name` was rebuilt from history. Does not commit."""
+    marker = session.get(AggregateBackfill, name) or AggregateBackfill(name=name)
+    marker.completed_at = datetime.utcnow()
+    session.add(marker)
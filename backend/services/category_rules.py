@@ -0,0 +1,199 @@
+"""
+Compiled category-rule engine for bank transaction classification.
+
+Active rules are ranked by (priority, id); a description is assigned the
+lowest-ranked rule that matches it, exactly as the sequential loop did.
+Each match type gets its own index, built once per rule set:
+  - exact       → dict of value → best rank
+  - starts_with → prefix table grouped by length (ascending), one dict
+                  lookup per distinct prefix length
+  - contains    → Aho-Corasick automaton; every node stores the best rank
+                  among the patterns ending there (fail links folded in),
+                  so one pass over the description finds the best match
+  - regex       → patterns compiled once, tried in rank order and only
+                  while they could still beat the best literal match;
+                  a pattern's leading literal, when it has one, is checked
+                  with a substring test before running the regex
+Matching is case-insensitive, like the rule routes document.
+
+Engines are cached per company (None = every active rule, the bank
+statement upload) and rebuilt after category_rules_routes mutates rules;
+RULE_ENGINE_TTL_SECONDS bounds staleness against writes from other
+processes.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from sqlmodel import Session, or_, select
+
+from models import CategoryRule
+
+logger = logging.getLogger(__name__)
+
+RULE_ENGINE_TTL_SECONDS = int(os.getenv("RULE_ENGINE_TTL_SECONDS", 300))
+
+NO_MATCH = float("inf")
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    name: str
+    debit_account: str
+    credit_account: str
+    category_label: Optional[str]
+
+
+_REGEX_SPECIAL = set("\\.^$*+?{}[]()|")
+
+
+def _required_prefix(pattern: str) -> str:
+    """
+    Lowercased literal text every match of `pattern` must contain: its leading
+    run of plain ASCII characters. "" (no prefilter) when the pattern could
+    match without it (alternation, inline flags, a quantifier on the run).
+    """
+    if "|" in pattern or pattern.startswith("(?"):
+        return ""
+    literal = ""
+    for i, char in enumerate(pattern):
+        if char in _REGEX_SPECIAL or not char.isascii():
+            # A quantifier makes the preceding character optional
+            if char in "*?{":
+                literal = literal[:-1]
+            break
+        literal += char
+    return literal.lower()
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher returning the best (lowest) rank of any pattern found."""
+
+    def __init__(self, patterns: Dict[str, int]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._best: List[float] = [NO_MATCH]
+        for pattern, rank in patterns.items():
+            node = 0
+            for char in pattern:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._best.append(NO_MATCH)
+                node = nxt
+            self._best[node] = min(self._best[node], rank)
+
+        # Breadth-first fail links; a node's best includes every pattern ending at its suffixes
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            self._best[node] = min(self._best[node], self._best[self._fail[node]])
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                queue.append(child)
+
+    def best_rank(self, text: str) -> float:
+        goto, fail, best_at = self._goto, self._fail, self._best
+        node, best = 0, best_at[0]
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if best_at[node] < best:
+                best = best_at[node]
+        return best
+
+
+class RuleEngine:
+    def __init__(self, rules: List[CategoryRule]):
+        self.rules: List[CompiledRule] = []
+        exact: Dict[str, int] = {}
+        prefixes: Dict[int, Dict[str, int]] = {}
+        contains: Dict[str, int] = {}
+        self._regexes: List[Tuple[int, Pattern, str]] = []
+
+        for rank, rule in enumerate(rules):
+            self.rules.append(CompiledRule(rule.name, rule.debit_account, rule.credit_account, rule.category_label))
+            value = rule.match_value.lower()
+            if rule.match_type == "exact":
+                exact.setdefault(value, rank)
+            elif rule.match_type == "starts_with":
+                prefixes.setdefault(len(value), {}).setdefault(value, rank)
+            elif rule.match_type == "contains":
+                contains.setdefault(value, rank)
+            elif rule.match_type == "regex":
+                try:
+                    pattern = re.compile(rule.match_value, re.IGNORECASE)
+                except re.error as e:
+                    logger.warning(f"Skipping category rule '{rule.name}': invalid regex ({e})")
+                    continue
+                self._regexes.append((rank, pattern, _required_prefix(rule.match_value)))
+
+        self._exact = exact
+        self._prefixes = sorted(prefixes.items())
+        self._contains = AhoCorasick(contains)
+
+    def match(self, description: str) -> Optional[CompiledRule]:
+        desc = description.lower()
+        best = self._exact.get(desc, NO_MATCH)
+        for length, table in self._prefixes:
+            if length > len(desc):
+                break
+            rank = table.get(desc[:length], NO_MATCH)
+            if rank < best:
+                best = rank
+        rank = self._contains.best_rank(desc)
+        if rank < best:
+            best = rank
+        for rank, pattern, literal in self._regexes:
+            if rank >= best:
+                break
+            if literal not in desc:
+                continue
+            if pattern.search(desc):
+                best = rank
+                break
+        return self.rules[best] if best != NO_MATCH else None
+
+
+_lock = threading.Lock()
+_engines: Dict[Tuple[str, Optional[int]], Tuple[float, RuleEngine]] = {}   # (engine url, company) → (built at, engine)
+_generation = 0   # bumped by invalidate_rule_engines so a build racing a rule change isn't cached
+
+
+def get_rule_engine(session: Session, company_id: Optional[int] = None) -> RuleEngine:
+    """The compiled active rules (a company's own plus global ones, or all when company_id is None)."""
+    key = (str(session.get_bind().url), company_id)
+    with _lock:
+        cached = _engines.get(key)
+        generation = _generation
+    if cached and time.monotonic() - cached[0] <= RULE_ENGINE_TTL_SECONDS:
+        return cached[1]
+
+    stmt = select(CategoryRule).where(CategoryRule.is_active == True).order_by(CategoryRule.priority, CategoryRule.id)
+    if company_id is not None:
+        stmt = stmt.where(or_(CategoryRule.company_id == company_id, CategoryRule.company_id == None))
+    engine = RuleEngine(session.exec(stmt).all())
+    with _lock:
+        if generation == _generation:
+            _engines[key] = (time.monotonic(), engine)
+    return engine
+
+
+def invalidate_rule_engines() -> None:
+    """Drop every compiled engine (call after committing a rule change)."""
+    global _generation
+    with _lock:
+        _engines.clear()
+        _generation += 1
@@ -0,0 +1,142 @@
+"""
+Classification memo: confirmed bank transaction classifications reused for
+repeat merchants, so known transactions skip the model call.
+
+Transactions are keyed by (merchant key, amount sign, cash GL code):
+  - merchant key → the description lowercased, punctuation dropped and
+                   every token containing a digit removed (store numbers,
+                   card suffixes, dates, reference ids), so
+                   "POS AMAZON MKTP #4411 10/12" and "AMAZON MKTP*8812"
+                   share "pos amazon mktp" / "amazon mktp"; descriptions
+                   left with only banking boilerplate ("CHECK 1042",
+                   "ONLINE TRANSFER REF 991") get no key, since they name
+                   no counterparty
+  - amount sign  → 1 for money in, -1 for money out; the same merchant can
+                   be a refund one way and an expense the other
+  - cash GL code → the bank account's ledger account
+
+confirm_bank_statement records the transactions it newly posts, once per
+key per call (last confirmation wins, and confirmed_count restarts when the
+accounts change);
+the upload and Plaid routes look the unmatched transactions up with one IN
+query after category rules and before the model, and report the hit rate.
+Hit confidence grows with consecutive agreeing confirmations (0.85, 0.90,
+0.95, ...): a merchant confirmed once is still flagged for review, one
+confirmed on three separate calls in a row with the same accounts reaches
+the 0.95 posting threshold.
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlmodel import Session, select
+
+from models import ClassificationMemo
+
+MAX_KEY_LENGTH = 120
+MEMO_BASE_CONFIDENCE = 0.85
+MEMO_CONFIDENCE_STEP = 0.05
+MEMO_MAX_CONFIDENCE = 0.99
+
+# Words that describe how money moved rather than who it moved with
+GENERIC_TOKENS = {
+    "ach", "atm", "bill", "branch", "card", "check", "chk", "credit", "debit", "dep", "deposit", "electronic",
+    "ext", "external", "from", "in", "incoming", "internal", "mobile", "online", "out", "outgoing", "payment",
+    "pmt", "pos", "purchase", "recurring", "ref", "reference", "to", "trans", "transaction", "transfer", "trf",
+    "web", "wire", "withdrawal", "xfer",
+}
+
+_SEPARATORS = re.compile(r"[^a-z0-9]+")
+_DIGIT = re.compile(r"\d")
+
+MemoKey = Tuple[str, int, str]   # (merchant key, amount sign, cash GL code)
+
+
+def merchant_key(description: str) -> str:
+    """Normalized description; "" when no counterparty word remains (only numbers, punctuation, boilerplate)."""
+    tokens = [token for token in _SEPARATORS.sub(" ", (description or "").lower()).split() if not _DIGIT.search(token)]
+    if all(token in GENERIC_TOKENS for token in tokens):
+        return ""
+    return " ".join(tokens)[:MAX_KEY_LENGTH]
+
+
+def memo_confidence(confirmed_count: int) -> float:
+    """Confidence of a memo hit: MEMO_BASE_CONFIDENCE after one confirmation, rising per agreeing one."""
+    return round(min(MEMO_MAX_CONFIDENCE, MEMO_BASE_CONFIDENCE + MEMO_CONFIDENCE_STEP * (max(confirmed_count, 1) - 1)), 2)
+
+
+def amount_sign(txn: dict) -> int:
+    """1 for money in, -1 for money out (Plaid rows carry `direction`, statement rows a signed amount)."""
+    if "direction" in txn:
+        return 1 if txn["direction"] == "in" else -1
+    return 1 if (txn.get("amount") or 0) >= 0 else -1
+
+
+def lookup_memos(session: Session, transactions: List[dict], cash_gl_code: str) -> Tuple[List[dict], List[dict]]:
+    """
+    Split transactions into memo hits (classified from the memo) and misses
+    (still need the model), preserving order within each list.
+    """
+    keys = [merchant_key(txn.get("description") or "") for txn in transactions]
+    wanted = {key for key in keys if key}
+    memos: Dict[Tuple[str, int], ClassificationMemo] = {}
+    if wanted:
+        for memo in session.exec(
+            select(ClassificationMemo)
+            .where(ClassificationMemo.cash_gl_code == cash_gl_code, ClassificationMemo.merchant_key.in_(wanted))
+        ).all():
+            memos[(memo.merchant_key, memo.amount_sign)] = memo
+
+    hits, misses = [], []
+    for txn, key in zip(transactions, keys):
+        memo = memos.get((key, amount_sign(txn))) if key else None
+        if memo is None:
+            misses.append(txn)
+            continue
+        hits.append({
+            **txn,
+            "debit_account": memo.debit_account,
+            "credit_account": memo.credit_account,
+            "journal_description": memo.journal_description,
+            "type": memo.type,
+            "confidence": memo_confidence(memo.confirmed_count),
+            "rule_matched": None,
+            "memo_matched": True,
+        })
+    return hits, misses
+
+
+def hit_rate(hits: int, lookups: int) -> float:
+    return round(hits / lookups, 4) if lookups else 0.0
+
+
+def record_classifications(session: Session, confirmed: Dict[MemoKey, dict]) -> None:
+    """
+    Upsert confirmed classifications, keyed by MemoKey, each value holding
+    debit_account, credit_account, journal_description and type. Each call
+    is one confirmation per key; a memo whose accounts change starts
+    counting again. Does not commit.
+    """
+    if not confirmed:
+        return
+    now = datetime.utcnow()
+    existing = {
+        (memo.merchant_key, memo.amount_sign, memo.cash_gl_code): memo
+        for memo in session.exec(
+            select(ClassificationMemo).where(ClassificationMemo.merchant_key.in_({key[0] for key in confirmed}))
+        ).all()
+    }
+    for key, values in confirmed.items():
+        memo = existing.get(key)
+        if memo is None:
+            memo = ClassificationMemo(merchant_key=key[0], amount_sign=key[1], cash_gl_code=key[2], confirmed_count=0)
+        elif (memo.debit_account, memo.credit_account) != (values["debit_account"], values["credit_account"]):
+            memo.confirmed_count = 0
+        memo.debit_account = values["debit_account"]
+        memo.credit_account = values["credit_account"]
+        memo.journal_description = values["journal_description"]
+        memo.type = values["type"]
+        memo.confirmed_count += 1
+        memo.updated_at = now
+        session.add(memo)
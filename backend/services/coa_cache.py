@@ -0,0 +1,44 @@
+"""
+Process-wide chart-of-accounts code → id cache for journal posting.
+
+Every invoice transition, AP approval and bank transaction resolves its
+account codes; account_ids() serves known codes from memory and fetches
+the rest with one IN query. Codes that don't exist are not cached, so an
+account created anywhere (another process, a seed script) is picked up on
+its first use. create_account calls invalidate_account_codes() after
+committing.
+"""
+
+import threading
+from typing import Dict, Iterable
+
+from sqlmodel import Session, select
+
+from models import ChartOfAccount
+
+_lock = threading.Lock()
+_ids: Dict[str, Dict[str, int]] = {}   # engine url → {code: account id}
+
+
+def account_ids(session: Session, codes: Iterable[str]) -> Dict[str, int]:
+    """{code: account id} for the given codes that exist; unknown codes are omitted."""
+    codes = set(codes)
+    key = str(session.get_bind().url)
+    with _lock:
+        cached = _ids.setdefault(key, {})
+        found = {code: cached[code] for code in codes if code in cached}
+
+    missing = codes - found.keys()
+    if missing:
+        fetched = dict(session.exec(
+            select(ChartOfAccount.code, ChartOfAccount.id).where(ChartOfAccount.code.in_(missing))
+        ).all())
+        with _lock:
+            _ids.setdefault(key, {}).update(fetched)
+        found.update(fetched)
+    return found
+
+
+def invalidate_account_codes() -> None:
+    with _lock:
+        _ids.clear()
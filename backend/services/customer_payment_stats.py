@@ -0,0 +1,143 @@
+"""
+Incrementally maintained per-customer payment statistics.
+
+One `customer_payment_stats` row per customer holds the counters that
+customer reports and the risk model used to rebuild from invoice history:
+paid / total / overdue counts plus days-late count, sum and sum of squares
+(mean and variance of payment lateness) and the last payment date.
+
+Invoice write paths call record_payment_changes() with each invoice's
+(customer_id, status, due date, date_paid) before and after the write,
+inside the same transaction. Counter deltas are merged per customer and
+applied with one additive upsert; last_payment_date is re-derived with a
+single correlated UPDATE for customers whose paid invoices changed.
+rebuild_customer_payment_stats() recomputes every row, lazily on first use
+until the rebuild has been recorded (services.backfill).
+"""
+
+import math
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, update
+from sqlmodel import Session, select
+
+from models import CustomerPaymentStats, Invoice
+from services.backfill import is_backfilled, mark_backfilled
+from services.upsert import upsert_increments
+
+# (customer_id, invoice_status, invoice_due_date, date_paid) — None for "did not exist"
+PaymentState = Optional[Tuple[int, str, date, Optional[datetime]]]
+
+COUNTER_COLUMNS = (
+    "total_count", "paid_count", "overdue_count", "payment_count",
+    "late_count", "days_late_sum", "days_late_sq_sum",
+)
+
+BACKFILL_NAME = "customer_payment_stats"
+
+_checked = set()   # engine urls already verified as backfilled
+
+
+def _contribution(state: PaymentState) -> Tuple[int, ...]:
+    """Counter values a single invoice in `state` adds to its customer's row."""
+    _, status, due_date, date_paid = state
+    total = 1 if status != "cancelled" else 0
+    paid = 1 if status == "paid" else 0
+    overdue = 1 if status == "overdue" else 0
+    if paid and date_paid and due_date:
+        days_late = (date_paid.date() - due_date).days   # negative = paid early
+        return (total, paid, overdue, 1, 1 if days_late > 0 else 0, days_late, days_late * days_late)
+    return (total, paid, overdue, 0, 0, 0, 0)
+
+
+def record_payment_changes(session: Session, changes: Iterable[Tuple[PaymentState, PaymentState]]) -> None:
+    """Apply before/after invoice states to customer_payment_stats. Does not commit."""
+    deltas: Dict[int, list] = {}
+    payments_changed = set()
+    for before, after in changes:
+        if before == after:
+            continue
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            customer_id = state[0]
+            counters = deltas.setdefault(customer_id, [0] * len(COUNTER_COLUMNS))
+            contribution = _contribution(state)
+            for i, value in enumerate(contribution):
+                counters[i] += sign * value
+            if contribution[1]:
+                payments_changed.add(customer_id)
+
+    rows = [
+        {"customer_id": customer_id, **dict(zip(COUNTER_COLUMNS, counters))}
+        for customer_id, counters in deltas.items()
+        if any(counters)
+    ]
+    upsert_increments(session, CustomerPaymentStats, ("customer_id",), rows)
+
+    if payments_changed:
+        session.flush()
+        last_paid = (
+            select(func.max(Invoice.date_paid))
+            .where(Invoice.customer_id == CustomerPaymentStats.customer_id, Invoice.invoice_status == "paid")
+            .scalar_subquery()
+        )
+        session.execute(
+            update(CustomerPaymentStats)
+            .where(CustomerPaymentStats.customer_id.in_(payments_changed))
+            .values(last_payment_date=last_paid)
+        )
+
+
+def payment_summary(stats: Optional[CustomerPaymentStats]) -> dict:
+    """Derived lateness metrics for one stats row (defaults when there is no history)."""
+    if not stats or not stats.payment_count:
+        return {"avg_days_late": 0, "days_late_std": 0, "late_rate": 0.5, "invoice_count": 0}
+    n = stats.payment_count
+    mean = stats.days_late_sum / n
+    variance = max(stats.days_late_sq_sum / n - mean * mean, 0.0)
+    return {
+        "avg_days_late": mean,
+        "days_late_std": math.sqrt(variance),
+        "late_rate": stats.late_count / n,
+        "invoice_count": n,
+    }
+
+
+def rebuild_customer_payment_stats(session: Session) -> int:
+    """Recompute every customer's row from invoice history in one pass. Commits."""
+    totals: Dict[int, list] = {}
+    last_paid: Dict[int, datetime] = {}
+    rows = session.execute(
+        select(Invoice.customer_id, Invoice.invoice_status, Invoice.invoice_due_date, Invoice.date_paid)
+        .execution_options(yield_per=5000)
+    )
+    for state in rows:
+        customer_id, status, _, date_paid = state
+        counters = totals.setdefault(customer_id, [0] * len(COUNTER_COLUMNS))
+        for i, value in enumerate(_contribution(tuple(state))):
+            counters[i] += value
+        if status == "paid" and date_paid and (customer_id not in last_paid or date_paid > last_paid[customer_id]):
+            last_paid[customer_id] = date_paid
+
+    session.execute(delete(CustomerPaymentStats))
+    if totals:
+        session.execute(insert(CustomerPaymentStats), [
+            {"customer_id": customer_id, **dict(zip(COUNTER_COLUMNS, counters)),
+             "last_payment_date": last_paid.get(customer_id)}
+            for customer_id, counters in totals.items()
+        ])
+    mark_backfilled(session, BACKFILL_NAME)
+    session.commit()
+    return len(totals)
+
+
+def ensure_customer_payment_stats(session: Session) -> None:
+    """Rebuild from invoice history unless a completed backfill is recorded (checked once per process)."""
+    key = str(session.get_bind().url)
+    if key in _checked:
+        return
+    if not is_backfilled(session, BACKFILL_NAME):
+        rebuild_customer_payment_stats(session)
+    _checked.add(key)
@@ -0,0 +1,286 @@
+"""
+Comparative financial statements: income statement, balance sheet and
+indirect cash flow over consecutive month / quarter / year periods.
+
+Every statement is built from one account × period matrix of net
+movements (debit positive):
+  - one columnar fetch of (account_id, month, debit, credit) rows — whole
+    months come from `account_period_total` (O(accounts × months) rows,
+    however many journal lines there are); a trailing partial month, or
+    every month with ACCOUNT_BALANCE_CACHE=false, is grouped from
+    `journal_line` in SQL;
+  - np.bincount over (account index, period index) folds the rows into
+    the matrix; balances are the opening vector plus a cumulative sum
+    along the period axis.
+Statements are signed by normal balance when rendered, so a revenue or
+liability amount reads positive.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Integer, cast, extract
+from sqlmodel import Session, func, select
+
+from models import AccountPeriodTotal, BankAccount, ChartOfAccount, JournalEntry, JournalLine
+from services.account_balances import ACCOUNT_BALANCE_CACHE, ensure_account_balances
+from services.periods import month_end
+
+MONTHS_PER_PERIOD = {"month": 1, "quarter": 3, "year": 12}
+MAX_STATEMENT_PERIODS = 60
+
+Period = Tuple[date, date]
+
+
+# ── Periods ───────────────────────────────────────────────────────────────────
+
+def _month_key(day: date) -> int:
+    return day.year * 12 + day.month - 1
+
+
+def _add_months(day: date, months: int) -> date:
+    key = _month_key(day) + months
+    return date(key // 12, key % 12 + 1, 1)
+
+
+def build_periods(start_date: date, end_date: date, granularity: str) -> List[Period]:
+    """Consecutive periods from start_date's month through end_date; the last may be partial."""
+    if granularity not in MONTHS_PER_PERIOD:
+        raise ValueError(f"Unknown granularity '{granularity}'. Valid: {', '.join(MONTHS_PER_PERIOD)}")
+    if end_date < start_date:
+        raise ValueError("end_date must not be before start_date")
+    step = MONTHS_PER_PERIOD[granularity]
+    periods = []
+    period_start = start_date.replace(day=1)
+    while period_start <= end_date:
+        next_start = _add_months(period_start, step)
+        periods.append((period_start, min(next_start - timedelta(days=1), end_date)))
+        period_start = next_start
+    if len(periods) > MAX_STATEMENT_PERIODS:
+        raise ValueError(f"At most {MAX_STATEMENT_PERIODS} periods per statement")
+    return periods
+
+
+def default_range(today: Optional[date] = None) -> Period:
+    """The twelve months ending with the current one."""
+    today = today or date.today()
+    return _add_months(today.replace(day=1), -11), today
+
+
+def _period_label(period: Period, granularity: str) -> str:
+    start, end = period
+    if granularity == "month" or (start.year, start.month) == (end.year, end.month):
+        return start.strftime("%b %Y")
+    return f"{start.strftime('%b %Y')} - {end.strftime('%b %Y')}"
+
+
+# ── Columnar fetch + aggregation ──────────────────────────────────────────────
+
+def _grouped_lines(session: Session, start: Optional[date], end: date) -> list:
+    """(account_id, month key, debit, credit) per account and month, grouped from journal_line."""
+    year = cast(extract("year", JournalEntry.entry_date), Integer)
+    month = cast(extract("month", JournalEntry.entry_date), Integer)
+    stmt = (
+        select(
+            JournalLine.account_id,
+            year * 12 + month - 1,
+            func.coalesce(func.sum(JournalLine.debit), 0.0),
+            func.coalesce(func.sum(JournalLine.credit), 0.0),
+        )
+        .join(JournalEntry, JournalLine.journal_entry_id == JournalEntry.id)
+        .where(JournalEntry.entry_date <= end)
+        .group_by(JournalLine.account_id, year, month)
+    )
+    if start is not None:
+        stmt = stmt.where(JournalEntry.entry_date >= start)
+    return session.execute(stmt).all()
+
+
+def _monthly_rows(session: Session, start: date, end: date) -> np.ndarray:
+    """(account_id, month key, debit, credit) rows covering lines dated in [start, end] (start is a month start)."""
+    rows = []
+    partial_start = start
+    if ACCOUNT_BALANCE_CACHE:
+        ensure_account_balances(session)
+        last_full = end if end == month_end(end) else end.replace(day=1) - timedelta(days=1)
+        if last_full >= start:
+            key = AccountPeriodTotal.year * 12 + AccountPeriodTotal.month - 1
+            rows = session.execute(
+                select(AccountPeriodTotal.account_id, key, AccountPeriodTotal.debit_total, AccountPeriodTotal.credit_total)
+                .where(key >= _month_key(start), key <= _month_key(last_full))
+            ).all()
+            partial_start = last_full + timedelta(days=1)
+    if partial_start <= end:
+        rows = [*rows, *_grouped_lines(session, partial_start, end)]
+    return np.array(rows, dtype=float).reshape(-1, 4)
+
+
+def _opening_rows(session: Session, before: date) -> np.ndarray:
+    """(account_id, debit, credit) totals of every line dated before `before` (a month start)."""
+    if ACCOUNT_BALANCE_CACHE:
+        ensure_account_balances(session)
+        key = AccountPeriodTotal.year * 12 + AccountPeriodTotal.month - 1
+        rows = session.execute(
+            select(
+                AccountPeriodTotal.account_id,
+                func.sum(AccountPeriodTotal.debit_total),
+                func.sum(AccountPeriodTotal.credit_total),
+            )
+            .where(key < _month_key(before))
+            .group_by(AccountPeriodTotal.account_id)
+        ).all()
+    else:
+        rows = [(account_id, debit, credit) for account_id, _, debit, credit
+                in _grouped_lines(session, None, before - timedelta(days=1))]
+    return np.array(rows, dtype=float).reshape(-1, 3)
+
+
+def _account_index(account_ids: np.ndarray, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Row positions of `ids` in the sorted `account_ids`, and a mask of ids that are present."""
+    if not len(account_ids):
+        return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
+    index = np.searchsorted(account_ids, ids).clip(max=len(account_ids) - 1)
+    return index, account_ids[index] == ids
+
+
+def movement_matrix(session: Session, account_ids: np.ndarray, periods: Sequence[Period], step: int) -> np.ndarray:
+    """accounts × periods matrix of net movements (debit - credit)."""
+    rows = _monthly_rows(session, periods[0][0], periods[-1][1])
+    ids = rows[:, 0].astype(np.int64)
+    period_index = (rows[:, 1].astype(np.int64) - _month_key(periods[0][0])) // step
+    index, present = _account_index(account_ids, ids)
+
+    n_periods = len(periods)
+    flat = index[present] * n_periods + period_index[present]
+    net = rows[present, 2] - rows[present, 3]
+    return np.bincount(flat, weights=net, minlength=len(account_ids) * n_periods).reshape(len(account_ids), n_periods)
+
+
+def opening_vector(session: Session, account_ids: np.ndarray, before: date) -> np.ndarray:
+    """Net balance (debit - credit) of each account before `before`."""
+    rows = _opening_rows(session, before)
+    index, present = _account_index(account_ids, rows[:, 0].astype(np.int64))
+    return np.bincount(index[present], weights=rows[present, 1] - rows[present, 2], minlength=len(account_ids))
+
+
+# ── Statements ────────────────────────────────────────────────────────────────
+
+def _accounts(session: Session) -> Tuple[List[ChartOfAccount], np.ndarray, np.ndarray]:
+    """Accounts ordered by id, their ids, and the sign that makes each normal balance positive."""
+    accounts = session.exec(select(ChartOfAccount).order_by(ChartOfAccount.id)).all()
+    ids = np.array([a.id for a in accounts], dtype=np.int64)
+    signs = np.array([1.0 if a.normal_balance == "debit" else -1.0 for a in accounts])
+    return accounts, ids, signs
+
+
+def _amounts(values: np.ndarray) -> List[float]:
+    # + 0.0 turns the -0.0 of zero credit-normal balances into 0.0
+    return [round(float(v), 2) + 0.0 for v in values]
+
+
+def _section(accounts: List[ChartOfAccount], signed: np.ndarray, types: Sequence[str]) -> Dict[str, Any]:
+    """Rows for the given account types (zero rows of inactive accounts dropped) and per-period totals."""
+    rows, total = [], np.zeros(signed.shape[1])
+    for i, account in enumerate(accounts):
+        if account.account_type not in types or (not account.is_active and not signed[i].any()):
+            continue
+        rows.append({"code": account.code, "name": account.name, "account_type": account.account_type,
+                     "amounts": _amounts(signed[i])})
+        total += signed[i]
+    rows.sort(key=lambda row: row["code"])
+    return {"accounts": rows, "total": _amounts(total)}
+
+
+def _periods_out(periods: Sequence[Period], granularity: str) -> List[Dict[str, str]]:
+    return [{"start": str(start), "end": str(end), "label": _period_label((start, end), granularity)}
+            for start, end in periods]
+
+
+def income_statement(session: Session, periods: Sequence[Period], granularity: str) -> Dict[str, Any]:
+    accounts, ids, signs = _accounts(session)
+    signed = movement_matrix(session, ids, periods, MONTHS_PER_PERIOD[granularity]) * signs[:, None]
+
+    revenue = _section(accounts, signed, ("revenue",))
+    expenses = _section(accounts, signed, ("expense",))
+    net_income = np.array(revenue["total"]) - np.array(expenses["total"])
+    return {
+        "periods": _periods_out(periods, granularity),
+        "revenue": revenue,
+        "expenses": expenses,
+        "net_income": _amounts(net_income),
+    }
+
+
+def balance_sheet(session: Session, periods: Sequence[Period], granularity: str) -> Dict[str, Any]:
+    """Balances at each period end; revenue less expenses to date is shown as current earnings in equity."""
+    accounts, ids, signs = _accounts(session)
+    movements = movement_matrix(session, ids, periods, MONTHS_PER_PERIOD[granularity])
+    balances = opening_vector(session, ids, periods[0][0])[:, None] + np.cumsum(movements, axis=1)
+    signed = balances * signs[:, None]
+
+    assets = _section(accounts, signed, ("asset",))
+    liabilities = _section(accounts, signed, ("liability",))
+    equity = _section(accounts, signed, ("equity",))
+    is_earnings = np.array([a.account_type in ("revenue", "expense") for a in accounts], dtype=bool)
+    earnings = -balances[is_earnings].sum(axis=0) if is_earnings.any() else np.zeros(len(periods))
+    total_equity = np.array(equity["total"]) + earnings
+    total_liabilities_and_equity = _amounts(np.array(liabilities["total"]) + total_equity)
+    return {
+        "periods": _periods_out(periods, granularity),
+        "as_of": [str(end) for _, end in periods],
+        "assets": assets,
+        "liabilities": liabilities,
+        "equity": {**equity, "current_earnings": _amounts(earnings), "total": _amounts(total_equity)},
+        "total_liabilities_and_equity": total_liabilities_and_equity,
+        "balanced": [a == b for a, b in zip(assets["total"], total_liabilities_and_equity)],
+    }
+
+
+def _cash_codes(session: Session) -> set:
+    return {"1000"} | set(session.exec(select(BankAccount.gl_account_code)).all())
+
+
+def cash_flow_statement(session: Session, periods: Sequence[Period], granularity: str) -> Dict[str, Any]:
+    """
+    Indirect method: net income adjusted by changes in non-cash assets and
+    liabilities (operating) plus equity movements (financing). The chart of
+    accounts has no fixed-asset type, so there is no investing section.
+    """
+    accounts, ids, _ = _accounts(session)
+    movements = movement_matrix(session, ids, periods, MONTHS_PER_PERIOD[granularity])
+    cash_codes = _cash_codes(session)
+    is_cash = np.array([a.code in cash_codes for a in accounts], dtype=bool)
+    types = np.array([a.account_type for a in accounts])
+
+    def total(mask) -> np.ndarray:
+        return movements[mask].sum(axis=0) if mask.any() else np.zeros(len(periods))
+
+    net_income = -total((types == "revenue") | (types == "expense"))
+    adjustments = []
+    for i, account in enumerate(accounts):
+        if is_cash[i] or account.account_type not in ("asset", "liability") or not movements[i].any():
+            continue
+        # An increase in a non-cash asset uses cash; an increase in a liability provides it
+        adjustments.append({"code": account.code, "name": account.name, "amounts": _amounts(-movements[i])})
+    adjustments.sort(key=lambda row: row["code"])
+    working_capital = -total(~is_cash & np.isin(types, ("asset", "liability")))
+    operating = net_income + working_capital
+    financing = -total(types == "equity")
+
+    opening_cash = opening_vector(session, ids, periods[0][0])[is_cash].sum()
+    net_change = operating + financing
+    closing_cash = opening_cash + np.cumsum(net_change)
+    return {
+        "periods": _periods_out(periods, granularity),
+        "operating": {
+            "net_income": _amounts(net_income),
+            "adjustments": adjustments,
+            "total": _amounts(operating),
+        },
+        "financing": {"total": _amounts(financing)},
+        "net_change_in_cash": _amounts(net_change),
+        "opening_cash": _amounts(np.concatenate(([opening_cash], closing_cash[:-1]))),
+        "closing_cash": _amounts(closing_cash),
+        "cash_accounts": sorted(code for code in cash_codes if code in {a.code for a in accounts}),
+    }
@@ -0,0 +1,180 @@
+"""
+Projection read path for invoice list/detail responses.
+
+Selects only the columns the API returns with Core select(), builds the
+nested InvoiceMinimalResponse-shaped dicts straight from row tuples
+(line items grouped by invoice id) and serializes them with orjson when
+available. No ORM objects or Pydantic models are built on the way out.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlmodel import Session
+
+from models import Customer, Invoice, LineItem, Product
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+INVOICE_COLUMNS = (
+    Invoice.id,
+    Invoice.customer_id,
+    Invoice.date_issued,
+    Invoice.invoice_terms,
+    Invoice.invoice_due_date,
+    Invoice.invoice_total,
+    Invoice.invoice_status,
+    Invoice.date_submitted,
+    Invoice.date_sent,
+    Invoice.date_paid,
+    Invoice.date_cancelled,
+    Customer.customer_name,
+    Customer.customer_address,
+    Customer.customer_phone,
+    Customer.customer_email,
+)
+
+IN_CHUNK_SIZE = 1000
+
+LINE_ITEM_COLUMNS = (
+    LineItem.invoice_id,
+    LineItem.lineitem_id,
+    LineItem.lineitem_qty,
+    LineItem.lineitem_total,
+    LineItem.product_id,
+    Product.product_description,
+    Product.product_price,
+)
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize a response payload; orjson when installed, stdlib json otherwise."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=_json_default, separators=(",", ":")).encode()
+
+
+def encode_cursor(date_issued: date, invoice_id: int) -> str:
+    """Opaque keyset cursor for the (date_issued, id) of the last row served."""
+    raw = f"{date_issued.isoformat()}|{invoice_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        issued, invoice_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return date.fromisoformat(issued), int(invoice_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def invoice_list_statement(
+    limit: Optional[int] = None,
+    after: Optional[Tuple[date, int]] = None,
+    status: Optional[str] = None,
+    customer_id: Optional[int] = None,
+):
+    """
+    Newest-first invoice header rows keyed on (date_issued, id).
+
+    Equality filters on status / customer_id let the planner use
+    idx_status_date / idx_customer_date for the range scan.
+    """
+    statement = (
+        select(*INVOICE_COLUMNS)
+        .join(Customer, Invoice.customer_id == Customer.customer_id)
+        .order_by(Invoice.date_issued.desc(), Invoice.id.desc())
+        .limit(limit)
+    )
+    if status:
+        statement = statement.where(Invoice.invoice_status == status)
+    if customer_id:
+        statement = statement.where(Invoice.customer_id == customer_id)
+    if after:
+        statement = statement.where(tuple_(Invoice.date_issued, Invoice.id) < tuple_(*after))
+    return statement
+
+
+def _line_items_by_invoice(session: Session, invoice_ids: Iterable[int]) -> Dict[int, List[dict]]:
+    grouped: Dict[int, List[dict]] = {}
+    invoice_ids = list(invoice_ids)
+    rows = []
+    # Chunk the IN list so unpaginated reads stay within driver bind-parameter limits
+    for start in range(0, len(invoice_ids), IN_CHUNK_SIZE):
+        rows.extend(session.execute(
+            select(*LINE_ITEM_COLUMNS)
+            .outerjoin(Product, LineItem.product_id == Product.product_id)
+            .where(LineItem.invoice_id.in_(invoice_ids[start:start + IN_CHUNK_SIZE]))
+            .order_by(LineItem.invoice_id, LineItem.lineitem_id)
+        ).all())
+    for invoice_id, lineitem_id, qty, total, product_id, description, price in rows:
+        grouped.setdefault(invoice_id, []).append({
+            "lineitem_id": lineitem_id,
+            "lineitem_qty": qty,
+            "lineitem_total": total,
+            "product_id": product_id,
+            "product": {
+                "product_id": product_id,
+                "product_description": description,
+                "product_price": price,
+            } if description is not None else None,
+        })
+    return grouped
+
+
+def fetch_invoices(session: Session, statement) -> List[dict]:
+    """Run an invoice header statement and attach line items (one query per IN chunk)."""
+    rows = session.execute(statement).all()
+    line_items = _line_items_by_invoice(session, (row[0] for row in rows))
+    return [
+        {
+            "id": invoice_id,
+            "customer_id": customer_id,
+            "date_issued": date_issued,
+            "invoice_terms": terms,
+            "invoice_due_date": due_date,
+            "invoice_total": total,
+            "invoice_status": status,
+            "date_submitted": date_submitted,
+            "date_sent": date_sent,
+            "date_paid": date_paid,
+            "date_cancelled": date_cancelled,
+            "customer": {
+                "customer_id": customer_id,
+                "customer_name": name,
+                "customer_address": address,
+                "customer_phone": phone,
+                "customer_email": email,
+            },
+            "line_items": line_items.get(invoice_id, []),
+        }
+        for (invoice_id, customer_id, date_issued, terms, due_date, total, status,
+             date_submitted, date_sent, date_paid, date_cancelled,
+             name, address, phone, email) in rows
+    ]
+
+
+def fetch_invoice(session: Session, invoice_id: int) -> Optional[dict]:
+    statement = (
+        select(*INVOICE_COLUMNS)
+        .join(Customer, Invoice.customer_id == Customer.customer_id)
+        .where(Invoice.id == invoice_id)
+    )
+    invoices = fetch_invoices(session, statement)
+    return invoices[0] if invoices else None
@@ -0,0 +1,187 @@
+"""
+General ledger pages with running balances.
+
+An account's lines are ordered by (entry_date, journal_entry_id, line id).
+A page starts at a position — a keyset cursor from the previous page, or
+the first line on / after `from` — and its opening balance is the
+account's net movement before that position:
+  - the monthly checkpoints in `account_period_total` for every earlier
+    month (O(months) rows, maintained by services.account_balances);
+  - plus one SUM over the lines earlier in the same month.
+Running balances are then accumulated over the page only, so a page costs
+the same however many lines precede it. With ACCOUNT_BALANCE_CACHE=false
+the opening balance is summed from `journal_line` directly.
+
+iter_ledger_rows() walks the whole range in keyset chunks for the CSV
+export without holding the ledger in memory.
+"""
+
+import base64
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlmodel import Session, func, select
+
+from models import AccountPeriodTotal, ChartOfAccount, JournalEntry, JournalLine
+from services.account_balances import ACCOUNT_BALANCE_CACHE, ensure_account_balances
+
+# (entry_date, journal_entry_id, journal_line id) of the last line already returned
+LedgerPosition = Tuple[date, int, int]
+
+
+def encode_ledger_cursor(position: LedgerPosition) -> str:
+    entry_date, entry_id, line_id = position
+    return base64.urlsafe_b64encode(f"{entry_date.isoformat()}|{entry_id}|{line_id}".encode()).decode()
+
+
+def decode_ledger_cursor(cursor: str) -> LedgerPosition:
+    """Raises ValueError for malformed cursors."""
+    try:
+        entry_date, entry_id, line_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return date.fromisoformat(entry_date), int(entry_id), int(line_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _line_key():
+    return tuple_(JournalEntry.entry_date, JournalEntry.id, JournalLine.id)
+
+
+def _ledger_statement(
+    account_id: int,
+    after: Optional[LedgerPosition],
+    from_date: Optional[date],
+    to_date: Optional[date],
+    limit: int,
+):
+    stmt = (
+        select(
+            JournalLine.id,
+            JournalEntry.id.label("journal_entry_id"),
+            JournalEntry.entry_date,
+            JournalEntry.description,
+            JournalEntry.reference_type,
+            JournalEntry.reference_id,
+            JournalLine.debit,
+            JournalLine.credit,
+        )
+        .join(JournalEntry, JournalLine.journal_entry_id == JournalEntry.id)
+        .where(JournalLine.account_id == account_id)
+        .order_by(JournalEntry.entry_date, JournalEntry.id, JournalLine.id)
+        .limit(limit)
+    )
+    if after:
+        stmt = stmt.where(_line_key() > tuple_(*after))
+    elif from_date:
+        stmt = stmt.where(JournalEntry.entry_date >= from_date)
+    if to_date:
+        stmt = stmt.where(JournalEntry.entry_date <= to_date)
+    return stmt
+
+
+def _totals_before(
+    session: Session,
+    account_id: int,
+    after: Optional[LedgerPosition],
+    from_date: Optional[date],
+) -> Tuple[float, float]:
+    """(debit, credit) totals of the account's lines before the page's first line."""
+    if after:
+        start, before_position = after[0], _line_key() <= tuple_(*after)
+    elif from_date:
+        start, before_position = from_date, JournalEntry.entry_date < from_date
+    else:
+        return 0.0, 0.0
+
+    lines = (
+        select(func.coalesce(func.sum(JournalLine.debit), 0.0), func.coalesce(func.sum(JournalLine.credit), 0.0))
+        .select_from(JournalLine)
+        .join(JournalEntry, JournalLine.journal_entry_id == JournalEntry.id)
+        .where(JournalLine.account_id == account_id, before_position)
+    )
+    if not ACCOUNT_BALANCE_CACHE:
+        return tuple(session.exec(lines).one())
+
+    # Closed months from the checkpoints, then only this month's earlier lines
+    ensure_account_balances(session)
+    checkpoint_debit, checkpoint_credit = session.exec(
+        select(
+            func.coalesce(func.sum(AccountPeriodTotal.debit_total), 0.0),
+            func.coalesce(func.sum(AccountPeriodTotal.credit_total), 0.0),
+        )
+        .where(
+            AccountPeriodTotal.account_id == account_id,
+            AccountPeriodTotal.year * 12 + AccountPeriodTotal.month < start.year * 12 + start.month,
+        )
+    ).one()
+    debit, credit = session.exec(lines.where(JournalEntry.entry_date >= start.replace(day=1))).one()
+    return checkpoint_debit + debit, checkpoint_credit + credit
+
+
+def _signed(account: ChartOfAccount, debit: float, credit: float) -> float:
+    return debit - credit if account.normal_balance == "debit" else credit - debit
+
+
+def _ledger_row(row, balance: float) -> Dict[str, Any]:
+    return {
+        "journal_entry_id": row.journal_entry_id,
+        "entry_date": str(row.entry_date),
+        "description": row.description,
+        "reference_type": row.reference_type,
+        "reference_id": row.reference_id,
+        "debit": row.debit,
+        "credit": row.credit,
+        "balance": round(balance, 2),
+    }
+
+
+def get_ledger_page(
+    session: Session,
+    account: ChartOfAccount,
+    after: Optional[LedgerPosition] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    limit: int = 500,
+) -> Dict[str, Any]:
+    """One page of the account's ledger, starting after `after` (or at `from_date`)."""
+    opening = _signed(account, *_totals_before(session, account.id, after, from_date))
+
+    rows = session.exec(_ledger_statement(account.id, after, from_date, to_date, limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    running = opening
+    lines: List[Dict[str, Any]] = []
+    for row in rows:
+        running += _signed(account, row.debit, row.credit)
+        lines.append(_ledger_row(row, running))
+
+    last = rows[-1] if rows else None
+    return {
+        "opening_balance": round(opening, 2),
+        "lines": lines,
+        "closing_balance": round(running, 2),
+        "next_cursor": encode_ledger_cursor((last.entry_date, last.journal_entry_id, last.id)) if has_more else None,
+    }
+
+
+def iter_ledger_rows(
+    session: Session,
+    account: ChartOfAccount,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    chunk_size: int = 5000,
+) -> Iterator[Dict[str, Any]]:
+    """Every ledger line in the range with its running balance, fetched in keyset chunks."""
+    running = _signed(account, *_totals_before(session, account.id, None, from_date))
+    after = None
+    while True:
+        rows = session.exec(_ledger_statement(account.id, after, from_date, to_date, chunk_size)).all()
+        for row in rows:
+            running += _signed(account, row.debit, row.credit)
+            yield _ledger_row(row, running)
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
+        after = (last.entry_date, last.journal_entry_id, last.id)
@@ -0,0 +1,196 @@
+"""
+Period close: monthly closing-balance snapshots and posting locks.
+
+close_periods(through) closes every month up to `through` that is not
+closed yet, oldest first. Each close records the month in
+`accounting_period` and writes `account_balance_snapshot` rows — every
+account's cumulative debit / credit totals through the month's last day —
+computed as the previous snapshot plus one grouped query over that
+month's lines.
+
+Closed months are locked: manual entries and bank statement imports dated
+on or before the latest closed period_end are rejected
+(PeriodClosedError), and system postings (invoice and AP transitions) are
+dated on the first open day instead. Snapshot rows therefore never change
+and are memoised per process without expiry.
+
+balances_as_of(day) reads the nearest snapshot on or before the day plus
+only the journal lines after it, so dated statements cost O(accounts +
+lines since that close) instead of summing `journal_line` from the
+beginning. Fiscal years follow Company.fiscal_year_start and are labelled
+by the calendar year they end in.
+"""
+
+import calendar
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlmodel import Session, func, select
+
+from models import AccountBalanceSnapshot, AccountingPeriod, Company, JournalEntry, JournalLine
+
+Totals = Dict[int, Tuple[float, float]]   # account_id → (debit total, credit total)
+
+_lock = threading.Lock()
+_snapshots: Dict[Tuple[str, date], Totals] = {}   # (engine url, period_end) → totals
+
+
+class PeriodClosedError(ValueError):
+    """Raised when a posting is dated inside a closed period."""
+
+
+# ── Calendar helpers ──────────────────────────────────────────────────────────
+
+def month_end(day: date) -> date:
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def fiscal_year_start_month(session: Session) -> int:
+    return session.exec(select(Company.fiscal_year_start).order_by(Company.id).limit(1)).first() or 1
+
+
+def fiscal_year_of(day: date, start_month: int) -> int:
+    return day.year + 1 if start_month > 1 and day.month >= start_month else day.year
+
+
+def fiscal_year_bounds(fiscal_year: int, start_month: int) -> Tuple[date, date]:
+    start = date(fiscal_year if start_month == 1 else fiscal_year - 1, start_month, 1)
+    return start, month_end(date(start.year + 1, start.month, 1) - timedelta(days=1))
+
+
+# ── Locks ─────────────────────────────────────────────────────────────────────
+
+def closed_through(session: Session) -> Optional[date]:
+    """End of the latest closed period (None while no period is closed)."""
+    return session.exec(select(func.max(AccountingPeriod.period_end))).one()
+
+
+def check_period_open(session: Session, entry_dates: Iterable[date]) -> None:
+    """Raise PeriodClosedError if any date falls in a closed period."""
+    through = closed_through(session)
+    if through is None:
+        return
+    locked = sorted({day for day in entry_dates if day <= through})
+    if locked:
+        shown = ", ".join(str(day) for day in locked[:5]) + (" ..." if len(locked) > 5 else "")
+        raise PeriodClosedError(f"Books are closed through {through}; cannot post entries dated {shown}")
+
+
+def open_entry_date(entry_date: date, through: Optional[date]) -> date:
+    """The entry date, moved to the first open day if `through` (closed_through()) covers it."""
+    if through is not None and entry_date <= through:
+        return through + timedelta(days=1)
+    return entry_date
+
+
+# ── Snapshots ─────────────────────────────────────────────────────────────────
+
+def _line_totals(session: Session, after: Optional[date], through: date) -> Totals:
+    """Per-account totals of lines dated in (after, through]."""
+    stmt = (
+        select(
+            JournalLine.account_id,
+            func.coalesce(func.sum(JournalLine.debit), 0.0),
+            func.coalesce(func.sum(JournalLine.credit), 0.0),
+        )
+        .join(JournalEntry, JournalLine.journal_entry_id == JournalEntry.id)
+        .where(JournalEntry.entry_date <= through)
+        .group_by(JournalLine.account_id)
+    )
+    if after is not None:
+        stmt = stmt.where(JournalEntry.entry_date > after)
+    return {account_id: (debit, credit) for account_id, debit, credit in session.exec(stmt).all()}
+
+
+def _add(totals: Totals, delta: Totals) -> Totals:
+    merged = dict(totals)
+    for account_id, (debit, credit) in delta.items():
+        previous_debit, previous_credit = merged.get(account_id, (0.0, 0.0))
+        merged[account_id] = (previous_debit + debit, previous_credit + credit)
+    return merged
+
+
+def snapshot(session: Session, period_end: date) -> Totals:
+    """A closed period's cumulative totals (immutable, so cached for the life of the process)."""
+    key = (str(session.get_bind().url), period_end)
+    with _lock:
+        if key in _snapshots:
+            return _snapshots[key]
+    rows = session.exec(
+        select(AccountBalanceSnapshot.account_id, AccountBalanceSnapshot.debit_total, AccountBalanceSnapshot.credit_total)
+        .where(AccountBalanceSnapshot.period_end == period_end)
+    ).all()
+    totals = {account_id: (debit, credit) for account_id, debit, credit in rows}
+    with _lock:
+        _snapshots[key] = totals
+    return totals
+
+
+def balances_as_of(session: Session, as_of: date) -> Totals:
+    """Cumulative per-account totals through `as_of`: nearest snapshot + the lines after it."""
+    snapshot_end = session.exec(
+        select(func.max(AccountingPeriod.period_end)).where(AccountingPeriod.period_end <= as_of)
+    ).one()
+    totals = snapshot(session, snapshot_end) if snapshot_end else {}
+    if snapshot_end == as_of:
+        return totals
+    return _add(totals, _line_totals(session, snapshot_end, as_of))
+
+
+def movement_between(session: Session, start: Optional[date], end: date) -> Totals:
+    """Per-account totals of lines dated in [start, end] (start=None → from the beginning)."""
+    closing = balances_as_of(session, end)
+    if start is None:
+        return closing
+    opening = balances_as_of(session, start - timedelta(days=1))
+    return _add(closing, {account_id: (-debit, -credit) for account_id, (debit, credit) in opening.items()})
+
+
+# ── Close ─────────────────────────────────────────────────────────────────────
+
+def close_periods(session: Session, through: date) -> List[AccountingPeriod]:
+    """
+    Close every open month up to the one containing `through`, writing its
+    snapshot. Raises ValueError for months that haven't ended or are already
+    closed. Commits.
+    """
+    through = month_end(through)
+    if through >= date.today():
+        raise ValueError(f"Cannot close a period that has not ended ({through})")
+
+    last = closed_through(session)
+    if last is None:
+        first_entry = session.exec(select(func.min(JournalEntry.entry_date))).one()
+        period_start = min(first_entry or through, through).replace(day=1)
+    else:
+        period_start = last + timedelta(days=1)
+    if period_start > through:
+        raise ValueError(f"Periods are already closed through {last}")
+
+    start_month = fiscal_year_start_month(session)
+    totals = snapshot(session, last) if last else {}
+    closed = []
+    while period_start <= through:
+        period_end = month_end(period_start)
+        # The first close folds in every line before its month
+        totals = _add(totals, _line_totals(session, last, period_end))
+        if totals:
+            session.execute(insert(AccountBalanceSnapshot), [
+                {"period_end": period_end, "account_id": account_id, "debit_total": debit, "credit_total": credit}
+                for account_id, (debit, credit) in totals.items()
+            ])
+        period = AccountingPeriod(
+            period_start=period_start,
+            period_end=period_end,
+            fiscal_year=fiscal_year_of(period_start, start_month),
+        )
+        session.add(period)
+        closed.append(period)
+        last, period_start = period_end, period_end + timedelta(days=1)
+
+    session.commit()
+    for period in closed:
+        session.refresh(period)
+    return closed
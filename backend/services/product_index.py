@@ -0,0 +1,108 @@
+"""
+In-process prefix index over product descriptions for typeahead.
+
+Holds two sorted key lists built from one column query:
+  - full descriptions (lowercased)          → "starts with" matches, ranked first
+  - every word-start suffix of a description → "any word starts with" matches
+Lookups are a bisect into each list plus a short scan, so suggestions come
+back in microseconds without touching the database.
+
+product_routes calls invalidate() on every write; the next lookup rebuilds.
+A build that overlapped an invalidation is served once, then rebuilt on
+the next lookup, so it can't hide that write. A TTL bounds staleness
+across processes (other Lambda containers / workers) whose writes this
+process never sees.
+"""
+
+import bisect
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from sqlmodel import Session, select
+
+from models import Product
+
+PRODUCT_INDEX_TTL_SECONDS = int(os.getenv("PRODUCT_INDEX_TTL_SECONDS", 300))
+
+_WORD_START = re.compile(r"(?:^|(?<=\W))\w")
+
+
+class ProductPrefixIndex:
+    def __init__(self, ttl_seconds: int = PRODUCT_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()          # serializes builds
+        self._state_lock = threading.Lock()    # guards _built_at / _generation
+        self._built_at = None
+        self._generation = 0   # bumped by invalidate() so a build racing a write isn't marked fresh
+        self._full: List[Tuple[str, int]] = []
+        self._words: List[Tuple[str, int]] = []
+        self._products: Dict[int, dict] = {}
+
+    def invalidate(self):
+        with self._state_lock:
+            self._generation += 1
+            self._built_at = None
+
+    def _stale(self) -> bool:
+        return self._built_at is None or time.monotonic() - self._built_at > self.ttl_seconds
+
+    def _build(self, session: Session):
+        with self._state_lock:
+            generation = self._generation
+        rows = session.exec(
+            select(Product.product_id, Product.product_description, Product.product_price)
+        ).all()
+        products, full, words = {}, [], []
+        for product_id, description, price in rows:
+            products[product_id] = {
+                "product_id": product_id,
+                "product_description": description,
+                "product_price": price,
+            }
+            lowered = description.lower()
+            full.append((lowered, product_id))
+            for match in _WORD_START.finditer(lowered):
+                if match.start() > 0:
+                    words.append((lowered[match.start():], product_id))
+        full.sort()
+        words.sort()
+        with self._state_lock:
+            self._products, self._full, self._words = products, full, words
+            if generation == self._generation:
+                self._built_at = time.monotonic()
+
+    def _ensure(self, session: Session):
+        if self._stale():
+            with self._lock:
+                if self._stale():
+                    self._build(session)
+
+    @staticmethod
+    def _scan(keys: List[Tuple[str, int]], prefix: str, seen: set, out: List[int], limit: int):
+        i = bisect.bisect_left(keys, (prefix,))
+        while i < len(keys) and len(out) < limit and keys[i][0].startswith(prefix):
+            product_id = keys[i][1]
+            if product_id not in seen:
+                seen.add(product_id)
+                out.append(product_id)
+            i += 1
+
+    def suggest(self, session: Session, q: str, limit: int = 10) -> List[dict]:
+        """Top `limit` products whose description (or any word in it) starts with `q`."""
+        prefix = " ".join((q or "").lower().split())
+        if not prefix:
+            return []
+        self._ensure(session)
+        full, words, products = self._full, self._words, self._products
+
+        ids: List[int] = []
+        seen: set = set()
+        self._scan(full, prefix, seen, ids, limit)
+        self._scan(words, prefix, seen, ids, limit)
+        return [products[i] for i in ids]
+
+
+product_index = ProductPrefixIndex()
@@ -0,0 +1,145 @@
+"""
+In-process cache for report responses.
+
+Entries are keyed by request path + normalized query string and are valid
+while both hold:
+  - the global data version is unchanged — invoice, AP and accounting
+    routes call bump_version() after every committed write;
+  - the entry is younger than the TTL, which bounds staleness across
+    processes (other Lambda containers / workers) whose writes this
+    process never sees.
+Memory is bounded LRU-style by entry count and total body bytes. Each
+entry tracks its own hits and misses; stats() reports them with totals.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+REPORT_CACHE_ENABLED = os.getenv("REPORT_CACHE_ENABLED", "true").lower() == "true"
+REPORT_CACHE_TTL_SECONDS = int(os.getenv("REPORT_CACHE_TTL_SECONDS", 300))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", 256))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    media_type: str
+    version: int
+    stored_at: float
+    hits: int = 0
+    misses: int = 1
+    headers: Dict[str, str] = field(default_factory=dict)   # downstream response headers, replayed on hits
+
+
+class ReportCache:
+    def __init__(
+        self,
+        ttl_seconds: int = REPORT_CACHE_TTL_SECONDS,
+        max_entries: int = REPORT_CACHE_MAX_ENTRIES,
+        max_bytes: int = REPORT_CACHE_MAX_BYTES,
+        enabled: bool = REPORT_CACHE_ENABLED,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._version = 0
+        self._totals = {"hits": 0, "misses": 0, "bypasses": 0, "evictions": 0}
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump_version(self):
+        """Invalidate every cached report (call after committing a write)."""
+        with self._lock:
+            self._version += 1
+
+    def _valid(self, entry: CacheEntry) -> bool:
+        return entry.version == self._version and time.monotonic() - entry.stored_at <= self.ttl_seconds
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._valid(entry):
+                self._totals["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self._totals["hits"] += 1
+            return entry
+
+    def put(self, key: str, body: bytes, media_type: str, version: int, miss: bool = True,
+            headers: Optional[Dict[str, str]] = None):
+        """
+        Store a freshly computed body; `version` is the data version read before
+        computing it. miss=False for bypassed requests, which refresh the entry
+        without counting against its hit rate.
+        """
+        if len(body) > self.max_bytes // 8:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[key] = CacheEntry(
+                body=body,
+                media_type=media_type,
+                version=version,
+                stored_at=time.monotonic(),
+                hits=previous.hits if previous else 0,
+                misses=(previous.misses if previous else 0) + (1 if miss else 0),
+                headers=dict(headers or {}),
+            )
+            self._bytes += len(body)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self._totals["evictions"] += 1
+
+    def record_bypass(self):
+        with self._lock:
+            self._totals["bypasses"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            lookups = self._totals["hits"] + self._totals["misses"]
+            return {
+                "enabled": self.enabled,
+                "version": self._version,
+                "ttl_seconds": self.ttl_seconds,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                **self._totals,
+                "hit_rate": round(self._totals["hits"] / lookups, 4) if lookups else 0,
+                "per_entry": [
+                    {
+                        "key": key,
+                        "hits": entry.hits,
+                        "misses": entry.misses,
+                        "bytes": len(entry.body),
+                        "age_seconds": round(now - entry.stored_at, 1),
+                        "fresh": self._valid(entry),
+                    }
+                    for key, entry in reversed(self._entries.items())
+                ],
+            }
+
+
+report_cache = ReportCache()
@@ -0,0 +1,343 @@
+"""
+Background report jobs for exports too large to build inside one request.
+
+POST /reports/jobs stores a `report_job` row and hands its id to a runner:
+  - "thread" → a bounded ThreadPoolExecutor in this process (uvicorn / dev)
+  - "lambda" → an asynchronous invocation of REPORT_JOB_FUNCTION (the
+               report worker in serverless.yaml, with a longer timeout than
+               the API function), since threads are frozen once a Lambda
+               response is returned; main.handler routes
+               {"report_job_id": ...} events to run_report_job()
+The runner builds the report page by page with ReportService on its own
+event loop and async engine, recording progress on the job row between
+pages, then writes the JSON result to S3 (S3_UPLOADS_BUCKET, key
+reports/<id>.json) or to a local directory. Pages are keyset ranges, so a
+page costs the same at the end of a large export as at the start and rows
+don't shift between pages while invoices change.
+
+Load is bounded twice: create_job() admits a job with one conditional
+insert, which adds nothing while REPORT_JOB_MAX_ACTIVE are queued or
+running, and each process runs at most REPORT_JOB_WORKERS at once, so
+exports can't take every database connection from interactive requests.
+Jobs still active after REPORT_JOB_TIMEOUT_SECONDS (the worker's timeout in
+Lambda; the process was killed) are marked failed the next time jobs are
+read.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import boto3
+from pydantic import BaseModel, ConfigDict, ValidationError
+from sqlalchemy import insert, literal, text, update
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import engine, new_async_engine
+from models import ReportJob
+from services.invoice_reader import dumps
+from services.report_service import ReportService
+
+logger = logging.getLogger(__name__)
+
+REPORT_JOB_MODE = os.getenv("REPORT_JOB_MODE", "lambda" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "thread")
+REPORT_JOB_FUNCTION = os.getenv("REPORT_JOB_FUNCTION") or os.getenv("AWS_LAMBDA_FUNCTION_NAME", "")
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", 2))
+REPORT_JOB_MAX_ACTIVE = int(os.getenv("REPORT_JOB_MAX_ACTIVE", 4))
+REPORT_JOB_TIMEOUT_SECONDS = int(os.getenv("REPORT_JOB_TIMEOUT_SECONDS", 900))
+REPORT_JOB_PAGE_SIZE = int(os.getenv("REPORT_JOB_PAGE_SIZE", 5000))
+
+S3_BUCKET = os.getenv("S3_UPLOADS_BUCKET", "")
+# Local fallback directory for results (used when S3_UPLOADS_BUCKET is not set)
+if os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+    REPORT_DIR = "/tmp/reports"
+else:
+    REPORT_DIR = os.path.join(os.path.dirname(__file__), "..", "uploads", "reports")
+
+ACTIVE_STATUSES = ("queued", "running")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+class ReportJobQueueFull(Exception):
+    """Raised by create_job when REPORT_JOB_MAX_ACTIVE jobs are already queued or running."""
+
+
+# ── Report types ──────────────────────────────────────────────────────────────
+
+class InvoicesReportParams(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    customer_id: Optional[int] = None
+    status: Optional[str] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+
+
+class AgingReportParams(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    as_of_date: Optional[date] = None
+
+
+class OverdueReportParams(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+
+Progress = Callable[[int, int], None]
+
+
+async def _collect_pages(fetch_page, page_key, total: int, progress: Progress) -> List[Dict[str, Any]]:
+    """All rows of a keyset-paged detail list; page_key gives the `after` key of a page's last row."""
+    rows: List[Dict[str, Any]] = []
+    after = None
+    while True:
+        batch = await fetch_page(after)
+        rows.extend(batch)
+        progress(len(rows), total)
+        if len(batch) < REPORT_JOB_PAGE_SIZE:
+            return rows
+        after = page_key(batch[-1])
+
+
+async def _build_invoices(service: ReportService, params: InvoicesReportParams, progress: Progress) -> Dict[str, Any]:
+    invoices: List[Dict[str, Any]] = []
+    after = None
+    summary = total_count = None
+    while True:
+        # Keyset pages: each page is an index range scan rather than a growing OFFSET; totals only once
+        result = await service.get_all_invoices_report(
+            **params.model_dump(), page_size=REPORT_JOB_PAGE_SIZE, after=after, include_totals=after is None
+        )
+        if after is None:
+            summary, total_count = result["summary"], result["pagination"]["total_count"]
+        invoices.extend(result["invoices"])
+        progress(len(invoices), total_count)
+        if not result["pagination"]["has_next"]:
+            break
+        last = result["invoices"][-1]
+        after = (date.fromisoformat(last["invoice_date"]), last["id"])
+
+    return {
+        "invoices": invoices,
+        "summary": summary,
+        "filters_applied": result["filters_applied"],
+        "generated_at": datetime.now().isoformat()
+    }
+
+
+async def _build_aging(service: ReportService, params: AgingReportParams, progress: Progress) -> Dict[str, Any]:
+    as_of_date = params.as_of_date or date.today()
+    report = await service.get_aging_report(as_of_date, include_invoices=False)
+    report["invoices"] = await _collect_pages(
+        lambda after: service.get_aging_invoices(as_of_date, page_size=REPORT_JOB_PAGE_SIZE, after=after),
+        lambda row: (
+            ReportService.AGING_LABELS.index(row["aging_bucket"]), date.fromisoformat(row["due_date"]), row["id"]
+        ),
+        report["summary"]["total_invoices"], progress
+    )
+    return report
+
+
+async def _build_overdue(service: ReportService, params: OverdueReportParams, progress: Progress) -> Dict[str, Any]:
+    report = await service.get_overdue_report(include_invoices=False)
+    report["invoices"] = await _collect_pages(
+        lambda after: service.get_overdue_invoices(page_size=REPORT_JOB_PAGE_SIZE, after=after),
+        lambda row: (date.fromisoformat(row["due_date"]), row["id"]),
+        report["summary"]["total_overdue_invoices"], progress
+    )
+    return report
+
+
+REPORT_TYPES = {
+    "invoices": (InvoicesReportParams, _build_invoices),
+    "aging": (AgingReportParams, _build_aging),
+    "overdue": (OverdueReportParams, _build_overdue),
+}
+
+
+# ── Job lifecycle ─────────────────────────────────────────────────────────────
+
+def _expire_stale_jobs(session: Session) -> None:
+    cutoff = datetime.utcnow() - timedelta(seconds=REPORT_JOB_TIMEOUT_SECONDS)
+    result = session.execute(
+        update(ReportJob)
+        .where(ReportJob.status.in_(ACTIVE_STATUSES), ReportJob.created_at < cutoff)
+        .values(status="failed", error="Timed out", completed_at=datetime.utcnow())
+    )
+    if result.rowcount:
+        session.commit()
+
+
+def create_job(session: Session, report_type: str, params: Dict[str, Any]) -> ReportJob:
+    """Validate, admit and dispatch a new job. Raises ValueError or ReportJobQueueFull."""
+    if report_type not in REPORT_TYPES:
+        raise ValueError(f"Unknown report type '{report_type}'. Valid types: {', '.join(REPORT_TYPES)}")
+    params_model, _ = REPORT_TYPES[report_type]
+    try:
+        parsed = params_model.model_validate(params or {})
+    except ValidationError as e:
+        raise ValueError(f"Invalid parameters for '{report_type}' report: {e.errors(include_url=False)}")
+
+    _expire_stale_jobs(session)
+    job_id = uuid.uuid4().hex
+    if not _admit(session, job_id, report_type, json.dumps(parsed.model_dump(mode="json"))):
+        raise ReportJobQueueFull(f"{REPORT_JOB_MAX_ACTIVE} report jobs are already in progress; try again later")
+    job = session.get(ReportJob, job_id)
+
+    try:
+        _dispatch(job.id)
+    except Exception as e:
+        job.status = "failed"
+        job.error = f"Could not start job: {e}"
+        job.completed_at = datetime.utcnow()
+        session.add(job)
+        session.commit()
+    session.refresh(job)
+    return job
+
+
+def _admit(session: Session, job_id: str, report_type: str, params: str) -> bool:
+    """Insert a queued job unless REPORT_JOB_MAX_ACTIVE are active, checked and inserted in one statement."""
+    if session.get_bind().dialect.name == "postgresql":
+        # Concurrent inserts can't see each other's rows; this mode conflicts with itself, so
+        # admissions take turns while status reads carry on (SQLite already serializes writers)
+        session.execute(text("LOCK TABLE report_job IN SHARE ROW EXCLUSIVE MODE"))
+    active = select(func.count(ReportJob.id)).where(ReportJob.status.in_(ACTIVE_STATUSES)).scalar_subquery()
+    result = session.execute(
+        insert(ReportJob).from_select(
+            ["id", "report_type", "params", "status", "progress", "row_count", "created_at"],
+            select(
+                literal(job_id), literal(report_type), literal(params), literal("queued"),
+                literal(0), literal(0), literal(datetime.utcnow())
+            ).where(active < REPORT_JOB_MAX_ACTIVE)
+        )
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+def get_job(session: Session, job_id: str) -> Optional[ReportJob]:
+    _expire_stale_jobs(session)
+    return session.get(ReportJob, job_id)
+
+
+def _dispatch(job_id: str) -> None:
+    global _executor
+    if REPORT_JOB_MODE == "lambda":
+        boto3.client("lambda").invoke(
+            FunctionName=REPORT_JOB_FUNCTION,
+            InvocationType="Event",
+            Payload=json.dumps({"report_job_id": job_id}),
+        )
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=REPORT_JOB_WORKERS, thread_name_prefix="report-job")
+    _executor.submit(run_report_job, job_id)
+
+
+def _update_job(job_id: str, **values) -> None:
+    with Session(engine) as session:
+        session.execute(update(ReportJob).where(ReportJob.id == job_id).values(**values))
+        session.commit()
+
+
+async def _build_report(report_type: str, params: BaseModel, progress: Progress) -> Dict[str, Any]:
+    # Own engine: this runs on the worker's event loop, and async connections are loop-bound
+    async_engine = new_async_engine(poolclass=NullPool)
+    try:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            _, build = REPORT_TYPES[report_type]
+            return await build(ReportService(session), params, progress)
+    finally:
+        await async_engine.dispose()
+
+
+def run_report_job(job_id: str) -> None:
+    """Build and store one queued job's report (worker thread or Lambda event)."""
+    with Session(engine) as session:
+        job = session.get(ReportJob, job_id)
+        if job is None or job.status != "queued":
+            return
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        session.add(job)
+        session.commit()
+        report_type = job.report_type
+        params_model, _ = REPORT_TYPES[report_type]
+        params = params_model.model_validate(json.loads(job.params))
+
+    def progress(done: int, total: int) -> None:
+        _update_job(job_id, progress=min(99, done * 100 // total) if total else 99, row_count=done)
+
+    # A private loop: asyncio.run() would clear the thread's current loop, which
+    # Mangum still needs for the next request on a warm Lambda container
+    loop = asyncio.new_event_loop()
+    try:
+        result = loop.run_until_complete(_build_report(report_type, params, progress))
+        body = dumps(result)
+        key = f"reports/{job_id}.json"
+        _store_result(key, body)
+        _update_job(
+            job_id, status="completed", progress=100, row_count=len(result.get("invoices", [])),
+            result_key=key, result_bytes=len(body), completed_at=datetime.utcnow()
+        )
+    except Exception as e:
+        logger.exception(f"Report job {job_id} failed")
+        _update_job(job_id, status="failed", error=str(e)[:500], completed_at=datetime.utcnow())
+    finally:
+        loop.close()
+
+
+# ── Result storage ────────────────────────────────────────────────────────────
+
+def _store_result(key: str, body: bytes) -> None:
+    """Save the JSON result to S3 (production) or the local filesystem (development)."""
+    if S3_BUCKET:
+        boto3.client("s3").put_object(Bucket=S3_BUCKET, Key=key, Body=body, ContentType="application/json")
+    else:
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        with open(os.path.join(REPORT_DIR, os.path.basename(key)), "wb") as f:
+            f.write(body)
+
+
+def result_download_url(job: ReportJob, expires_in: int = 3600) -> Optional[str]:
+    """Presigned S3 URL for a completed job's result (None without S3)."""
+    if not S3_BUCKET or not job.result_key:
+        return None
+    return boto3.client("s3").generate_presigned_url(
+        "get_object", Params={"Bucket": S3_BUCKET, "Key": job.result_key}, ExpiresIn=expires_in
+    )
+
+
+def result_path(job: ReportJob) -> Optional[str]:
+    """Local file holding a completed job's result (None with S3)."""
+    if S3_BUCKET or not job.result_key:
+        return None
+    return os.path.join(REPORT_DIR, os.path.basename(job.result_key))
+
+
+def job_status(job: ReportJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "report_type": job.report_type,
+        "params": json.loads(job.params),
+        "status": job.status,
+        "progress": job.progress,
+        "row_count": job.row_count,
+        "result_url": f"/reports/jobs/{job.id}/result" if job.status == "completed" else None,
+        "result_bytes": job.result_bytes,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+    }
@@ -1,11 +1,23 @@
-from sqlmodel import Session, select, func, and_, or_, text
+from sqlmodel import select, func, and_, or_, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import case, tuple_
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import calendar
-from models import Invoice, Customer, Product, LineItem
+from models import Invoice, Customer, CustomerPaymentStats, Product, LineItem, RevenueRollup
+from services.aging import aging_bucket, aging_totals, days_overdue
+from services.customer_payment_stats import ensure_customer_payment_stats, payment_summary
+from services.invoice_reader import encode_cursor
+from services.revenue_rollup import ensure_revenue_rollup
 
 class ReportService:
-    def __init__(self, session: Session):
+    """
+    Report queries over an AsyncSession, so awaiting a report yields the
+    event loop while the database works. Helpers shared with sync code
+    (rollup backfills, aging totals) run through AsyncSession.run_sync.
+    """
+
+    def __init__(self, session: AsyncSession):
         self.session = session
 
     async def get_revenue_summary(self) -> Dict[str, Any]:
@@ -14,80 +26,88 @@ class ReportService:
         Returns current month, last month, growth rates, and key metrics
         """
         today = date.today()
+        totals = (await self._dashboard_totals(today))
+        monthly_trends = await self._get_monthly_revenue_trend(6)
+        return self._revenue_summary(today, totals, monthly_trends)
+
+    async def get_dashboard(self) -> Dict[str, Any]:
+        """
+        Summary statistics and revenue summary for the dashboard in one load:
+        one conditional-aggregation query plus one grouped trend query
+        """
+        today = date.today()
+        totals = (await self._dashboard_totals(today))
+        monthly_trends = await self._get_monthly_revenue_trend(6)
+        return {
+            "summary": self._summary_statistics(totals),
+            "revenue": self._revenue_summary(today, totals, monthly_trends),
+            "generated_at": datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def _last_month(today: date) -> date:
         current_month_start = today.replace(day=1)
-        
-        # Calculate last month
         if current_month_start.month == 1:
-            last_month_start = current_month_start.replace(year=current_month_start.year - 1, month=12)
-            last_month_end = current_month_start - timedelta(days=1)
-        else:
-            last_month_start = current_month_start.replace(month=current_month_start.month - 1)
-            last_month_end = current_month_start - timedelta(days=1)
+            return current_month_start.replace(year=current_month_start.year - 1, month=12)
+        return current_month_start.replace(month=current_month_start.month - 1)
 
-        # Current month revenue
-        current_month_stmt = select(
-            func.count(Invoice.id).label('invoice_count'),
-            func.coalesce(func.sum(Invoice.invoice_total), 0).label('total_revenue')
-        ).where(
-            and_(
-                Invoice.date_issued >= current_month_start,
-                Invoice.date_issued <= today,
-                Invoice.invoice_status != 'cancelled'
-            )
-        )
-        current_month_result = self.session.exec(current_month_stmt).first()
+    async def _dashboard_totals(self, today: date):
+        """
+        Every dashboard headline figure in a single SELECT over the revenue
+        rollup, using SUM(CASE ...) per metric; customer count rides along
+        as a scalar subquery
+        """
+        await self.session.run_sync(ensure_revenue_rollup)
+        last_month = self._last_month(today)
+        status = RevenueRollup.invoice_status
+        not_cancelled = status != 'cancelled'
 
-        # Last month revenue
-        last_month_stmt = select(
-            func.count(Invoice.id).label('invoice_count'),
-            func.coalesce(func.sum(Invoice.invoice_total), 0).label('total_revenue')
-        ).where(
-            and_(
-                Invoice.date_issued >= last_month_start,
-                Invoice.date_issued <= last_month_end,
-                Invoice.invoice_status != 'cancelled'
-            )
-        )
-        last_month_result = self.session.exec(last_month_stmt).first()
+        def in_month(month_start: date):
+            return and_(RevenueRollup.year == month_start.year,
+                        RevenueRollup.month == month_start.month,
+                        not_cancelled)
 
-        # Paid vs Unpaid amounts
-        paid_stmt = select(
-            func.coalesce(func.sum(Invoice.invoice_total), 0)
-        ).where(
-            Invoice.invoice_status == 'paid'
-        )
-        paid_amount = self.session.exec(paid_stmt).first()
+        def count_where(condition):
+            return func.coalesce(func.sum(case((condition, RevenueRollup.invoice_count), else_=0)), 0)
 
-        unpaid_stmt = select(
-            func.coalesce(func.sum(Invoice.invoice_total), 0)
-        ).where(
-            and_(
-                Invoice.invoice_status.in_(['draft', 'sent']),
-                Invoice.invoice_status != 'cancelled'
-            )
-        )
-        unpaid_amount = self.session.exec(unpaid_stmt).first()
+        def total_where(condition):
+            return func.coalesce(func.sum(case((condition, RevenueRollup.total_amount), else_=0.0)), 0.0)
+
+        stmt = select(
+            count_where(not_cancelled).label('total_invoices'),
+            total_where(not_cancelled).label('total_revenue'),
+            total_where(status.in_(['draft', 'sent'])).label('outstanding_amount'),
+            total_where(status == 'paid').label('paid_amount'),
+            count_where(in_month(today)).label('current_count'),
+            total_where(in_month(today)).label('current_revenue'),
+            count_where(in_month(last_month)).label('last_count'),
+            total_where(in_month(last_month)).label('last_revenue'),
+            select(func.count(Customer.customer_id)).scalar_subquery().label('total_customers')
+        ).select_from(RevenueRollup)
+        return (await self.session.exec(stmt)).one()
+
+    def _revenue_summary(self, today: date, totals, monthly_trends: List[Dict[str, Any]]) -> Dict[str, Any]:
+        last_month = self._last_month(today)
+        current_revenue = float(totals.current_revenue)
+        last_revenue = float(totals.last_revenue)
+        paid_amount = float(totals.paid_amount)
+        unpaid_amount = float(totals.outstanding_amount)
 
         # Calculate growth rate
-        current_revenue = float(current_month_result.total_revenue) if current_month_result else 0
-        last_revenue = float(last_month_result.total_revenue) if last_month_result else 0
         growth_rate = ((current_revenue - last_revenue) / last_revenue * 100) if last_revenue > 0 else 0
 
-        # Get 6-month revenue trend
-        monthly_trends = await self._get_monthly_revenue_trend(6)
-
         return {
             "current_month": {
                 "revenue": current_revenue,
-                "invoice_count": current_month_result.invoice_count if current_month_result else 0,
+                "invoice_count": int(totals.current_count),
                 "month_name": calendar.month_name[today.month],
                 "year": today.year
             },
             "last_month": {
                 "revenue": last_revenue,
-                "invoice_count": last_month_result.invoice_count if last_month_result else 0,
-                "month_name": calendar.month_name[last_month_start.month],
-                "year": last_month_start.year
+                "invoice_count": int(totals.last_count),
+                "month_name": calendar.month_name[last_month.month],
+                "year": last_month.year
             },
             "growth": {
                 "rate": round(growth_rate, 2),
@@ -95,77 +115,66 @@ class ReportService:
                 "is_positive": growth_rate >= 0
             },
             "amounts": {
-                "paid": float(paid_amount) if paid_amount else 0,
-                "unpaid": float(unpaid_amount) if unpaid_amount else 0,
-                "total": float(paid_amount or 0) + float(unpaid_amount or 0)
+                "paid": paid_amount,
+                "unpaid": unpaid_amount,
+                "total": paid_amount + unpaid_amount
             },
             "monthly_trends": monthly_trends,
             "generated_at": datetime.now().isoformat()
         }
 
     async def _get_monthly_revenue_trend(self, months: int) -> List[Dict[str, Any]]:
-        """Get monthly revenue trend for the last N months"""
-        trends = []
+        """Get monthly revenue trend for the last N months (one grouped rollup query)"""
+        await self.session.run_sync(ensure_revenue_rollup)
         today = date.today()
-        
-        for i in range(months - 1, -1, -1):
-            # Calculate month start/end
-            if today.month - i <= 0:
-                month = 12 + (today.month - i)
-                year = today.year - 1
-            else:
-                month = today.month - i
-                year = today.year
-            
-            month_start = date(year, month, 1)
-            if month == 12:
-                month_end = date(year + 1, 1, 1) - timedelta(days=1)
-            else:
-                month_end = date(year, month + 1, 1) - timedelta(days=1)
-            
-            # Don't include future months
-            if month_start > today:
-                continue
-                
-            # Get revenue for this month
-            stmt = select(
-                func.coalesce(func.sum(Invoice.invoice_total), 0)
-            ).where(
-                and_(
-                    Invoice.date_issued >= month_start,
-                    Invoice.date_issued <= month_end,
-                    Invoice.invoice_status != 'cancelled'
-                )
+        month_index = RevenueRollup.year * 12 + RevenueRollup.month
+        current_index = today.year * 12 + today.month
+
+        stmt = select(
+            RevenueRollup.year,
+            RevenueRollup.month,
+            func.coalesce(func.sum(RevenueRollup.total_amount), 0.0)
+        ).where(
+            and_(
+                month_index > current_index - months,
+                month_index <= current_index,
+                RevenueRollup.invoice_status != 'cancelled'
             )
-            revenue = self.session.exec(stmt).first()
-            
+        ).group_by(RevenueRollup.year, RevenueRollup.month)
+        revenue_by_month = {(year, month): revenue for year, month, revenue in (await self.session.exec(stmt)).all()}
+
+        trends = []
+        for i in range(months - 1, -1, -1):
+            year, month = divmod(current_index - i - 1, 12)
+            month += 1
+            revenue = revenue_by_month.get((year, month))
             trends.append({
                 "month": calendar.month_name[month],
                 "year": year,
                 "revenue": float(revenue) if revenue else 0,
                 "month_key": f"{year}-{month:02d}"
             })
-        
+
         return trends
 
     async def get_all_invoices_report(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
                                     customer_id: Optional[int] = None, status: Optional[str] = None,
                                     min_amount: Optional[float] = None, max_amount: Optional[float] = None,
-                                    page: int = 1, page_size: int = 50) -> Dict[str, Any]:
+                                    page: int = 1, page_size: int = 50,
+                                    after: Optional[Tuple[date, int]] = None,
+                                    include_totals: bool = True) -> Dict[str, Any]:
         """
         Get all invoices with filtering and pagination
+
+        OFFSET pages are one statement: COUNT(*) OVER() and SUM() OVER() columns
+        carry the totals of the whole filtered set, since window functions run
+        before OFFSET / LIMIT cut the page. Pass `after` (the (date_issued, id)
+        of the previous page's last row) for keyset pagination instead: the
+        predicate is part of the page query, so each page reads only its own
+        rows from idx_invoice_date_id, and totals (which the predicate would
+        narrow) cost a separate aggregate. Callers walking cursor pages request
+        totals once; include_totals=False leaves summary and total counts as None.
         """
-        # Build base query
-        stmt = select(
-            Invoice.id,
-            Invoice.date_issued,
-            Invoice.invoice_due_date,
-            Invoice.invoice_total,
-            Invoice.invoice_status,
-            Customer.customer_name,
-            Customer.customer_id
-        ).join(Customer, Invoice.customer_id == Customer.customer_id)
-        
         # Apply filters
         filters = []
         if start_date:
@@ -180,35 +189,52 @@ class ReportService:
             filters.append(Invoice.invoice_total >= min_amount)
         if max_amount:
             filters.append(Invoice.invoice_total <= max_amount)
-        
-        if filters:
-            stmt = stmt.where(and_(*filters))
-        
-        # Get total count for pagination
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total_count = self.session.exec(count_stmt).first()
-        
-        # Apply pagination and ordering
-        stmt = stmt.order_by(Invoice.date_issued.desc())
-        stmt = stmt.offset((page - 1) * page_size).limit(page_size)
-        
-        invoices = self.session.exec(stmt).all()
-        
-        # Calculate summary statistics
-        summary_stmt = select(
-            func.count(Invoice.id).label('total_invoices'),
-            func.coalesce(func.sum(Invoice.invoice_total), 0).label('total_amount')
-        )
-        
-        if filters:
-            summary_stmt = summary_stmt.where(and_(*filters))
-            
-        summary = self.session.exec(summary_stmt).first()
-        
-        # Calculate paid/unpaid separately for simplicity
-        paid_amount = sum(float(inv.invoice_total) for inv in invoices if inv.invoice_status == 'paid')
-        unpaid_amount = sum(float(inv.invoice_total) for inv in invoices if inv.invoice_status != 'paid')
-        
+
+        paid_total = case((Invoice.invoice_status == 'paid', Invoice.invoice_total), else_=0)
+        window_totals = include_totals and after is None
+        columns = [
+            Invoice.id,
+            Invoice.date_issued,
+            Invoice.invoice_due_date,
+            Invoice.invoice_total,
+            Invoice.invoice_status,
+            Customer.customer_name,
+            Customer.customer_id
+        ]
+        if window_totals:
+            columns += [
+                func.count().over().label('total_count'),
+                func.sum(Invoice.invoice_total).over().label('total_amount'),
+                func.sum(paid_total).over().label('paid_amount')
+            ]
+
+        stmt = select(*columns).join(Customer, Invoice.customer_id == Customer.customer_id).where(*filters)
+        stmt = stmt.order_by(Invoice.date_issued.desc(), Invoice.id.desc())
+        if after:
+            stmt = stmt.where(tuple_(Invoice.date_issued, Invoice.id) < tuple_(*after))
+        else:
+            stmt = stmt.offset((page - 1) * page_size)
+        rows = (await self.session.exec(stmt.limit(page_size + 1))).all()
+        has_next = len(rows) > page_size
+        invoices = rows[:page_size]
+
+        total_count = total_amount = paid_amount = None
+        if window_totals and invoices:
+            total_count, total_amount, paid_amount = rows[0].total_count, rows[0].total_amount, rows[0].paid_amount
+        elif include_totals:
+            # A cursor page, or an OFFSET page past the end with no rows to carry the window columns
+            total_count, total_amount, paid_amount = (await self.session.exec(
+                select(
+                    func.count(Invoice.id),
+                    func.coalesce(func.sum(Invoice.invoice_total), 0),
+                    func.coalesce(func.sum(paid_total), 0)
+                ).join(Customer, Invoice.customer_id == Customer.customer_id).where(*filters)
+            )).one()
+        if include_totals:
+            total_amount = float(total_amount or 0)
+            paid_amount = float(paid_amount or 0)
+
+        last = invoices[-1] if invoices else None
         return {
             "invoices": [
                 {
@@ -224,18 +250,19 @@ class ReportService:
                 for inv in invoices
             ],
             "summary": {
-                "total_invoices": summary.total_invoices if summary else 0,
-                "total_amount": float(summary.total_amount) if summary else 0,
+                "total_invoices": total_count,
+                "total_amount": total_amount,
                 "paid_amount": paid_amount,
-                "unpaid_amount": unpaid_amount
-            },
+                "unpaid_amount": total_amount - paid_amount
+            } if include_totals else None,
             "pagination": {
                 "page": page,
                 "page_size": page_size,
                 "total_count": total_count,
-                "total_pages": (total_count + page_size - 1) // page_size if total_count else 0,
-                "has_next": page * page_size < total_count,
-                "has_previous": page > 1
+                "total_pages": ((total_count + page_size - 1) // page_size if total_count else 0) if include_totals else None,
+                "has_next": has_next,
+                "has_previous": page > 1 or after is not None,
+                "next_cursor": encode_cursor(last.date_issued, last.id) if has_next else None
             },
             "filters_applied": {
                 "start_date": start_date.isoformat() if start_date else None,
@@ -253,7 +280,7 @@ class ReportService:
         """
         # Get customer info
         customer_stmt = select(Customer).where(Customer.customer_id == customer_id)
-        customer = self.session.exec(customer_stmt).first()
+        customer = (await self.session.exec(customer_stmt)).first()
         
         if not customer:
             raise ValueError(f"Customer with ID {customer_id} not found")
@@ -262,14 +289,18 @@ class ReportService:
         summary_stmt = select(
             func.count(Invoice.id).label('total_invoices'),
             func.coalesce(func.sum(Invoice.invoice_total), 0).label('total_amount'),
-            func.coalesce(func.avg(Invoice.invoice_total), 0).label('avg_invoice')
+            func.coalesce(func.avg(Invoice.invoice_total), 0).label('avg_invoice'),
+            func.coalesce(func.sum(case(
+                (and_(Invoice.invoice_due_date < date.today(), Invoice.invoice_status != 'paid'), 1),
+                else_=0
+            )), 0).label('overdue_invoices')
         ).where(
             and_(
                 Invoice.customer_id == customer_id,
                 Invoice.invoice_status != 'cancelled'
             )
         )
-        summary = self.session.exec(summary_stmt).first()
+        summary = (await self.session.exec(summary_stmt)).first()
         
         # Get recent invoices (last 10)
         recent_stmt = select(
@@ -282,14 +313,16 @@ class ReportService:
             Invoice.customer_id == customer_id
         ).order_by(Invoice.date_issued.desc()).limit(10)
         
-        recent_invoices = self.session.exec(recent_stmt).all()
+        recent_invoices = (await self.session.exec(recent_stmt)).all()
         
         # Calculate outstanding balance from recent invoices  
         outstanding_balance = sum(float(inv.invoice_total) for inv in recent_invoices if inv.invoice_status != 'paid')
         paid_amount = sum(float(inv.invoice_total) for inv in recent_invoices if inv.invoice_status == 'paid')
         
         # Calculate payment behavior
-        payment_stats = await self._calculate_payment_behavior(customer_id)
+        payment_stats = await self._calculate_payment_behavior(
+            customer_id, summary.overdue_invoices if summary else 0
+        )
         
         return {
             "customer": {
@@ -321,37 +354,14 @@ class ReportService:
             "generated_at": datetime.now().isoformat()
         }
 
-    async def _calculate_payment_behavior(self, customer_id: int) -> Dict[str, Any]:
-        """Calculate payment behavior metrics for a customer"""
-        # Get paid invoices with payment dates (we'll need to add payment tracking later)
-        # For now, we'll calculate based on current status
-        
-        paid_stmt = select(func.count(Invoice.id)).where(
-            and_(
-                Invoice.customer_id == customer_id,
-                Invoice.invoice_status == 'paid'
-            )
-        )
-        paid_count = self.session.exec(paid_stmt).first()
-        
-        total_stmt = select(func.count(Invoice.id)).where(
-            and_(
-                Invoice.customer_id == customer_id,
-                Invoice.invoice_status != 'cancelled'
-            )
-        )
-        total_count = self.session.exec(total_stmt).first()
-        
-        overdue_stmt = select(func.count(Invoice.id)).where(
-            and_(
-                Invoice.customer_id == customer_id,
-                Invoice.invoice_due_date < date.today(),
-                Invoice.invoice_status != 'paid',
-                Invoice.invoice_status != 'cancelled'
-            )
-        )
-        overdue_count = self.session.exec(overdue_stmt).first()
-        
+    async def _calculate_payment_behavior(self, customer_id: int, overdue_count: int = 0) -> Dict[str, Any]:
+        """Calculate payment behavior metrics for a customer from its customer_payment_stats row"""
+        await self.session.run_sync(ensure_customer_payment_stats)
+        stats = await self.session.get(CustomerPaymentStats, customer_id)
+        paid_count = stats.paid_count if stats else 0
+        total_count = stats.total_count if stats else 0
+        lateness = payment_summary(stats)
+
         # Calculate payment rate
         payment_rate = (paid_count / total_count * 100) if total_count and total_count > 0 else 0
         
@@ -373,228 +383,277 @@ class ReportService:
             "overdue_invoices": overdue_count or 0,
             "risk_level": risk_level,
             "rating": rating,
-            "estimated_days_to_pay": 30  # This would be calculated from actual payment data
+            "estimated_days_to_pay": 30,  # This would be calculated from actual payment data
+            "avg_days_late": round(lateness["avg_days_late"], 1),
+            "last_payment_date": stats.last_payment_date.isoformat() if stats and stats.last_payment_date else None
         }
 
-    async def get_aging_report(self, as_of_date: date) -> Dict[str, Any]:
-        """
-        Generate invoice aging report with buckets: 0-15, 16-30, 31-60, 60+ days
-        """
-        # Get all outstanding invoices
+    # Aging report buckets by days overdue: (rank, max days) → label; rank orders the detail list
+    AGING_BOUNDS = [(0, 15), (1, 30), (2, 60)]
+    AGING_OVERFLOW = 3
+    AGING_LABELS = ["Current (0-15 days)", "16-30 days", "31-60 days", "60+ days"]
+
+    # Overdue report risk tiers by days overdue
+    OVERDUE_BOUNDS = [("low", 29), ("medium", 59), ("high", 89)]
+    OVERDUE_OVERFLOW = "critical"
+
+    @staticmethod
+    def _aging_filters(as_of_date: date) -> list:
+        return [
+            Invoice.invoice_due_date < as_of_date,
+            Invoice.invoice_status.in_(['draft', 'sent'])
+        ]
+
+    @staticmethod
+    def _page(stmt, page: Optional[int], page_size: Optional[int]):
+        if page_size:
+            stmt = stmt.offset(((page or 1) - 1) * page_size).limit(page_size)
+        return stmt
+
+    @staticmethod
+    def _pagination(page: Optional[int], page_size: Optional[int], total_count: int) -> Optional[Dict[str, Any]]:
+        if not page_size:
+            return None
+        page = page or 1
+        return {
+            "page": page,
+            "page_size": page_size,
+            "total_count": total_count,
+            "total_pages": (total_count + page_size - 1) // page_size if total_count else 0,
+            "has_next": page * page_size < total_count,
+            "has_previous": page > 1
+        }
+
+    def _aging_detail_statement(self, as_of_date: date, after: Optional[Tuple[int, date, int]] = None):
+        rank = aging_bucket(as_of_date, self.AGING_BOUNDS, self.AGING_OVERFLOW)
         stmt = select(
             Invoice.id,
             Invoice.date_issued,
             Invoice.invoice_due_date,
             Invoice.invoice_total,
             Customer.customer_name,
-            Customer.customer_id
+            days_overdue(self.session, as_of_date).label('days_overdue'),
+            rank.label('bucket_rank')
         ).join(
             Customer, Invoice.customer_id == Customer.customer_id
         ).where(
-            and_(
-                Invoice.invoice_due_date < as_of_date,
-                Invoice.invoice_status.in_(['draft', 'sent']),
-                Invoice.invoice_status != 'cancelled'
-            )
-        ).order_by(Invoice.invoice_due_date.asc())
-        
-        all_invoices = self.session.exec(stmt).all()
-        
-        # Define aging buckets
-        buckets = {
-            "current": {"min": 0, "max": 15, "label": "Current (0-15 days)", "invoices": [], "total_amount": 0},
-            "days_30": {"min": 16, "max": 30, "label": "16-30 days", "invoices": [], "total_amount": 0},
-            "days_60": {"min": 31, "max": 60, "label": "31-60 days", "invoices": [], "total_amount": 0},
-            "over_60": {"min": 61, "max": 999, "label": "60+ days", "invoices": [], "total_amount": 0}
+            *self._aging_filters(as_of_date)
+        ).order_by(rank, Invoice.invoice_due_date.asc(), Invoice.id)
+        if after:
+            stmt = stmt.where(tuple_(rank, Invoice.invoice_due_date, Invoice.id) > tuple_(*after))
+        return stmt
+
+    def _aging_detail(self, row) -> Dict[str, Any]:
+        return {
+            "id": row.id,
+            "customer_name": row.customer_name,
+            "invoice_date": row.date_issued.isoformat(),
+            "due_date": row.invoice_due_date.isoformat(),
+            "total_amount": float(row.invoice_total),
+            "days_outstanding": row.days_overdue,
+            "aging_bucket": self.AGING_LABELS[row.bucket_rank]
         }
-        
-        # Categorize invoices into buckets
-        for inv in all_invoices:
-            days_overdue = (as_of_date - inv.invoice_due_date).days
-            
-            # Determine which bucket this invoice belongs to
-            bucket_key = None
-            if days_overdue <= 15:
-                bucket_key = "current"
-            elif days_overdue <= 30:
-                bucket_key = "days_30"
-            elif days_overdue <= 60:
-                bucket_key = "days_60"
-            else:
-                bucket_key = "over_60"
-            
-            if bucket_key:
-                invoice_data = {
-                    "id": inv.id,
-                    "customer_name": inv.customer_name,
-                    "customer_id": inv.customer_id,
-                    "date_issued": inv.date_issued.isoformat(),
-                    "due_date": inv.invoice_due_date.isoformat(),
-                    "amount": float(inv.invoice_total),
-                    "days_overdue": days_overdue
-                }
-                buckets[bucket_key]["invoices"].append(invoice_data)
-                buckets[bucket_key]["total_amount"] += float(inv.invoice_total)
-        
-        # Calculate totals
-        total_amount = sum(bucket["total_amount"] for bucket in buckets.values())
-        total_invoices = sum(len(bucket["invoices"]) for bucket in buckets.values())
-        
-        # Calculate aging buckets summary
+
+    async def iter_aging_invoices(self, as_of_date: date, chunk_size: int = 500):
+        """Aging detail rows one at a time, fetched from a streaming cursor in chunks"""
+        stmt = self._aging_detail_statement(as_of_date).execution_options(yield_per=chunk_size)
+        async for row in await self.session.stream(stmt):
+            yield self._aging_detail(row)
+
+    async def get_aging_invoices(self, as_of_date: date, page: Optional[int] = None,
+                                 page_size: Optional[int] = None,
+                                 after: Optional[Tuple[int, date, int]] = None) -> List[Dict[str, Any]]:
+        """
+        Aging detail rows: all of them, or one page when page_size is set
+
+        Pass `after` (the (bucket rank, due date, id) of the previous page's last
+        row) to page by keyset instead of OFFSET.
+        """
+        stmt = self._aging_detail_statement(as_of_date, after)
+        stmt = stmt.limit(page_size) if after else self._page(stmt, page, page_size)
+        return [self._aging_detail(row) for row in (await self.session.exec(stmt)).all()]
+
+    async def get_aging_report(self, as_of_date: date, include_invoices: bool = True,
+                               page: Optional[int] = None, page_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Generate invoice aging report with buckets: 0-15, 16-30, 31-60, 60+ days
+
+        Bucket counts and sums come from one grouped CASE query; invoice rows are
+        only read for the detail list (all of it, or one page when page_size is set)
+        """
+        filters = self._aging_filters(as_of_date)
+        totals = await self.session.run_sync(
+            aging_totals, as_of_date, self.AGING_BOUNDS, self.AGING_OVERFLOW, *filters
+        )
+
+        total_amount = sum(bucket["amount"] for bucket in totals.values())
+        total_invoices = sum(bucket["count"] for bucket in totals.values())
+        days_sum = sum(bucket["days_sum"] for bucket in totals.values())
+        oldest_due = min((bucket["oldest_due"] for bucket in totals.values() if bucket["oldest_due"]), default=None)
+        at_risk = totals[self.AGING_OVERFLOW]
+
+        oldest_invoice = None
+        if at_risk["count"]:
+            oldest_invoice = (await self.session.exec(
+                select(Invoice.id).where(
+                    *filters,
+                    Invoice.invoice_due_date < as_of_date - timedelta(days=self.AGING_BOUNDS[-1][1])
+                ).order_by(Invoice.invoice_due_date.asc(), Invoice.id).limit(1)
+            )).first()
+
         aging_buckets = [
             {
-                "bucket": bucket["label"],
-                "total_amount": bucket["total_amount"],
-                "invoice_count": len(bucket["invoices"]),
-                "percentage": round((bucket["total_amount"] / total_amount * 100) if total_amount > 0 else 0, 1)
+                "bucket": self.AGING_LABELS[rank],
+                "total_amount": bucket["amount"],
+                "invoice_count": bucket["count"],
+                "percentage": round((bucket["amount"] / total_amount * 100) if total_amount > 0 else 0, 1)
             }
-            for bucket in buckets.values()
+            for rank, bucket in totals.items()
         ]
-        
-        # Flatten all invoices for detail view
-        all_invoice_details = []
-        for bucket_key, bucket in buckets.items():
-            for inv in bucket["invoices"]:
-                all_invoice_details.append({
-                    "id": inv["id"],
-                    "customer_name": inv["customer_name"],
-                    "invoice_date": inv["date_issued"],
-                    "due_date": inv["due_date"],
-                    "total_amount": inv["amount"],
-                    "days_outstanding": inv["days_overdue"],
-                    "aging_bucket": bucket["label"]
-                })
-        
-        return {
+
+        result = {
             "as_of_date": as_of_date.isoformat(),
             "summary": {
                 "total_outstanding": total_amount,
                 "total_invoices": total_invoices,
-                "avg_days_outstanding": sum(inv["days_overdue"] for bucket in buckets.values() for inv in bucket["invoices"]) // total_invoices if total_invoices > 0 else 0,
-                "oldest_days": max([inv["days_overdue"] for bucket in buckets.values() for inv in bucket["invoices"]], default=0),
-                "oldest_invoice": buckets["over_60"]["invoices"][0]["id"] if buckets["over_60"]["invoices"] else None,
-                "at_risk_amount": buckets["over_60"]["total_amount"],
-                "at_risk_count": len(buckets["over_60"]["invoices"])
+                "avg_days_outstanding": days_sum // total_invoices if total_invoices > 0 else 0,
+                "oldest_days": (as_of_date - oldest_due).days if oldest_due else 0,
+                "oldest_invoice": oldest_invoice,
+                "at_risk_amount": at_risk["amount"],
+                "at_risk_count": at_risk["count"]
             },
             "aging_buckets": aging_buckets,
-            "invoices": all_invoice_details,
             "generated_at": datetime.now().isoformat()
         }
+        if include_invoices:
+            result["invoices"] = await self.get_aging_invoices(as_of_date, page, page_size)
+            pagination = self._pagination(page, page_size, total_invoices)
+            if pagination:
+                result["pagination"] = pagination
+        return result
 
-    async def get_overdue_report(self) -> Dict[str, Any]:
-        """
-        Get overdue invoices report - invoices past their due date
-        """
-        today = date.today()
-        
-        # Get all overdue invoices
+    def _overdue_detail_statement(self, today: date, after: Optional[Tuple[date, int]] = None):
         stmt = select(
             Invoice.id,
             Invoice.date_issued,
             Invoice.invoice_due_date,
             Invoice.invoice_total,
-            Invoice.invoice_status,
             Customer.customer_name,
             Customer.customer_id,
             Customer.customer_phone,
-            Customer.customer_email
+            Customer.customer_email,
+            days_overdue(self.session, today).label('days_overdue')
         ).join(
             Customer, Invoice.customer_id == Customer.customer_id
         ).where(
-            and_(
-                Invoice.invoice_due_date < today,
-                Invoice.invoice_status.in_(['draft', 'sent']),
-                Invoice.invoice_status != 'cancelled'
-            )
+            *self._aging_filters(today)
         ).order_by(
-            Invoice.invoice_due_date.asc()  # Oldest due date first
+            Invoice.invoice_due_date.asc(), Invoice.id  # Oldest due date first
         )
-        
-        overdue_invoices = self.session.exec(stmt).all()
-        
-        # Calculate summary stats
-        total_overdue = len(overdue_invoices)
-        total_amount = sum(float(inv.invoice_total) for inv in overdue_invoices)
-        avg_days_late = sum((today - inv.invoice_due_date).days for inv in overdue_invoices) / total_overdue if total_overdue > 0 else 0
-        
-        # Categorize by suggested action
-        invoices_with_actions = []
-        for inv in overdue_invoices:
-            days_overdue = (today - inv.invoice_due_date).days
-            
-            if days_overdue >= 60:
-                action = "📞 Urgent Call"
-                priority = "High"
-            elif days_overdue >= 30:
-                action = "📞 Phone Call"
-                priority = "Medium"
-            elif days_overdue >= 15:
-                action = "📧 Email Reminder"
-                priority = "Medium"
-            else:
-                action = "📧 Gentle Reminder"
-                priority = "Low"
-            
-            invoices_with_actions.append({
-                "id": inv.id,
-                "customer_name": inv.customer_name,
-                "customer_id": inv.customer_id,
-                "customer_phone": inv.customer_phone,
-                "customer_email": inv.customer_email,
-                "date_issued": inv.date_issued.isoformat(),
-                "due_date": inv.invoice_due_date.isoformat(),
-                "amount": float(inv.invoice_total),
-                "days_overdue": days_overdue,
-                "suggested_action": action,
-                "priority": priority
-            })
-        
+        if after:
+            stmt = stmt.where(tuple_(Invoice.invoice_due_date, Invoice.id) > tuple_(*after))
+        return stmt
+
+    @staticmethod
+    def _overdue_detail(row) -> Dict[str, Any]:
+        days = row.days_overdue
+        if days >= 60:
+            action = "📞 Urgent Call"
+            priority = "High"
+        elif days >= 30:
+            action = "📞 Phone Call"
+            priority = "Medium"
+        elif days >= 15:
+            action = "📧 Email Reminder"
+            priority = "Medium"
+        else:
+            action = "📧 Gentle Reminder"
+            priority = "Low"
+
         return {
+            "id": row.id,
+            "customer_name": row.customer_name,
+            "customer_id": row.customer_id,
+            "customer_phone": row.customer_phone,
+            "customer_email": row.customer_email,
+            "date_issued": row.date_issued.isoformat(),
+            "due_date": row.invoice_due_date.isoformat(),
+            "amount": float(row.invoice_total),
+            "days_overdue": days,
+            "suggested_action": action,
+            "priority": priority
+        }
+
+    async def iter_overdue_invoices(self, chunk_size: int = 500):
+        """Overdue detail rows one at a time, fetched from a streaming cursor in chunks"""
+        stmt = self._overdue_detail_statement(date.today()).execution_options(yield_per=chunk_size)
+        async for row in await self.session.stream(stmt):
+            yield self._overdue_detail(row)
+
+    async def get_overdue_invoices(self, page: Optional[int] = None, page_size: Optional[int] = None,
+                                   after: Optional[Tuple[date, int]] = None) -> List[Dict[str, Any]]:
+        """
+        Overdue detail rows: all of them, or one page when page_size is set
+
+        Pass `after` (the (due date, id) of the previous page's last row) to page
+        by keyset instead of OFFSET.
+        """
+        stmt = self._overdue_detail_statement(date.today(), after)
+        stmt = stmt.limit(page_size) if after else self._page(stmt, page, page_size)
+        return [self._overdue_detail(row) for row in (await self.session.exec(stmt)).all()]
+
+    async def get_overdue_report(self, include_invoices: bool = True,
+                                 page: Optional[int] = None, page_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get overdue invoices report - invoices past their due date
+
+        Risk-tier counts and sums come from one grouped CASE query; invoice rows are
+        only read for the detail list (all of it, or one page when page_size is set)
+        """
+        today = date.today()
+        tiers = await self.session.run_sync(
+            aging_totals, today, self.OVERDUE_BOUNDS, self.OVERDUE_OVERFLOW, *self._aging_filters(today)
+        )
+
+        total_overdue = sum(tier["count"] for tier in tiers.values())
+        total_amount = sum(tier["amount"] for tier in tiers.values())
+        days_sum = sum(tier["days_sum"] for tier in tiers.values())
+        avg_days_late = days_sum / total_overdue if total_overdue > 0 else 0
+
+        result = {
             "summary": {
                 "total_overdue_invoices": total_overdue,
                 "total_overdue_amount": total_amount,
                 "avg_days_overdue": round(avg_days_late, 1),
-                "critical_count": len([i for i in invoices_with_actions if i["days_overdue"] >= 90]),
-                "critical_amount": sum(i["amount"] for i in invoices_with_actions if i["days_overdue"] >= 90),
-                "high_risk_count": len([i for i in invoices_with_actions if 60 <= i["days_overdue"] < 90]),
-                "high_risk_amount": sum(i["amount"] for i in invoices_with_actions if 60 <= i["days_overdue"] < 90),
-                "medium_risk_count": len([i for i in invoices_with_actions if 30 <= i["days_overdue"] < 60]),
-                "medium_risk_amount": sum(i["amount"] for i in invoices_with_actions if 30 <= i["days_overdue"] < 60),
-                "low_risk_count": len([i for i in invoices_with_actions if i["days_overdue"] < 30]),
-                "low_risk_amount": sum(i["amount"] for i in invoices_with_actions if i["days_overdue"] < 30)
+                "critical_count": tiers["critical"]["count"],
+                "critical_amount": tiers["critical"]["amount"],
+                "high_risk_count": tiers["high"]["count"],
+                "high_risk_amount": tiers["high"]["amount"],
+                "medium_risk_count": tiers["medium"]["count"],
+                "medium_risk_amount": tiers["medium"]["amount"],
+                "low_risk_count": tiers["low"]["count"],
+                "low_risk_amount": tiers["low"]["amount"]
             },
-            "invoices": invoices_with_actions,
             "generated_at": datetime.now().isoformat()
         }
+        if include_invoices:
+            result["invoices"] = await self.get_overdue_invoices(page, page_size)
+            pagination = self._pagination(page, page_size, total_overdue)
+            if pagination:
+                result["pagination"] = pagination
+        return result
 
     async def get_summary_statistics(self) -> Dict[str, Any]:
         """
         Get key summary statistics for dashboard
         """
-        # Total invoices
-        total_stmt = select(func.count(Invoice.id)).where(Invoice.invoice_status != 'cancelled')
-        total_invoices = self.session.exec(total_stmt).first()
-        
-        # Total revenue
-        revenue_stmt = select(func.coalesce(func.sum(Invoice.invoice_total), 0)).where(Invoice.invoice_status != 'cancelled')
-        total_revenue = self.session.exec(revenue_stmt).first()
-        
-        # Outstanding amount
-        outstanding_stmt = select(func.coalesce(func.sum(Invoice.invoice_total), 0)).where(
-            and_(
-                Invoice.invoice_status.in_(['draft', 'sent']),
-                Invoice.invoice_status != 'cancelled'
-            )
-        )
-        outstanding_amount = self.session.exec(outstanding_stmt).first()
-        
-        # Total customers
-        customers_stmt = select(func.count(Customer.customer_id))
-        total_customers = self.session.exec(customers_stmt).first()
-        
+        return self._summary_statistics((await self._dashboard_totals(date.today())))
+
+    @staticmethod
+    def _summary_statistics(totals) -> Dict[str, Any]:
         return {
-            "total_invoices": total_invoices or 0,
-            "total_revenue": float(total_revenue) if total_revenue else 0,
-            "outstanding_amount": float(outstanding_amount) if outstanding_amount else 0,
-            "total_customers": total_customers or 0
+            "total_invoices": int(totals.total_invoices),
+            "total_revenue": float(totals.total_revenue),
+            "outstanding_amount": float(totals.outstanding_amount),
+            "total_customers": int(totals.total_customers)
         }
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Incrementally maintained revenue rollup (year, month, status → count, total).
+
+Invoice write paths call record_invoice_changes() with the (date_issued,
+status, total) of each invoice before and after the write, inside the same
+transaction. Deltas are merged per key and applied with a single upsert
+executemany, so the rollup commits or rolls back with the invoice rows.
+
+rebuild_revenue_rollup() recomputes the table from `invoice` with one
+grouped INSERT ... SELECT (scripts/rebuild_revenue_rollup.py, and lazily on
+first use until the rebuild has been recorded, see services.backfill).
+"""
+
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert
+from sqlmodel import Session, select
+
+from models import Invoice, RevenueRollup
+from services.backfill import is_backfilled, mark_backfilled
+from services.upsert import upsert_increments
+
+# (date_issued, invoice_status, invoice_total) — None for "did not exist"
+InvoiceState = Optional[Tuple[date, str, float]]
+
+KEY_COLUMNS = ("year", "month", "invoice_status")
+BACKFILL_NAME = "revenue_rollup"
+
+_checked = set()   # engine urls already verified as backfilled
+
+
+def record_invoice_changes(session: Session, changes: Iterable[Tuple[InvoiceState, InvoiceState]]) -> None:
+    """Apply before/after invoice states to the rollup. Does not commit."""
+    deltas = {}
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            issued, status, total = state
+            key = (issued.year, issued.month, status)
+            count, amount = deltas.get(key, (0, 0.0))
+            deltas[key] = (count + sign, amount + sign * (total or 0.0))
+
+    rows = [
+        {"year": year, "month": month, "invoice_status": status,
+         "invoice_count": count, "total_amount": amount}
+        for (year, month, status), (count, amount) in deltas.items()
+        if count or amount
+    ]
+    if rows:
+        upsert_increments(session, RevenueRollup, KEY_COLUMNS, rows)
+
+
+def rebuild_revenue_rollup(session: Session) -> int:
+    """Recompute the rollup from scratch with one grouped INSERT ... SELECT. Commits."""
+    year = func.extract("year", Invoice.date_issued)
+    month = func.extract("month", Invoice.date_issued)
+    grouped = (
+        select(
+            year, month, Invoice.invoice_status,
+            func.count(Invoice.id), func.coalesce(func.sum(Invoice.invoice_total), 0.0),
+        )
+        .group_by(year, month, Invoice.invoice_status)
+    )
+    session.execute(delete(RevenueRollup))
+    session.execute(
+        insert(RevenueRollup).from_select(
+            ["year", "month", "invoice_status", "invoice_count", "total_amount"], grouped
+        )
+    )
+    mark_backfilled(session, BACKFILL_NAME)
+    session.commit()
+    return session.exec(select(func.count()).select_from(RevenueRollup)).one()
+
+
+def ensure_revenue_rollup(session: Session) -> None:
+    """Rebuild from invoice history unless a completed backfill is recorded (checked once per process)."""
+    key = str(session.get_bind().url)
+    if key in _checked:
+        return
+    if not is_backfilled(session, BACKFILL_NAME):
+        rebuild_revenue_rollup(session)
+    _checked.add(key)
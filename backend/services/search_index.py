@@ -0,0 +1,214 @@
+"""
+Indexed text search for customers and products.
+
+search_ids() — ranked, word-prefix typeahead over every searchable column:
+SQLite  → external-content FTS5 tables (customer_fts, product_fts) with
+          prefix indexes, kept in sync by AFTER INSERT/UPDATE/DELETE triggers
+          and ranked by bm25.
+Postgres → every word must start a word in one of the searchable columns
+          (a `~* '\\mword'` regex per word, ANDed, like the FTS5 query),
+          served by pg_trgm GIN indexes (maintained by Postgres itself)
+          and ranked prefix-first then by similarity().
+
+substring_ids() — case-insensitive substring filter on one name column
+(the `ILIKE '%q%'` semantics of list filters), in primary-key order:
+SQLite  → an FTS5 trigram table per column (customer_name_trgm), same
+          trigger sync; terms under three characters fall back to a scan.
+Postgres → ILIKE served by the same pg_trgm GIN index.
+
+Because sync happens inside the database, every write path — ORM routes,
+bulk inserts, seed scripts — keeps the index current without app hooks.
+If neither backend feature is available, search degrades to an ILIKE scan.
+"""
+
+import logging
+import re
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+logger = logging.getLogger(__name__)
+
+# table → (primary key, searchable columns); the first column drives ranking
+SEARCH_TABLES = {
+    "customer": ("customer_id", ["customer_name", "customer_email"]),
+    "product": ("product_id", ["product_description"]),
+}
+
+# table → column filtered by substring_ids()
+SUBSTRING_COLUMNS = {
+    "customer": "customer_name",
+}
+
+_ready = {}   # engine url → "fts5" | "trgm" | "scan"
+_substring_ready = {}   # engine url → True when SQLite trigram tables exist
+
+LIKE_ESCAPE = "\\"
+
+
+def _like_escape(q: str) -> str:
+    """Escape LIKE wildcards so user text matches literally (use with ESCAPE '\\')."""
+    return q.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2).replace("%", LIKE_ESCAPE + "%").replace("_", LIKE_ESCAPE + "_")
+
+
+def _ensure_sqlite(conn, table: str, pk: str, columns: List[str], fts: str = None, options: str = "prefix='2 3'"):
+    fts = fts or f"{table}_fts"
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{c}" for c in columns)
+    old_cols = ", ".join(f"old.{c}" for c in columns)
+
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+    ).first()
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='{pk}', {options})"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.{pk}, {new_cols}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{pk}, {old_cols}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{pk}, {old_cols}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.{pk}, {new_cols}); END"
+    ))
+    if not exists:
+        # Index rows written before the virtual table existed
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def _ensure_postgres(conn, table: str, columns: List[str]):
+    for column in columns:
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_{column}_trgm "
+            f"ON {table} USING gin ({column} gin_trgm_ops)"
+        ))
+
+
+def ensure_search_indexes(engine: Engine) -> str:
+    """Create the search structures for this engine's dialect (idempotent)."""
+    key = str(engine.url)
+    if key in _ready:
+        return _ready[key]
+
+    mode = "scan"
+    try:
+        with engine.begin() as conn:
+            if engine.dialect.name == "sqlite":
+                for table, (pk, columns) in SEARCH_TABLES.items():
+                    _ensure_sqlite(conn, table, pk, columns)
+                mode = "fts5"
+            elif engine.dialect.name == "postgresql":
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                for table, (_, columns) in SEARCH_TABLES.items():
+                    _ensure_postgres(conn, table, columns)
+                mode = "trgm"
+    except Exception as e:
+        logger.warning(f"Search index unavailable, falling back to ILIKE scans: {e}")
+        mode = "scan"
+
+    substring = False
+    if engine.dialect.name == "sqlite" and mode == "fts5":
+        try:
+            with engine.begin() as conn:
+                for table, column in SUBSTRING_COLUMNS.items():
+                    pk, _ = SEARCH_TABLES[table]
+                    _ensure_sqlite(conn, table, pk, [column], fts=f"{column}_trgm", options="tokenize='trigram'")
+            substring = True
+        except Exception as e:
+            logger.warning(f"Trigram index unavailable, substring filters use LIKE scans: {e}")
+
+    _ready[key] = mode
+    _substring_ready[key] = substring
+    return mode
+
+
+def _query_tokens(q: str) -> List[str]:
+    return re.findall(r"\w+", q.lower())
+
+
+def _fts_query(q: str) -> str:
+    """Turn free text into an FTS5 prefix query: every token must prefix-match."""
+    return " ".join(f'"{token}"*' for token in _query_tokens(q))
+
+
+def search_ids(session: Session, table: str, q: str, limit: int = 20, offset: int = 0) -> List[int]:
+    """Return primary keys of `table` rows matching `q`, best match first."""
+    pk, columns = SEARCH_TABLES[table]
+    q = (q or "").strip()
+    if not q:
+        return []
+
+    mode = ensure_search_indexes(session.get_bind())
+    params = {"limit": limit, "offset": offset}
+
+    if mode == "fts5":
+        params["match"] = _fts_query(q)
+        if not params["match"]:
+            return []
+        sql = (
+            f"SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH :match "
+            f"ORDER BY rank LIMIT :limit OFFSET :offset"
+        )
+    elif mode == "trgm":
+        tokens = _query_tokens(q)
+        if not tokens:
+            return []
+        # Tokens are word characters only, so they're safe inside the regex; \m anchors a word start
+        params.update({f"word{i}": rf"\m{token}" for i, token in enumerate(tokens)})
+        params.update(q=q, prefix=f"{_like_escape(q)}%")
+        where = " AND ".join(
+            "(" + " OR ".join(f"{c} ~* :word{i}" for c in columns) + ")" for i in range(len(tokens))
+        )
+        sql = (
+            f"SELECT {pk} FROM {table} WHERE {where} "
+            f"ORDER BY ({columns[0]} ILIKE :prefix ESCAPE '{LIKE_ESCAPE}') DESC, similarity({columns[0]}, :q) DESC, {pk} "
+            f"LIMIT :limit OFFSET :offset"
+        )
+    else:
+        params.update(contains=f"%{_like_escape(q.lower())}%")
+        where = " OR ".join(f"LOWER({c}) LIKE :contains ESCAPE '{LIKE_ESCAPE}'" for c in columns)
+        sql = f"SELECT {pk} FROM {table} WHERE {where} ORDER BY {pk} LIMIT :limit OFFSET :offset"
+
+    return [row[0] for row in session.execute(text(sql), params).all()]
+
+
+def substring_ids(session: Session, table: str, q: str, limit: int = 100, offset: int = 0) -> List[int]:
+    """Primary keys of `table` rows whose name column contains `q` (case-insensitive), in key order."""
+    pk, _ = SEARCH_TABLES[table]
+    column = SUBSTRING_COLUMNS[table]
+    if not q:
+        return []
+
+    engine = session.get_bind()
+    mode = ensure_search_indexes(engine)
+    params = {"limit": limit, "offset": offset}
+
+    if _substring_ready.get(str(engine.url)) and len(q) >= 3:
+        # A quoted trigram phrase matches the literal substring
+        params["match"] = '"' + q.replace('"', '""') + '"'
+        sql = (
+            f"SELECT rowid FROM {column}_trgm WHERE {column}_trgm MATCH :match "
+            f"ORDER BY rowid LIMIT :limit OFFSET :offset"
+        )
+    elif mode == "trgm":
+        params["contains"] = f"%{_like_escape(q)}%"
+        sql = (
+            f"SELECT {pk} FROM {table} WHERE {column} ILIKE :contains ESCAPE '{LIKE_ESCAPE}' "
+            f"ORDER BY {pk} LIMIT :limit OFFSET :offset"
+        )
+    else:
+        params["contains"] = f"%{_like_escape(q.lower())}%"
+        sql = (
+            f"SELECT {pk} FROM {table} WHERE LOWER({column}) LIKE :contains ESCAPE '{LIKE_ESCAPE}' "
+            f"ORDER BY {pk} LIMIT :limit OFFSET :offset"
+        )
+
+    return [row[0] for row in session.execute(text(sql), params).all()]
@@ -0,0 +1,300 @@
+"""
+Embedding kNN classification of bank transactions, run after category
+rules and the classification memo and before the model call.
+
+Merchant strings vary ("UBER *TRIP 8XK2", "UBER EATS 4411") so exact keys
+miss transactions that are obviously the same category. Every
+classification_memo row (a confirmed merchant key → accounts) is embedded
+with all-MiniLM-L6-v2, the model ml-extractor's semantic_matcher uses; a
+transaction is embedded the same way and compared by cosine similarity to
+the memo rows of its cash account and amount sign:
+  - neighbours → the KNN_NEIGHBORS most similar rows at or above
+                 KNN_MIN_SIMILARITY
+  - vote       → each neighbour adds similarity² to its (debit, credit)
+                 account pair
+  - confidence → winning pair's share of the vote × its best similarity
+Transactions at or above KNN_MIN_CONFIDENCE take the winning accounts
+(and the type / journal description of its closest row); the rest go to
+the model. kNN confidence stays below 1.0, so these results are flagged
+for review unless they clear CONFIDENCE_THRESHOLD.
+
+Embeddings are stored in `transaction_embedding` per (merchant key, model),
+filled in for new memo rows when an index is built. The index is a NumPy
+matrix per cash account — brute-force matrix products are exact and cheap
+at memo sizes — cached per process, dropped after confirm_bank_statement
+updates the memo and after KNN_INDEX_TTL_SECONDS.
+
+Embeddings come from ML_EXTRACTOR_MODE, like AP invoice extraction:
+  "lambda" → the ml-extractor Lambda ({"texts": [...]})
+  "http"   → ML_EXTRACTOR_URL/embed
+  "local"  → sentence-transformers in-process when installed
+When no backend is reachable the stage is skipped and every transaction
+goes to the model.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from models import ClassificationMemo, TransactionEmbedding
+from services.classification_memo import amount_sign, merchant_key
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_KNN = os.getenv("TRANSACTION_KNN", "true").lower() == "true"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+KNN_NEIGHBORS = int(os.getenv("KNN_NEIGHBORS", 5))
+KNN_MIN_SIMILARITY = float(os.getenv("KNN_MIN_SIMILARITY", 0.55))
+KNN_MIN_CONFIDENCE = float(os.getenv("KNN_MIN_CONFIDENCE", 0.70))
+KNN_INDEX_TTL_SECONDS = int(os.getenv("KNN_INDEX_TTL_SECONDS", 300))
+EMBED_BATCH = 256
+
+ML_EXTRACTOR_MODE = os.getenv("ML_EXTRACTOR_MODE", "local")
+ML_EXTRACTOR_FUNCTION = os.getenv("ML_EXTRACTOR_FUNCTION", "ml-extractor-dev")
+ML_EXTRACTOR_URL = os.getenv("ML_EXTRACTOR_URL", "http://localhost:8001")
+
+
+# ── Embeddings ────────────────────────────────────────────────────────────────
+
+_local_model = None   # SentenceTransformer, or False once the import has failed
+
+
+def _embed_local(texts: List[str]) -> Optional[List[List[float]]]:
+    global _local_model
+    if _local_model is None:
+        try:
+            from sentence_transformers import SentenceTransformer
+            _local_model = SentenceTransformer(EMBEDDING_MODEL)
+        except ImportError:
+            logger.info("sentence-transformers is not installed; transaction kNN is disabled")
+            _local_model = False
+        except Exception as e:
+            # No network to download the model, a read-only filesystem, ... — don't retry on every upload
+            logger.warning(f"Could not load {EMBEDDING_MODEL} ({e}); transaction kNN is disabled")
+            _local_model = False
+    if _local_model is False:
+        return None
+    return _local_model.encode(texts, show_progress_bar=False, normalize_embeddings=True)
+
+
+def _embed_remote(texts: List[str]) -> List[List[float]]:
+    if ML_EXTRACTOR_MODE == "lambda":
+        import boto3
+        response = boto3.client("lambda").invoke(
+            FunctionName=ML_EXTRACTOR_FUNCTION,
+            InvocationType="RequestResponse",
+            Payload=json.dumps({"texts": texts}),
+        )
+        result = json.loads(response["Payload"].read())
+        if result.get("statusCode") != 200:
+            raise RuntimeError(f"ml-extractor returned status {result.get('statusCode')}")
+        return result["body"]["embeddings"]
+
+    import httpx
+    response = httpx.post(f"{ML_EXTRACTOR_URL}/embed", json={"texts": texts}, timeout=30.0)
+    response.raise_for_status()
+    return response.json()["embeddings"]
+
+
+def embed(texts: List[str]) -> Optional[np.ndarray]:
+    """Unit-normalized float32 embeddings (len(texts) × dim), or None when no backend is reachable."""
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    chunks = []
+    try:
+        for offset in range(0, len(texts), EMBED_BATCH):
+            batch = texts[offset:offset + EMBED_BATCH]
+            vectors = _embed_remote(batch) if ML_EXTRACTOR_MODE in ("lambda", "http") else _embed_local(batch)
+            if vectors is None:
+                return None
+            chunks.append(np.asarray(vectors, dtype=np.float32))
+    except Exception as e:
+        logger.warning(f"Transaction embedding failed ({e}); skipping kNN classification")
+        return None
+    return np.vstack(chunks)
+
+
+# ── Index ─────────────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class KnnLabel:
+    merchant_key: str
+    debit_account: str
+    credit_account: str
+    type: str
+    journal_description: str
+
+
+class KnnIndex:
+    def __init__(self, labels: List[KnnLabel], signs: np.ndarray, vectors: np.ndarray):
+        self.labels = labels
+        # Neighbours must share the amount sign, so each sign gets its own matrix
+        self._by_sign = {
+            int(sign): (columns, vectors[columns])
+            for sign in np.unique(signs)
+            for columns in [np.flatnonzero(signs == sign)]
+        }
+
+    def __len__(self):
+        return len(self.labels)
+
+    def classify(self, queries: np.ndarray, signs: np.ndarray) -> List[Optional[Tuple[KnnLabel, float]]]:
+        """Best label and confidence per query row (None when no neighbour is similar enough)."""
+        results: List[Optional[Tuple[KnnLabel, float]]] = [None] * len(queries)
+        for sign, (columns, vectors) in self._by_sign.items():
+            rows = np.flatnonzero(signs == sign)
+            if not len(rows):
+                continue
+            similarity = queries[rows] @ vectors.T
+            k = min(KNN_NEIGHBORS, len(columns))
+            nearest = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+            for i, row in enumerate(rows):
+                results[row] = self._vote(columns[nearest[i]], similarity[i, nearest[i]])
+        return results
+
+    def _vote(self, columns: np.ndarray, scores: np.ndarray) -> Optional[Tuple[KnnLabel, float]]:
+        votes: Dict[Tuple[str, str], float] = {}
+        closest: Dict[Tuple[str, str], Tuple[float, KnnLabel]] = {}
+        for column, score in zip(columns.tolist(), scores.tolist()):
+            if score < KNN_MIN_SIMILARITY:
+                continue
+            label = self.labels[column]
+            pair = (label.debit_account, label.credit_account)
+            votes[pair] = votes.get(pair, 0.0) + score * score
+            if score > closest.get(pair, (-1.0, None))[0]:
+                closest[pair] = (score, label)
+        if not votes:
+            return None
+        winner = max(votes, key=votes.get)
+        best_similarity, label = closest[winner]
+        return label, round(votes[winner] / sum(votes.values()) * min(best_similarity, 1.0), 3)
+
+
+def _stored_vectors(session: Session, keys: List[str]) -> Dict[str, np.ndarray]:
+    """Embeddings for `keys`, computing and storing the missing ones ({} when embedding is unavailable)."""
+    vectors = {
+        key: np.frombuffer(vector, dtype=np.float32)
+        for key, vector in session.exec(
+            select(TransactionEmbedding.merchant_key, TransactionEmbedding.vector)
+            .where(TransactionEmbedding.model == EMBEDDING_MODEL, TransactionEmbedding.merchant_key.in_(keys))
+        ).all()
+    }
+    missing = [key for key in keys if key not in vectors]
+    if missing:
+        embedded = embed(missing)
+        if embedded is None:
+            return {}
+        now = datetime.utcnow()
+        # Own short-lived session: committing here must not commit the caller's request session
+        with Session(session.get_bind()) as store:
+            try:
+                store.execute(insert(TransactionEmbedding), [
+                    {"merchant_key": key, "model": EMBEDDING_MODEL, "vector": vector.tobytes(), "created_at": now}
+                    for key, vector in zip(missing, embedded)
+                ])
+                store.commit()
+            except IntegrityError:
+                # Another process stored some of them first; ours are identical
+                store.rollback()
+        vectors.update(zip(missing, embedded))
+    return vectors
+
+
+def _build_index(session: Session, cash_gl_code: str) -> Optional[KnnIndex]:
+    memos = session.exec(select(ClassificationMemo).where(ClassificationMemo.cash_gl_code == cash_gl_code)).all()
+    if not memos:
+        return KnnIndex([], np.zeros(0, dtype=np.int8), np.zeros((0, 0), dtype=np.float32))
+    vectors = _stored_vectors(session, sorted({memo.merchant_key for memo in memos}))
+    if not vectors:
+        return None
+    return KnnIndex(
+        [KnnLabel(m.merchant_key, m.debit_account, m.credit_account, m.type, m.journal_description) for m in memos],
+        np.array([m.amount_sign for m in memos], dtype=np.int8),
+        np.vstack([vectors[m.merchant_key] for m in memos]),
+    )
+
+
+_lock = threading.Lock()
+_indexes: Dict[Tuple[str, str], Tuple[float, KnnIndex]] = {}   # (engine url, cash GL code) → (built at, index)
+_generation = 0   # bumped by invalidate_knn_indexes so a build racing a memo change isn't cached
+
+
+def get_knn_index(session: Session, cash_gl_code: str) -> Optional[KnnIndex]:
+    """The cash account's memo index (None when embeddings are unavailable)."""
+    key = (str(session.get_bind().url), cash_gl_code)
+    with _lock:
+        cached = _indexes.get(key)
+        generation = _generation
+    if cached and time.monotonic() - cached[0] <= KNN_INDEX_TTL_SECONDS:
+        return cached[1]
+
+    index = _build_index(session, cash_gl_code)
+    if index is not None:
+        with _lock:
+            if generation == _generation:
+                _indexes[key] = (time.monotonic(), index)
+    return index
+
+
+def invalidate_knn_indexes() -> None:
+    """Drop every cached index (call after committing memo changes)."""
+    global _generation
+    with _lock:
+        _indexes.clear()
+        _generation += 1
+
+
+# ── Classification ────────────────────────────────────────────────────────────
+
+def classify_knn(session: Session, transactions: List[dict], cash_gl_code: str) -> Tuple[List[dict], List[dict]]:
+    """
+    Split transactions into kNN-classified (confidence ≥ KNN_MIN_CONFIDENCE)
+    and the rest (still need the model), preserving order within each list.
+    """
+    if not TRANSACTION_KNN or not transactions:
+        return [], transactions
+    index = get_knn_index(session, cash_gl_code)
+    if not index:
+        return [], transactions
+
+    keys = [merchant_key(txn.get("description") or "") for txn in transactions]
+    distinct = sorted({key for key in keys if key})
+    embedded = embed(distinct) if distinct else None
+    if embedded is None:
+        return [], transactions
+    rows = {key: row for row, key in enumerate(distinct)}
+
+    candidates = [i for i, key in enumerate(keys) if key]
+    results = index.classify(
+        embedded[[rows[keys[i]] for i in candidates]],
+        np.array([amount_sign(transactions[i]) for i in candidates], dtype=np.int8),
+    )
+    accepted = {i: result for i, result in zip(candidates, results) if result and result[1] >= KNN_MIN_CONFIDENCE}
+
+    hits, misses = [], []
+    for i, txn in enumerate(transactions):
+        if i not in accepted:
+            misses.append(txn)
+            continue
+        label, confidence = accepted[i]
+        hits.append({
+            **txn,
+            "debit_account": label.debit_account,
+            "credit_account": label.credit_account,
+            "journal_description": label.journal_description,
+            "type": label.type,
+            "confidence": confidence,
+            "rule_matched": None,
+            "knn_matched": label.merchant_key,
+        })
+    return hits, misses
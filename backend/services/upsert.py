@@ -0,0 +1,42 @@
+"""
+Additive upserts for incrementally maintained aggregate tables.
+
+Rows carry deltas; existing rows get `column = column + excluded.column`,
+missing rows are inserted as-is. Postgres and SQLite use a single
+INSERT ... ON CONFLICT DO UPDATE executemany; other dialects fall back to
+get-or-create through the ORM.
+"""
+
+from typing import List, Sequence
+
+from sqlmodel import Session
+
+
+def upsert_increments(session: Session, model, key_columns: Sequence[str], rows: List[dict]) -> None:
+    """Add each row's non-key values onto the row with the same key. Does not commit."""
+    if not rows:
+        return
+    value_columns = [column for column in rows[0] if column not in key_columns]
+
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        for row in rows:
+            existing = session.get(model, tuple(row[column] for column in key_columns))
+            if existing:
+                for column in value_columns:
+                    setattr(existing, column, getattr(existing, column) + row[column])
+            else:
+                session.add(model(**row))
+        session.flush()
+        return
+
+    stmt = dialect_insert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={column: getattr(model, column) + stmt.excluded[column] for column in value_columns},
+    )
+    session.execute(stmt, rows)
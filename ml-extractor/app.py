@@ -3,11 +3,13 @@ ML Extractor service — dual-mode entry point.
 
 Lambda mode  (ML_EXTRACTOR_MODE=lambda):
     Invoked directly by main backend Lambda via boto3.
-    Handler receives { "pdf_bytes": "<base64>" } and returns extraction result.
+    Handler receives { "pdf_bytes": "<base64>" } and returns extraction result,
+    or { "texts": [...] } and returns { "embeddings": [[...], ...] }.
 
 HTTP mode (ML_EXTRACTOR_MODE=http, future ECS Fargate):
     Runs as a FastAPI app on port 8001.
     POST /extract accepts multipart PDF upload.
+    POST /embed accepts { "texts": [...] }.
     Switch modes by changing ML_EXTRACTOR_MODE env var — zero code changes needed.
 """
 
@@ -16,12 +18,16 @@ import json
 import os
 
 from pdf_processor import extract as semantic_extract
+from semantic_matcher import get_matcher
 
 # ── Lambda handler ─────────────────────────────────────────────────────────────
 
 def handler(event, context):
     """AWS Lambda entry point."""
     try:
+        if "texts" in event:
+            return {"statusCode": 200, "body": {"embeddings": get_matcher().embed(event["texts"]).tolist()}}
+
         pdf_b64 = event.get("pdf_bytes")
         if not pdf_b64:
             return {"statusCode": 400, "body": {"error": "pdf_bytes required"}}
@@ -68,6 +74,10 @@ def _build_fastapi_app():
                 result[key] = result[key].isoformat()
         return result
 
+    @app.post("/embed")
+    def embed_endpoint(body: dict):
+        return {"embeddings": get_matcher().embed(body.get("texts") or []).tolist()}
+
     return app
 
 
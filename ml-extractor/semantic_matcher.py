@@ -81,6 +81,10 @@ class SemanticMatcher:
         for field, aliases in STANDARD_FIELDS.items():
             self._field_embeddings[field] = self.model.encode(aliases, show_progress_bar=False)
 
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Unit-normalized embeddings (the backend's bank transaction kNN classifier)."""
+        return self.model.encode(texts, show_progress_bar=False, normalize_embeddings=True)
+
     def match_header(self, header: str, threshold: float = 0.50) -> tuple[str | None, float]:
         """
         Match a single column header to the best standard field.